@@ -0,0 +1,132 @@
+# backend/admission.py
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import Counter, deque
+
+from telemetry import ADMISSIONS
+
+logger = logging.getLogger(__name__)
+
+# Per worker process. ADMISSION_MAX_INFLIGHT=0 turns admission control off.
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", "8"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "16"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+MAX_RETRY_AFTER = 60
+
+
+class Overloaded(Exception):
+    """No analysis slot freed up in time; retry after ``retry_after`` seconds."""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(f"Server is busy, retry in {retry_after}s")
+
+
+class AdmissionController:
+    """Bounded number of running analyses with a bounded FIFO wait queue.
+
+    ``try_acquire`` takes a free slot without waiting. ``acquire`` waits up
+    to ``queue_timeout`` seconds for one and raises Overloaded when the queue
+    is full or the deadline passes. Every slot taken must be ``release``d;
+    a released slot goes straight to the longest waiter. Runs on the event
+    loop only, so no locking.
+    """
+
+    def __init__(self, max_inflight: int = ADMISSION_MAX_INFLIGHT, max_queue: int = ADMISSION_MAX_QUEUE,
+                 queue_timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.inflight = 0
+        self.waiters = deque()
+        self.counts = Counter()
+        self._started = deque()  # start times of running slots, oldest first
+        self._avg_seconds = None  # moving average of how long a slot is held
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_inflight > 0
+
+    def try_acquire(self) -> bool:
+        if self.enabled and (self.inflight >= self.max_inflight or self.waiters):
+            return False
+        self._take()
+        return True
+
+    async def acquire(self):
+        """Wait for a slot, FIFO behind earlier waiters."""
+        if self.try_acquire():
+            return
+        if len(self.waiters) >= self.max_queue:
+            self._shed("queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        self.count("queued")
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self._shed("queue_timeout")
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def release(self):
+        if self._started:
+            held = time.monotonic() - self._started.popleft()
+            self._avg_seconds = held if self._avg_seconds is None else 0.8 * self._avg_seconds + 0.2 * held
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                # Hand the slot over; inflight stays the same.
+                waiter.set_result(None)
+                self._started.append(time.monotonic())
+                self.count("admitted")
+                return
+        self.inflight -= 1
+
+    def _take(self):
+        self.inflight += 1
+        self._started.append(time.monotonic())
+        self.count("admitted")
+
+    def _abandon(self, waiter):
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just as we gave up: pass it on.
+            self.release()
+        else:
+            waiter.cancel()
+            try:
+                self.waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def _shed(self, reason: str):
+        self.count("shed")
+        logger.warning(f"🚦 Shedding analysis ({reason}): {self.inflight} running, {len(self.waiters)} queued")
+        raise Overloaded(self.retry_after())
+
+    def count(self, result: str):
+        self.counts[result] += 1
+        ADMISSIONS.inc(result=result)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free for a new request."""
+        if self._avg_seconds is None:
+            return max(1, math.ceil(self.queue_timeout))
+        backlog = (len(self.waiters) + 1) / max(1, self.max_inflight)
+        return min(MAX_RETRY_AFTER, max(1, math.ceil(self._avg_seconds * backlog)))
+
+    def snapshot(self):
+        return {
+            "enabled": self.enabled,
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "inflight": self.inflight,
+            "queued_now": len(self.waiters),
+            **{key: self.counts.get(key, 0) for key in ("admitted", "queued", "shed", "served_stale", "skipped_ai")},
+        }
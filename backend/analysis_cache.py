@@ -0,0 +1,273 @@
+# backend/analysis_cache.py
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from cache_store import SQLiteStore
+from github_scheduler import GITHUB_API_URL
+from telemetry import record_upstream
+
+# Seconds each cached section stays fresh. Everything is also keyed by the
+# default-branch head SHA, so a new commit invalidates the lot; the TTLs cover
+# data that changes without a commit (stars, contributors, issues).
+SECTION_TTLS = {
+    "repo_info": int(os.getenv("CACHE_TTL_REPO_INFO", "3600")),
+    "tree": int(os.getenv("CACHE_TTL_TREE", "86400")),
+    "community": int(os.getenv("CACHE_TTL_COMMUNITY", "900")),
+    "ai_analysis": int(os.getenv("CACHE_TTL_AI_ANALYSIS", "604800")),
+}
+# "tree_index" (the path index the next commit's diff is applied to) has no
+# TTL: it is only ever read expired.
+
+# A head SHA delivered by a push webhook is trusted this long without asking
+# GitHub again, in case later pushes' webhooks go missing.
+PUSHED_HEAD_TRUST = int(os.getenv("WEBHOOK_HEAD_TRUST", "3600"))
+
+# Hash field holding an entry's version in the store.
+VERSION_FIELD = "_version"
+
+
+def fetch_head_sha(repo_path: str, token: Optional[str] = None, etag: Optional[str] = None):
+    """Conditionally fetch the default-branch head SHA.
+
+    Returns ``(sha, etag)``, or ``(None, etag)`` when GitHub answered 304 Not
+    Modified. A 304 does not count against the rate limit.
+    """
+    import requests  # deferred like PyGithub: it is most of this module's import time
+
+    headers = {"Accept": "application/vnd.github.sha"}
+    if token:
+        headers["Authorization"] = f"token {token}"
+    if etag:
+        headers["If-None-Match"] = etag
+
+    response = requests.get(
+        f"{GITHUB_API_URL}/repos/{repo_path}/commits/HEAD", headers=headers, timeout=10
+    )
+    record_upstream("github", response.status_code)
+    if response.status_code == 304:
+        return None, etag
+    response.raise_for_status()
+    return response.text.strip(), response.headers.get("ETag")
+
+
+class AnalysisCache:
+    """Two-tier cache of analysis sections: an in-process LRU in front of an
+    optional shared store (see cache_store), keyed by ``owner/repo`` plus
+    head SHA.
+
+    Every write to the store gives the entry a new version, and the local
+    copy is only used while its version matches, so worker processes
+    sharing a store never serve each other outdated sections.
+    """
+
+    def __init__(self, max_entries: int = 256, db_path: Optional[str] = None, ttls=None, store=None):
+        self.max_entries = max_entries
+        self.ttls = ttls or SECTION_TTLS
+        self._entries = OrderedDict()  # (repo_path, sha) -> (version, {section: (value, stored_at)})
+        self._heads = {}  # repo_path -> (sha, etag, pushed_at), without a store
+        self._lock = threading.Lock()
+        self._store = store or (SQLiteStore(db_path) if db_path else None)
+
+    @staticmethod
+    def _normalize(repo_path: str) -> str:
+        return repo_path.lower()
+
+    @staticmethod
+    def _sections_key(key) -> str:
+        return f"sections:{key[0]}:{key[1]}"
+
+    # ---------- Head SHA ----------
+    def get_head(self, repo_path: str):
+        """``(sha, etag)`` of the stored head, or None."""
+        head = self._head(repo_path)
+        return head[:2] if head else None
+
+    def _head(self, repo_path: str):
+        repo_path = self._normalize(repo_path)
+        if self._store:
+            head = self._store.hgetall(f"head:{repo_path}")
+            if not head:
+                return None
+            return head["sha"], head.get("etag") or None, float(head.get("pushed_at") or 0)
+        with self._lock:
+            return self._heads.get(repo_path)
+
+    def set_head(self, repo_path: str, sha: str, etag: Optional[str], pushed: bool = False):
+        """Store the head SHA; ``pushed`` marks one delivered by a push webhook."""
+        repo_path = self._normalize(repo_path)
+        pushed_at = time.time() if pushed else 0
+        if self._store:
+            self._store.hset(f"head:{repo_path}", {"sha": sha, "etag": etag or "", "pushed_at": str(pushed_at)})
+            return
+        with self._lock:
+            self._heads[repo_path] = (sha, etag, pushed_at)
+
+    def resolve_head(self, repo_path: str, pick_token: Optional[Callable[[], str]] = None) -> str:
+        """Return the current head SHA, revalidating the stored one with ETag
+        unless a push webhook delivered it recently. ``pick_token`` is only
+        called when a request is actually made."""
+        head = self._head(repo_path)
+        if head and time.time() - head[2] < PUSHED_HEAD_TRUST:
+            return head[0]
+        sha, etag = fetch_head_sha(repo_path, pick_token() if pick_token else None, head[1] if head else None)
+        if sha is None:
+            return head[0]
+        self.set_head(repo_path, sha, etag)
+        return sha
+
+    # ---------- Sections ----------
+    # ``_lock`` only guards the in-process entries; store I/O runs outside it
+    # so a slow store call never holds up readers of the local copy.
+    def get_sections(self, repo_path: str, sha: str, include_expired: bool = False,
+                     refresh_ahead: float = 0) -> Dict:
+        """Return the sections cached for this SHA that are still within TTL
+        (or all of them with ``include_expired``). Sections expiring within
+        ``refresh_ahead`` seconds are treated as already expired."""
+        entry = self._load((self._normalize(repo_path), sha))
+        if entry is None:
+            return {}
+        now = time.time()
+        return {
+            section: value
+            for section, (value, stored_at) in entry.items()
+            if include_expired or now - stored_at < self.ttls.get(section, 0) - refresh_ahead
+        }
+
+    def put_sections(self, repo_path: str, sha: str, sections: Dict):
+        if not sections:
+            return
+        key = (self._normalize(repo_path), sha)
+        now = time.time()
+        self._write(key, {section: (value, now) for section, value in sections.items()})
+        if self._store:
+            # Older SHAs of the same repo can never be served again.
+            older = [other for other in self._store.hgetall(f"shas:{key[0]}") if other != sha]
+            if older:
+                self._store.delete(*[self._sections_key((key[0], other)) for other in older])
+                self._store.hdel(f"shas:{key[0]}", *older)
+                with self._lock:
+                    for other in older:
+                        self._entries.pop((key[0], other), None)
+
+    def update_section(self, repo_path: str, sha: str, section: str, value) -> bool:
+        """Replace a cached section's value, keeping its timestamp so it still
+        expires on schedule. False if the section isn't cached."""
+        key = (self._normalize(repo_path), sha)
+        entry = self._load(key)
+        if not entry or section not in entry:
+            return False
+        self._write(key, {section: (value, entry[section][1])})
+        return True
+
+    def invalidate(self, repo_path: str, sections):
+        """Drop sections from every cached SHA of a repository, so the next
+        analysis recomputes them instead of carrying them over."""
+        repo_path = self._normalize(repo_path)
+        if self._store is None:
+            with self._lock:
+                for (cached_path, _), (_, entry) in self._entries.items():
+                    if cached_path == repo_path:
+                        for section in sections:
+                            entry.pop(section, None)
+            return
+        for sha in self._store.hgetall(f"shas:{repo_path}"):
+            key = self._sections_key((repo_path, sha))
+            self._store.hdel(key, *sections)
+            self._store.hset(key, {VERSION_FIELD: uuid.uuid4().hex})
+            with self._lock:
+                self._entries.pop((repo_path, sha), None)
+
+    def previous_sha(self, repo_path: str, sha: str) -> Optional[str]:
+        """The most recently analyzed SHA of this repo other than ``sha``."""
+        repo_path = self._normalize(repo_path)
+        if self._store:
+            shas = self._store.hgetall(f"shas:{repo_path}")
+            shas.pop(sha, None)
+            return max(shas, key=lambda other: float(shas[other])) if shas else None
+        with self._lock:
+            for cached_path, cached_sha in reversed(self._entries):
+                if cached_path == repo_path and cached_sha != sha:
+                    return cached_sha
+            return None
+
+    def carry_over(self, repo_path: str, from_sha: str, to_sha: str, sections):
+        """Copy sections unaffected by new commits to ``to_sha``, keeping their
+        original timestamps so they still expire on schedule."""
+        repo_path = self._normalize(repo_path)
+        source = self._load((repo_path, from_sha)) or {}
+        carried = {section: source[section] for section in sections if section in source}
+        if carried:
+            self._write((repo_path, to_sha), carried)
+
+    def latest_sections(self, sections) -> Dict[str, Dict]:
+        """``{repo_path: {section: value}}`` for every cached repo, taken from
+        its most recently analyzed SHA, expired or not."""
+        latest = {}
+        if self._store:
+            for shas_key in self._store.keys("shas:"):
+                repo_path = shas_key[len("shas:"):]
+                shas = self._store.hgetall(shas_key)
+                if not shas:
+                    continue
+                sha = max(shas, key=lambda other: float(shas[other]))
+                # Only the requested fields are read and decoded.
+                key = self._sections_key((repo_path, sha))
+                stored = {s: self._store.hget(key, s) for s in sections}
+                latest[repo_path] = {s: json.loads(value)[0] for s, value in stored.items() if value is not None}
+            return latest
+        with self._lock:
+            for (repo_path, _), (_, entry) in reversed(self._entries.items()):
+                if repo_path not in latest:
+                    latest[repo_path] = {s: value for s, (value, _) in entry.items() if s in sections}
+        return latest
+
+    def _load(self, key) -> Optional[Dict]:
+        """``{section: (value, stored_at)}`` for a key; the local copy while
+        it is current, otherwise from the store."""
+        if self._store is None:
+            with self._lock:
+                cached = self._entries.get(key)
+                if cached is None:
+                    return None
+                self._remember(key, cached)
+                return cached[1]
+        version = self._store.hget(self._sections_key(key), VERSION_FIELD)
+        with self._lock:
+            cached = self._entries.get(key)
+            if version is None:
+                self._entries.pop(key, None)
+                return None
+        if cached is None or cached[0] != version:
+            stored = self._store.hgetall(self._sections_key(key))
+            version = stored.pop(VERSION_FIELD, version)
+            cached = (version, {section: tuple(json.loads(value)) for section, value in stored.items()})
+        with self._lock:
+            self._remember(key, cached)
+        return cached[1]
+
+    def _write(self, key, sections: Dict):
+        """Merge ``{section: (value, stored_at)}`` into an entry."""
+        if self._store is None:
+            with self._lock:
+                _, entry = self._entries.get(key, (None, {}))
+                self._remember(key, (None, {**entry, **sections}))
+            return
+        self._store.hset(self._sections_key(key), {
+            **{section: json.dumps([value, stored_at]) for section, (value, stored_at) in sections.items()},
+            VERSION_FIELD: uuid.uuid4().hex,
+        })
+        self._store.hset(f"shas:{key[0]}", {key[1]: str(max(t for _, t in sections.values()))})
+        # Other workers may have added sections too; reload on the next read.
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _remember(self, key, cached):
+        self._entries[key] = cached
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
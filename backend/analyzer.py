@@ -3,6 +3,7 @@ import re
 from typing import Dict, List
 from github import Github
 import requests
+from tree_index import fetch_tree_index
 
 class GitHubAnalyzer:
     def __init__(self, token: str):
@@ -19,11 +20,10 @@ class GitHubAnalyzer:
         repo = self.g.get_repo(f"{owner}/{repo_name}")
         
         # Get basic info
-        contents = repo.get_contents("")
         languages = repo.get_languages()
         
         # Simple structure analysis
-        files = self._walk_contents(repo, contents)
+        files = self._walk_contents(repo)
         
         return {
             "name": repo.full_name,
@@ -34,16 +34,6 @@ class GitHubAnalyzer:
             "complexity_score": self._calculate_complexity(languages, files)
         }
     
-    def _walk_contents(self, repo, contents, path=""):
-        """Recursively get file structure"""
-        files = []
-        for content in contents:
-            if content.type == "dir":
-                files.extend(self._walk_contents(
-                    repo, 
-                    repo.get_contents(content.path),
-                    f"{path}/{content.name}"
-                ))
-            else:
-                files.append(f"{path}/{content.name}")
-        return files
\ No newline at end of file
+    def _walk_contents(self, repo):
+        """Get file structure from a single recursive tree fetch"""
+        return fetch_tree_index(repo).list_files()
@@ -0,0 +1,146 @@
+# backend/bench/coldstart.py
+"""Benchmark backend cold starts.
+
+Each run starts a fresh backend process and measures, from process spawn,
+the time to the first successful ``/api/health`` and to the first
+successful ``/api/analyze`` of an unseen repository (served by the replay
+server, without injected latency), i.e. what a request waking a spun-down
+instance waits for.
+
+Run from backend/:
+
+  python -m bench.coldstart --runs 5 --out coldstart.json
+  python -m bench.coldstart --baseline coldstart.json   # compare against an earlier release
+
+With ``--baseline``, a median regression beyond ``--threshold`` exits with
+status 1.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import requests
+
+from bench.fixtures import get_fixture
+from bench.replay_server import ReplayState, start_replay_server
+from bench.run import BACKEND_DIR, Backend, percentile
+
+POLL_INTERVAL = 0.01
+METRICS = ("health_ms", "analyze_ms")
+
+
+def wait_for(check, process, timeout: float) -> float:
+    """Poll ``check`` until it succeeds; returns when that happened (perf_counter)."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Backend exited: {process.stderr.read().decode()[-2000:]}")
+        try:
+            if check():
+                return time.perf_counter()
+        except requests.RequestException:
+            pass
+        time.sleep(POLL_INTERVAL)
+    raise RuntimeError("Backend did not become ready in time")
+
+
+def cold_start(state: ReplayState, replay_url: str, run: int, timeout: float) -> Dict:
+    repo = f"bench/tiny-cold{run}"
+    state.preload(get_fixture(*repo.split("/")), replay_url)
+    session = requests.Session()
+
+    started = time.perf_counter()
+    backend = Backend(replay_url)
+    try:
+        healthy = wait_for(lambda: session.get(f"{backend.url}/api/health", timeout=timeout).ok,
+                           backend.process, timeout)
+        analyzed = wait_for(
+            lambda: session.post(f"{backend.url}/api/analyze", json={"github_url": f"https://github.com/{repo}"},
+                                 timeout=timeout).json().get("status") == "success",
+            backend.process, timeout,
+        )
+    finally:
+        backend.stop()
+    return {"health_ms": (healthy - started) * 1000, "analyze_ms": (analyzed - started) * 1000}
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    summary = {}
+    for metric in METRICS:
+        values = [run[metric] for run in runs]
+        summary[metric] = {"p50": percentile(values, 50), "p95": percentile(values, 95),
+                           "min": round(min(values), 1), "max": round(max(values), 1)}
+    return summary
+
+
+def release() -> str:
+    """The checked-out commit, to label results."""
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def compare(summary: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Print median deltas against the baseline; returns the regressions found."""
+    regressions = []
+    print(f"\n📊 Against baseline ({baseline.get('release', '?')}):")
+    for metric in METRICS:
+        old, new = baseline["summary"][metric]["p50"], summary[metric]["p50"]
+        change = (new - old) / old if old else 0.0
+        print(f"  {metric} p50: {old} -> {new} ({change:+.1%})")
+        if change > threshold:
+            regressions.append(f"{metric} p50 {old} -> {new}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backend time-to-first-response from a cold start")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts to measure")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for each milestone")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="regression threshold (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    state = ReplayState()
+    server = start_replay_server(state)
+    replay_url = "http://127.0.0.1:%d" % server.server_address[1]
+    runs = []
+    for run in range(args.runs):
+        runs.append(cold_start(state, replay_url, run, args.timeout))
+        print(f"⏱️ run {run + 1}: health {runs[-1]['health_ms']:.0f} ms, analyze {runs[-1]['analyze_ms']:.0f} ms",
+              flush=True)
+    server.shutdown()
+
+    summary = summarize(runs)
+    print()
+    for metric in METRICS:
+        stats = summary[metric]
+        print(f"{metric:<11} p50 {stats['p50']:>8} p95 {stats['p95']:>8} min {stats['min']:>8} max {stats['max']:>8}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "release": release(),
+                "python": platform.python_version(),
+                "summary": summary,
+                "runs": runs,
+            }, f, indent=2)
+        print(f"\n💾 Results written to {args.out}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(summary, json.load(f), args.threshold)
+        if regressions:
+            print("\n❌ Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\n✅ No regressions beyond threshold")
+
+
+if __name__ == "__main__":
+    main()
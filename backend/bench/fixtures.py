@@ -0,0 +1,177 @@
+# backend/bench/fixtures.py
+"""Deterministic synthetic repositories for the replay server.
+
+A fixture is named ``{size}-{n}`` (e.g. ``medium-3``); the size picks the
+file count and the name seeds everything else, so the same name always
+produces the same tree, languages, contributors and issues.
+"""
+import hashlib
+import random
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+SIZES = {
+    "tiny": 10,
+    "small": 500,
+    "medium": 5_000,
+    "large": 50_000,
+    "huge": 200_000,
+}
+
+# GitHub stops a recursive tree listing at 100k entries and sets "truncated".
+TREE_ENTRY_LIMIT = 100_000
+
+EXTENSIONS = [
+    ("py", "Python", 6), ("js", "JavaScript", 5), ("ts", "TypeScript", 4), ("go", "Go", 2),
+    ("rs", "Rust", 1), ("md", "Markdown", 2), ("html", "HTML", 1), ("css", "CSS", 1),
+]
+TOP_LEVEL_FILES = ["README.md", "package.json", "requirements.txt", "main.py", "setup.py"]
+
+
+def sha_of(*parts) -> str:
+    return hashlib.sha1("/".join(map(str, parts)).encode()).hexdigest()
+
+
+class RepoFixture:
+    """One synthetic repository and the API payloads derived from it."""
+
+    def __init__(self, owner: str, name: str):
+        size = name.split("-", 1)[0]
+        if size not in SIZES:
+            raise KeyError(name)
+        self.owner, self.name = owner, name
+        self.full_name = f"{owner}/{name}"
+        self.head_sha = sha_of(self.full_name, "head")
+        rng = random.Random(self.full_name)
+
+        file_count = SIZES[size]
+        dirs = [""]
+        for i in range(max(1, file_count // 25)):
+            parent = rng.choice(dirs)
+            if parent.count("/") < 6:
+                dirs.append(f"{parent}/pkg{i}" if parent else f"pkg{i}")
+        weights = [weight for _, _, weight in EXTENSIONS]
+
+        self.files = {}  # path -> (size, language)
+        for filename in TOP_LEVEL_FILES[:file_count]:
+            self.files[filename] = (rng.randint(200, 4000), None)
+        while len(self.files) < file_count:
+            ext, language, _ = rng.choices(EXTENSIONS, weights)[0]
+            directory = rng.choice(dirs)
+            path = f"{directory}/mod{len(self.files)}.{ext}" if directory else f"mod{len(self.files)}.{ext}"
+            self.files[path] = (rng.randint(100, 20_000), language)
+
+        self.directories = {""}
+        for path in self.files:
+            parts = path.split("/")[:-1]
+            for depth in range(1, len(parts) + 1):
+                self.directories.add("/".join(parts[:depth]))
+        self.tree_shas = {sha_of(self.full_name, "tree", d): d for d in self.directories}
+        self.contributor_count = rng.randint(1, 29)  # fits on one page
+        self.issue_comments = [rng.randint(0, 40) for _ in range(rng.randint(0, 8))]
+
+    # ---------- REST payloads ----------
+    def repo(self, base_url: str) -> Dict:
+        return {
+            "id": int(self.head_sha[:8], 16),
+            "name": self.name,
+            "full_name": self.full_name,
+            "owner": {"login": self.owner},
+            "description": f"Synthetic {self.name} fixture",
+            "stargazers_count": len(self.files) // 7,
+            "forks_count": len(self.files) // 50,
+            "open_issues_count": len(self.issue_comments),
+            "subscribers_count": self.contributor_count,
+            "default_branch": "main",
+            "html_url": f"https://github.com/{self.full_name}",
+            "url": f"{base_url}/repos/{self.full_name}",
+        }
+
+    def languages(self) -> Dict[str, int]:
+        totals = {}
+        for size, language in self.files.values():
+            if language:
+                totals[language] = totals.get(language, 0) + size
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def tree_sha_for(self, ref: str) -> Optional[str]:
+        """Root tree for a branch or commit ref, or the tree with that sha."""
+        if ref in ("main", "HEAD", self.head_sha):
+            return sha_of(self.full_name, "tree", "")
+        return ref if ref in self.tree_shas else None
+
+    def tree(self, tree_sha: str, recursive: bool) -> Dict:
+        root = self.tree_shas[tree_sha]
+        entries = _tree_entries(self, root, recursive)
+        truncated = len(entries) > TREE_ENTRY_LIMIT
+        return {"sha": tree_sha, "truncated": truncated, "tree": entries[:TREE_ENTRY_LIMIT]}
+
+    def contributors(self) -> List[Dict]:
+        return [
+            {"login": f"dev{i}", "avatar_url": "https://example.invalid/a.png",
+             "contributions": 1000 // (i + 1), "html_url": f"https://github.com/dev{i}"}
+            for i in range(self.contributor_count)
+        ]
+
+    def issues(self, base_url: str) -> List[Dict]:
+        ordered = sorted(enumerate(self.issue_comments), key=lambda item: -item[1])
+        return [
+            {
+                "number": n + 1,
+                "title": f"Issue {n + 1}",
+                "url": f"{base_url}/repos/{self.full_name}/issues/{n + 1}",
+                "html_url": f"https://github.com/{self.full_name}/issues/{n + 1}",
+                "comments": comments,
+                "created_at": "2024-01-01T00:00:00Z",
+                "state": "open",
+            }
+            for n, comments in ordered
+        ]
+
+    # ---------- GraphQL ----------
+    def graphql_node(self, issue_limit: Optional[int] = None) -> Dict:
+        node = {
+            "nameWithOwner": self.full_name,
+            "description": f"Synthetic {self.name} fixture",
+            "url": f"https://github.com/{self.full_name}",
+            "stargazerCount": len(self.files) // 7,
+            "forkCount": len(self.files) // 50,
+            "watchers": {"totalCount": self.contributor_count},
+            "issues": {"totalCount": len(self.issue_comments)},
+            "pullRequests": {"totalCount": 0},
+            "defaultBranchRef": {"name": "main", "target": {"oid": self.head_sha}},
+            "languages": {"edges": [
+                {"size": size, "node": {"name": language}} for language, size in self.languages().items()
+            ]},
+        }
+        if issue_limit is not None:
+            node["activeIssues"] = {"nodes": [
+                {"number": issue["number"], "title": issue["title"], "url": issue["html_url"],
+                 "state": "OPEN", "createdAt": issue["created_at"],
+                 "comments": {"totalCount": issue["comments"]}}
+                for issue in self.issues("")[:issue_limit]
+            ]}
+        return node
+
+
+def _tree_entries(fixture: RepoFixture, root: str, recursive: bool) -> List[Dict]:
+    prefix = f"{root}/" if root else ""
+    entries = []
+    for directory in fixture.directories:
+        if directory and directory.startswith(prefix) and (recursive or "/" not in directory[len(prefix):]):
+            entries.append({"path": directory[len(prefix):], "mode": "040000", "type": "tree",
+                            "sha": sha_of(fixture.full_name, "tree", directory)})
+    for path, (size, _) in fixture.files.items():
+        if path.startswith(prefix) and (recursive or "/" not in path[len(prefix):]):
+            entries.append({"path": path[len(prefix):], "mode": "100644", "type": "blob",
+                            "size": size, "sha": sha_of(fixture.full_name, path)})
+    entries.sort(key=lambda entry: entry["path"])
+    return entries
+
+
+@lru_cache(maxsize=64)
+def get_fixture(owner: str, name: str) -> Optional[RepoFixture]:
+    try:
+        return RepoFixture(owner, name)
+    except KeyError:
+        return None
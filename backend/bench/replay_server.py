@@ -0,0 +1,259 @@
+# backend/bench/replay_server.py
+"""Local stand-in for the GitHub REST/GraphQL and OpenRouter APIs.
+
+Serves the synthetic fixtures from fixtures.py (any ``owner/{size}-{n}``
+repository exists), with optional per-service latency, and counts every
+request so a benchmark can report upstream calls per analysis. Responses
+recorded from the real APIs can be layered on top with ``--recordings``:
+a JSON object mapping ``"METHOD /path"`` to ``{"status", "headers", "body"}``.
+
+Run standalone with ``python -m bench.replay_server --port 8900`` and point
+the backend at it via GITHUB_API_URL and OPENROUTER_API_URL.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from bench.fixtures import get_fixture
+
+RATE_LIMIT = 5000
+
+AI_RESPONSE = {
+    "ai_summary": "A synthetic repository used for benchmarking.",
+    "tech_insights": ["Synthetic layout", "Deterministic fixture"],
+    "learning_path": ["Step 1: Read the README", "Step 2: Explore the top-level packages"],
+    "patterns": ["Layered packages"],
+}
+
+
+class ReplayState:
+    """Latency settings, recordings and request counters shared by handlers."""
+
+    def __init__(self, latency_ms: Optional[Dict[str, float]] = None, jitter: float = 0.2,
+                 llm_chunk_ms: float = 5, recordings: Optional[Dict] = None):
+        self.latency_ms = latency_ms or {}
+        self.jitter = jitter
+        self.llm_chunk_ms = llm_chunk_ms
+        self.recordings = recordings or {}
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._bodies = {}  # (route key) -> serialized JSON, fixtures never change
+
+    def count(self, service: str):
+        with self._lock:
+            self.counts[service] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+    def delay(self, service: str):
+        latency = self.latency_ms.get(service, 0)
+        if latency:
+            time.sleep(latency * random.uniform(1 - self.jitter, 1 + self.jitter) / 1000)
+
+    def body(self, key, build) -> bytes:
+        data = self._bodies.get(key)
+        if data is None:
+            data = self._bodies[key] = json.dumps(build()).encode()
+        return data
+
+    def preload(self, fixture, base_url: str):
+        """Serialize a fixture's bodies now, so it doesn't count as upstream latency."""
+        root = fixture.tree_sha_for("main")
+        self.body(("repo", fixture.full_name), lambda: fixture.repo(base_url))
+        self.body(("languages", fixture.full_name), fixture.languages)
+        self.body(("tree", fixture.full_name, root, True), lambda: fixture.tree(root, True))
+        self.body(("contributors", fixture.full_name), fixture.contributors)
+        self.body(("issues", fixture.full_name), lambda: fixture.issues(base_url))
+
+    def clear(self):
+        """Drop cached bodies; large fixtures hold tens of MB each."""
+        self._bodies.clear()
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: ReplayState = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body=b"", headers: Optional[Dict] = None):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("X-RateLimit-Limit", str(RATE_LIMIT))
+        self.send_header("X-RateLimit-Remaining", str(RATE_LIMIT))
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _replay_recording(self, method: str, path: str) -> bool:
+        recording = self.state.recordings.get(f"{method} {path}")
+        if recording is None:
+            return False
+        self._send(recording.get("status", 200), recording.get("body", b""), recording.get("headers"))
+        return True
+
+    # ---------- GitHub REST ----------
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path, query = url.path, parse_qs(url.query)
+        if path == "/rate_limit":
+            core = {"limit": RATE_LIMIT, "remaining": RATE_LIMIT, "reset": int(time.time()) + 3600, "used": 0}
+            return self._send(200, {"resources": {"core": core}, "rate": core})
+
+        self.state.count("github")
+        self.state.delay("github")
+        if self._replay_recording("GET", self.path):
+            return
+        parts = path.strip("/").split("/")
+        if len(parts) < 3 or parts[0] != "repos":
+            return self._send(404, {"message": "Not Found"})
+        fixture = get_fixture(parts[1], parts[2])
+        if fixture is None:
+            return self._send(404, {"message": "Not Found"})
+        base = "http://%s:%d" % self.server.server_address
+        rest = parts[3:]
+
+        if not rest:
+            return self._send(200, self.state.body(("repo", fixture.full_name), lambda: fixture.repo(base)))
+        if rest == ["commits", "HEAD"]:
+            etag = f'"{fixture.head_sha}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304)
+            return self._send(200, fixture.head_sha.encode(), {"ETag": etag})
+        if rest == ["languages"]:
+            return self._send(200, self.state.body(("languages", fixture.full_name), fixture.languages))
+        if rest[:2] == ["git", "trees"] and len(rest) == 3:
+            tree_sha = fixture.tree_sha_for(rest[2])
+            if tree_sha is None:
+                return self._send(404, {"message": "Not Found"})
+            recursive = bool(query.get("recursive"))
+            return self._send(200, self.state.body(
+                ("tree", fixture.full_name, tree_sha, recursive), lambda: fixture.tree(tree_sha, recursive)))
+        if rest == ["contributors"]:
+            return self._send(200, self.state.body(("contributors", fixture.full_name), fixture.contributors))
+        if rest == ["issues"]:
+            return self._send(200, self.state.body(("issues", fixture.full_name), lambda: fixture.issues(base)))
+        if rest[0] == "compare" and len(rest) == 2:
+            # Fixtures have a single commit, so every comparison is a no-op.
+            return self._send(200, {"status": "identical", "ahead_by": 0, "behind_by": 0,
+                                    "total_commits": 0, "commits": [], "files": []})
+        return self._send(404, {"message": "Not Found"})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        path = urlsplit(self.path).path
+        if path.endswith("/chat/completions"):
+            return self._chat_completion(body)
+        if path.endswith("/graphql"):
+            return self._graphql(body)
+        self._send(404, {"message": "Not Found"})
+
+    # ---------- GitHub GraphQL ----------
+    def _graphql(self, body: Dict):
+        self.state.count("github_graphql")
+        self.state.delay("github_graphql")
+        if self._replay_recording("POST", self.path):
+            return
+        variables = body.get("variables") or {}
+        if "owner" in variables:
+            fixture = get_fixture(variables["owner"], variables["name"])
+            data = {"repository": fixture.graphql_node(variables.get("issues", 5)) if fixture else None}
+        elif "org" in variables:
+            nodes = [get_fixture(variables["org"], f"small-{i}").graphql_node() for i in range(10)]
+            data = {"organization": {"repositories": {
+                "pageInfo": {"hasNextPage": False, "endCursor": None}, "nodes": nodes[:variables.get("first", 50)],
+            }}}
+        else:
+            data, i = {}, 0
+            while f"o{i}" in variables:
+                fixture = get_fixture(variables[f"o{i}"], variables[f"n{i}"])
+                data[f"r{i}"] = fixture.graphql_node() if fixture else None
+                i += 1
+        self._send(200, {"data": data})
+
+    # ---------- OpenRouter ----------
+    def _chat_completion(self, body: Dict):
+        self.state.count("openrouter")
+        self.state.delay("openrouter")
+        if self._replay_recording("POST", self.path):
+            return
+        text = "```json\n" + json.dumps(AI_RESPONSE) + "\n```"
+        usage = {"prompt_tokens": sum(len(m.get("content", "")) // 4 for m in body.get("messages", [])),
+                 "completion_tokens": len(text) // 4}
+        if not body.get("stream"):
+            return self._send(200, {"choices": [{"message": {"role": "assistant", "content": text}}], "usage": usage})
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for start in range(0, len(text), 24):
+            self._write_event({"choices": [{"delta": {"content": text[start:start + 24]}}]})
+            if self.state.llm_chunk_ms:
+                time.sleep(self.state.llm_chunk_ms / 1000)
+        self._write_event({"choices": [], "usage": usage})
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_event(self, event: Dict):
+        self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+def start_replay_server(state: ReplayState, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve in a daemon thread; the bound port is ``server.server_address[1]``."""
+    handler = type("BoundReplayHandler", (ReplayHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_latency(spec: str) -> Dict[str, float]:
+    """``"github=40,github_graphql=120,openrouter=800"`` -> per-service ms."""
+    latency = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        service, _, ms = item.partition("=")
+        latency[service] = float(ms)
+    return latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay GitHub/OpenRouter responses for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", default="", help="per-service latency, e.g. github=40,openrouter=800")
+    parser.add_argument("--recordings", help="JSON file of recorded responses to serve instead")
+    args = parser.parse_args()
+
+    recordings = None
+    if args.recordings:
+        with open(args.recordings) as f:
+            recordings = json.load(f)
+    server = start_replay_server(ReplayState(parse_latency(args.latency), recordings=recordings),
+                                 args.host, args.port)
+    print(f"🎞️ Replay server on http://{args.host}:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
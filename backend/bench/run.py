@@ -0,0 +1,269 @@
+# backend/bench/run.py
+"""Benchmark /api/analyze against the replay server.
+
+Each scenario (mode x fixture size x concurrency) starts a fresh backend
+process pointed at an in-process replay server, fires ``--requests``
+analyses at the given concurrency and reports latency percentiles,
+throughput, upstream calls per analysis and the backend's peak RSS.
+
+  cold  every request analyzes a repository the backend hasn't seen
+  warm  a few repositories are analyzed once up front, then re-requested
+
+Run from backend/:
+
+  python -m bench.run --sizes tiny,medium --concurrency 1,8 --out bench.json
+  python -m bench.run --baseline bench.json      # compare against an earlier run
+
+With ``--baseline``, a p95 or throughput regression beyond ``--threshold``
+exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+from bench.fixtures import SIZES, get_fixture
+from bench.replay_server import ReplayState, parse_latency, start_replay_server
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WARM_REPOS = 4
+DEFAULT_LATENCY = "github=30,github_graphql=80,openrouter=400"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    """Peak resident set size of a process (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return round(ordered[low] + (ordered[high] - ordered[low]) * (rank - low), 1)
+
+
+class Backend:
+    """The FastAPI app in a subprocess, talking to the replay server."""
+
+    def __init__(self, replay_url: str, extra_env: Optional[Dict[str, str]] = None):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        env = {
+            **os.environ,
+            "GITHUB_API_URL": replay_url,
+            "GITHUB_TOKENS": "bench-token",
+            "OPENROUTER_API_URL": replay_url,
+            "OPENROUTER_API_KEY": "bench-key",
+            "PREWARM_INTERVAL": "0",
+            "LOG_LEVEL": "WARNING",
+            **(extra_env or {}),
+        }
+        for name in ("GITHUB_TOKEN", "ANALYSIS_CACHE_DB", "LLM_CACHE_DB", "RENDER"):
+            if name not in (extra_env or {}):
+                env.pop(name, None)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+
+    def wait_ready(self, timeout: float = 60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Backend exited: {self.process.stderr.read().decode()[-2000:]}")
+            try:
+                if requests.get(f"{self.url}/api/health", timeout=2).ok:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError("Backend did not start in time")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def analyze(session: requests.Session, backend_url: str, repo: str, timeout: float) -> Dict:
+    started = time.perf_counter()
+    try:
+        response = session.post(f"{backend_url}/api/analyze",
+                                json={"github_url": f"https://github.com/{repo}"}, timeout=timeout)
+        ok = response.ok and response.json().get("status") == "success"
+        status = response.status_code
+    except requests.RequestException as e:
+        ok, status = False, type(e).__name__
+    return {"ms": (time.perf_counter() - started) * 1000, "ok": ok, "status": status}
+
+
+def run_scenario(state: ReplayState, replay_url: str, mode: str, size: str, concurrency: int,
+                 total: int, timeout: float, extra_env: Dict[str, str]) -> Dict:
+    if mode == "cold":
+        repos = [f"bench/{size}-c{concurrency}-{i}" for i in range(total)]
+    else:
+        repos = [f"bench/{size}-w{i % WARM_REPOS}" for i in range(total)]
+    # Build fixtures (and their response bodies) before the clock starts.
+    state.clear()
+    for repo in dict.fromkeys(repos):
+        state.preload(get_fixture(*repo.split("/")), replay_url)
+
+    backend = Backend(replay_url, extra_env)
+    try:
+        backend.wait_ready()
+        session = requests.Session()
+        session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=max(10, concurrency)))
+        if mode == "warm":
+            for repo in dict.fromkeys(repos):
+                analyze(session, backend.url, repo, timeout)
+
+        before = state.snapshot()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda repo: analyze(session, backend.url, repo, timeout), repos))
+        elapsed = time.perf_counter() - started
+        after = state.snapshot()
+        rss = peak_rss_mb(backend.process.pid)
+    finally:
+        backend.stop()
+
+    latencies = [result["ms"] for result in results if result["ok"]]
+    errors = [result["status"] for result in results if not result["ok"]]
+    upstream = {service: after.get(service, 0) - before.get(service, 0) for service in after}
+    return {
+        "mode": mode,
+        "size": size,
+        "files": SIZES[size],
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": len(errors),
+        "error_statuses": sorted(set(map(str, errors))),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else None,
+        "upstream_per_analysis": {service: round(count / total, 2) for service, count in sorted(upstream.items())},
+        "peak_rss_mb": rss,
+    }
+
+
+def scenario_key(result: Dict) -> tuple:
+    return result["mode"], result["size"], result["concurrency"]
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float) -> List[str]:
+    """Print deltas against the baseline; returns the regressions found."""
+    previous = {scenario_key(result): result for result in baseline}
+    regressions = []
+    print("\n📊 Against baseline:")
+    for result in results:
+        old = previous.get(scenario_key(result))
+        if not old:
+            continue
+        label = "/".join(map(str, scenario_key(result)))
+        deltas = []
+        for metric, higher_is_worse in (("p50_ms", True), ("p95_ms", True), ("p99_ms", True),
+                                        ("throughput_rps", False), ("peak_rss_mb", True)):
+            if not old.get(metric) or result.get(metric) is None:
+                continue
+            change = (result[metric] - old[metric]) / old[metric]
+            deltas.append(f"{metric} {change:+.1%}")
+            worse = change if higher_is_worse else -change
+            if metric in ("p95_ms", "throughput_rps") and worse > threshold:
+                regressions.append(f"{label} {metric} {old[metric]} -> {result[metric]}")
+        print(f"  {label}: {', '.join(deltas)}")
+    return regressions
+
+
+def print_table(results: List[Dict]):
+    header = f"{'mode':<5} {'size':<7} {'conc':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>7} {'err':>4} {'rss MB':>7}  upstream/analysis"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        upstream = " ".join(f"{service}={count}" for service, count in r["upstream_per_analysis"].items())
+        print(f"{r['mode']:<5} {r['size']:<7} {r['concurrency']:>4} {r['p50_ms'] or '-':>8} {r['p95_ms'] or '-':>8} "
+              f"{r['p99_ms'] or '-':>8} {r['throughput_rps']:>7} {r['errors']:>4} {r['peak_rss_mb'] or '-':>7}  {upstream}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/analyze against recorded upstream APIs")
+    parser.add_argument("--sizes", default="tiny,small,medium", help=f"fixture sizes ({', '.join(SIZES)})")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--modes", default="cold,warm")
+    parser.add_argument("--requests", type=int, default=20, help="requests per scenario")
+    parser.add_argument("--latency", default=DEFAULT_LATENCY, help="injected upstream latency in ms per service")
+    parser.add_argument("--timeout", type=float, default=120, help="per-request timeout in seconds")
+    parser.add_argument("--env", action="append", default=[], help="extra backend env, NAME=VALUE (repeatable)")
+    parser.add_argument("--recordings", help="JSON file of recorded upstream responses")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="regression threshold (0.1 = 10%%)")
+    args = parser.parse_args()
+
+    recordings = None
+    if args.recordings:
+        with open(args.recordings) as f:
+            recordings = json.load(f)
+    state = ReplayState(parse_latency(args.latency), recordings=recordings)
+    server = start_replay_server(state)
+    replay_url = "http://127.0.0.1:%d" % server.server_address[1]
+    extra_env = dict(item.split("=", 1) for item in args.env)
+
+    results = []
+    for mode in args.modes.split(","):
+        for size in args.sizes.split(","):
+            for concurrency in map(int, args.concurrency.split(",")):
+                print(f"⏱️ {mode} {size} x{concurrency}...", flush=True)
+                results.append(run_scenario(state, replay_url, mode, size, concurrency,
+                                            args.requests, args.timeout, extra_env))
+    server.shutdown()
+
+    print()
+    print_table(results)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "latency": args.latency,
+                "results": results,
+            }, f, indent=2)
+        print(f"\n💾 Results written to {args.out}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+        if regressions:
+            print("\n❌ Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\n✅ No regressions beyond threshold")
+
+
+if __name__ == "__main__":
+    main()
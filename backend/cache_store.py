@@ -0,0 +1,150 @@
+# backend/cache_store.py
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+try:
+    import redis
+except ImportError:  # optional: only needed for CACHE_REDIS_URL
+    redis = None
+
+# Shared store for the analysis and LLM caches and cross-worker locks.
+# CACHE_REDIS_URL (redis://...) wins over CACHE_DB (an SQLite file path).
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL") or os.getenv("REDIS_URL")
+CACHE_DB = os.getenv("CACHE_DB")
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+
+class SQLiteStore:
+    """Hashes and expiring locks in one SQLite file.
+
+    WAL mode lets every worker process read while one writes, and writers
+    wait up to SQLITE_BUSY_TIMEOUT_MS for each other instead of failing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS hashes (
+                key TEXT, field TEXT, value TEXT, PRIMARY KEY (key, field)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS locks (
+                name TEXT PRIMARY KEY, owner TEXT, expires REAL
+            );
+            """
+        )
+
+    def describe(self) -> str:
+        return f"sqlite:{self.path}"
+
+    def hget(self, key: str, field: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM hashes WHERE key = ? AND field = ?", (key, field)).fetchone()
+        return row[0] if row else None
+
+    def hgetall(self, key: str) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._db.execute("SELECT field, value FROM hashes WHERE key = ?", (key,)).fetchall())
+
+    def hset(self, key: str, mapping: Dict[str, str]):
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?)",
+                [(key, field, value) for field, value in mapping.items()],
+            )
+
+    def hdel(self, key: str, *fields: str):
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM hashes WHERE key = ? AND field = ?", [(key, f) for f in fields])
+
+    def hlen(self, key: str) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM hashes WHERE key = ?", (key,)).fetchone()[0]
+
+    def delete(self, *keys: str):
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM hashes WHERE key = ?", [(key,) for key in keys])
+
+    def keys(self, prefix: str) -> List[str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT key FROM hashes WHERE key >= ? AND key < ?", (prefix, prefix + "\uffff")
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        """Take the lock unless someone else holds an unexpired one."""
+        now = time.time()
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO locks VALUES (?, ?, ?) ON CONFLICT (name) DO UPDATE "
+                "SET owner = excluded.owner, expires = excluded.expires WHERE locks.expires < ?",
+                (name, owner, now + ttl, now),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, name: str, owner: str):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner))
+
+
+class RedisStore:
+    """The same operations on a Redis-compatible server."""
+
+    # Delete the lock only if we still own it (it may have expired and been retaken).
+    RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, url: str):
+        if redis is None:
+            raise RuntimeError("CACHE_REDIS_URL is set but the redis package is not installed")
+        self.url = url
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self._release = self._client.register_script(self.RELEASE_SCRIPT)
+
+    def describe(self) -> str:
+        return f"redis:{self._client.connection_pool.connection_kwargs.get('host', '?')}"
+
+    def hget(self, key: str, field: str) -> Optional[str]:
+        return self._client.hget(key, field)
+
+    def hgetall(self, key: str) -> Dict[str, str]:
+        return self._client.hgetall(key)
+
+    def hset(self, key: str, mapping: Dict[str, str]):
+        if mapping:
+            self._client.hset(key, mapping=mapping)
+
+    def hdel(self, key: str, *fields: str):
+        if fields:
+            self._client.hdel(key, *fields)
+
+    def hlen(self, key: str) -> int:
+        return self._client.hlen(key)
+
+    def delete(self, *keys: str):
+        if keys:
+            self._client.delete(*keys)
+
+    def keys(self, prefix: str) -> List[str]:
+        pattern = "".join(f"\\{c}" if c in "*?[]\\" else c for c in prefix) + "*"
+        return list(self._client.scan_iter(match=pattern, count=500))
+
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        return bool(self._client.set(name, owner, nx=True, px=int(ttl * 1000)))
+
+    def release(self, name: str, owner: str):
+        self._release(keys=[name], args=[owner])
+
+
+def store_from_env():
+    """The configured shared store, or None to keep caches per process."""
+    if CACHE_REDIS_URL:
+        return RedisStore(CACHE_REDIS_URL)
+    return SQLiteStore(CACHE_DB) if CACHE_DB else None
@@ -0,0 +1,429 @@
+# backend/chat_index.py
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import uuid
+from collections import Counter, OrderedDict, defaultdict
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from local_clone import CLONE_TIMEOUT, EXTENSION_LANGUAGES, SKIP_DIRS, file_lock
+
+logger = logging.getLogger(__name__)
+
+CHAT_INDEX_DIR = os.getenv("CHAT_INDEX_DIR", os.path.join(tempfile.gettempdir(), "codesensei-chat-index"))
+CHAT_INDEX_MAX_REPOS = int(os.getenv("CHAT_INDEX_MAX_REPOS", "50"))
+CHAT_OPEN_INDEXES = int(os.getenv("CHAT_OPEN_INDEXES", "16"))  # kept mapped in memory
+
+MAX_FILE_BYTES = 256 * 1024  # bigger files are usually generated or data
+CHUNK_LINES = 50
+CHUNK_OVERLAP = 10
+CHUNK_MAX_CHARS = 4000
+TEXT_FILES = {"README", "Dockerfile", "Makefile", "LICENSE", "CONTRIBUTING"}
+TEXT_EXTENSIONS = {".txt", ".rst", ".toml", ".yaml", ".yml", ".json", ".cfg", ".ini", ".gradle", ".xml", ".sql"}
+
+# Merge every segment into one beyond this many, or once this share of the
+# indexed chunks belongs to files that have since changed.
+MAX_SEGMENTS = 8
+MAX_DELETED_RATIO = 0.5
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+CAMEL_PART = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i",
+    "if", "in", "is", "it", "me", "of", "on", "or", "the", "this", "that", "to", "what", "when",
+    "where", "which", "who", "why", "with", "you",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased identifiers plus their snake_case and camelCase parts."""
+    tokens = []
+    for word in IDENTIFIER.findall(text):
+        lower = word.lower()
+        if lower in STOPWORDS or len(lower) < 2:
+            continue
+        tokens.append(lower)
+        parts = [part.lower() for piece in word.split("_") for part in CAMEL_PART.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if len(part) > 1 and part not in STOPWORDS)
+    return tokens
+
+
+def is_indexable(path: str, size: int) -> bool:
+    posix = PurePosixPath(path)
+    if size > MAX_FILE_BYTES or any(part in SKIP_DIRS for part in posix.parts[:-1]):
+        return False
+    suffix = posix.suffix.lower()
+    return suffix in EXTENSION_LANGUAGES or suffix in TEXT_EXTENSIONS or posix.stem in TEXT_FILES
+
+
+def chunk_text(text: str) -> Iterable[Tuple[int, str]]:
+    """Overlapping windows of lines as ``(first line number, text)``."""
+    lines = text.splitlines()
+    step = CHUNK_LINES - CHUNK_OVERLAP
+    for start in range(0, max(1, len(lines) - CHUNK_OVERLAP), step):
+        window = "\n".join(lines[start:start + CHUNK_LINES]).strip()
+        if window:
+            yield start + 1, window[:CHUNK_MAX_CHARS]
+
+
+class Segment:
+    """An immutable BM25 index over some chunks, stored as flat arrays.
+
+    The arrays are .npy files opened with ``mmap_mode="r"`` and the chunk
+    texts and the sorted term list are single memory-mapped byte blobs, so
+    an open segment costs page cache rather than heap, and every process
+    serving the same repository shares it.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.files = json.loads((directory / "files.json").read_text())  # [path, blob sha, first, count]
+        load = lambda name: np.load(directory / f"{name}.npy", mmap_mode="r")
+        self.chunk_offsets = load("chunk_offsets")
+        self.chunk_lengths = load("chunk_lengths")
+        self.chunk_files = load("chunk_files")
+        self.chunk_lines = load("chunk_lines")
+        self.term_offsets = load("term_offsets")
+        self.posting_offsets = load("posting_offsets")
+        self.posting_chunks = load("posting_chunks")
+        self.posting_tfs = load("posting_tfs")
+        self.texts = np.memmap(directory / "chunks.bin", dtype=np.uint8, mode="r") \
+            if self.chunk_offsets[-1] else np.zeros(0, dtype=np.uint8)
+        self.lexicon = np.memmap(directory / "lexicon.bin", dtype=np.uint8, mode="r") \
+            if self.term_offsets[-1] else np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.chunk_lengths)
+
+    @staticmethod
+    def write(directory: Path, chunks: Iterable[Tuple[str, str, int, str]]) -> Path:
+        """Build a segment from ``(path, blob sha, first line, text)`` chunks,
+        grouped by file."""
+        directory.mkdir(parents=True)
+        files, offsets, lengths, file_ids, first_lines = [], [0], [], [], []
+        postings = defaultdict(list)
+        with open(directory / "chunks.bin", "wb") as out:
+            for path, blob_sha, line, text in chunks:
+                if not files or files[-1][0] != path:
+                    files.append([path, blob_sha, len(lengths), 0])
+                files[-1][3] += 1
+                chunk_id = len(lengths)
+                tokens = tokenize(f"{path}\n{text}")
+                for term, tf in Counter(tokens).items():
+                    postings[term].append((chunk_id, tf))
+                data = text.encode("utf-8")
+                out.write(data)
+                offsets.append(offsets[-1] + len(data))
+                lengths.append(len(tokens))
+                file_ids.append(len(files) - 1)
+                first_lines.append(line)
+
+        terms = sorted(postings)
+        encoded = [term.encode("utf-8") for term in terms]
+        (directory / "lexicon.bin").write_bytes(b"".join(encoded))
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(term) for term in encoded], out=term_offsets[1:])
+        posting_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(postings[term]) for term in terms], out=posting_offsets[1:])
+        flat = [posting for term in terms for posting in postings[term]]
+        np.save(directory / "posting_chunks.npy", np.array([c for c, _ in flat], dtype=np.int32))
+        np.save(directory / "posting_tfs.npy", np.array([tf for _, tf in flat], dtype=np.int32))
+        np.save(directory / "term_offsets.npy", term_offsets)
+        np.save(directory / "posting_offsets.npy", posting_offsets)
+        np.save(directory / "chunk_offsets.npy", np.array(offsets, dtype=np.int64))
+        np.save(directory / "chunk_lengths.npy", np.array(lengths, dtype=np.int32))
+        np.save(directory / "chunk_files.npy", np.array(file_ids, dtype=np.int32))
+        np.save(directory / "chunk_lines.npy", np.array(first_lines, dtype=np.int32))
+        (directory / "files.json").write_text(json.dumps(files))
+        return directory
+
+    def _term(self, i: int) -> bytes:
+        return self.lexicon[self.term_offsets[i]:self.term_offsets[i + 1]].tobytes()
+
+    def postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """``(chunk ids, term frequencies)`` of a term, found by bisection."""
+        key = term.encode("utf-8")
+        lo, hi = 0, len(self.term_offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo >= len(self.term_offsets) - 1 or self._term(lo) != key:
+            return None
+        start, end = self.posting_offsets[lo], self.posting_offsets[lo + 1]
+        return self.posting_chunks[start:end], self.posting_tfs[start:end]
+
+    def text(self, chunk_id: int) -> str:
+        return self.texts[self.chunk_offsets[chunk_id]:self.chunk_offsets[chunk_id + 1]].tobytes().decode("utf-8")
+
+    def chunks_of(self, file_index: int) -> Iterable[Tuple[int, str]]:
+        _, _, first, count = self.files[file_index]
+        for chunk_id in range(first, first + count):
+            yield int(self.chunk_lines[chunk_id]), self.text(chunk_id)
+
+
+class RepoIndex:
+    """One commit's view of a repository's segments, minus deleted chunks."""
+
+    def __init__(self, directory: Path, manifest: Dict):
+        self.directory = directory
+        self.sha = manifest["sha"]
+        self.segments = [Segment(directory / entry["name"]) for entry in manifest["segments"]]
+        self.deleted = []  # per segment: boolean mask of chunks to skip
+        for segment, entry in zip(self.segments, manifest["segments"]):
+            mask = np.zeros(len(segment), dtype=bool)
+            for file_index in entry["deleted_files"]:
+                _, _, first, count = segment.files[file_index]
+                mask[first:first + count] = True
+            self.deleted.append(mask)
+        live_lengths = [segment.chunk_lengths[~mask] for segment, mask in zip(self.segments, self.deleted)]
+        self.chunk_count = sum(len(lengths) for lengths in live_lengths)
+        self.avg_length = sum(int(lengths.sum()) for lengths in live_lengths) / max(1, self.chunk_count)
+
+    def stats(self) -> Dict:
+        return {
+            "sha": self.sha,
+            "chunks": self.chunk_count,
+            "segments": len(self.segments),
+            "deleted_chunks": int(sum(mask.sum() for mask in self.deleted)),
+        }
+
+    def search(self, query: str, k: int = 6) -> List[Dict]:
+        """The ``k`` best BM25 matches for ``query`` across all segments.
+
+        Document frequencies include chunks of changed files until the next
+        merge, as in Lucene; scores shift slightly, rankings barely.
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.chunk_count:
+            return []
+        postings = [{term: segment.postings(term) for term in terms} for segment in self.segments]
+        df = Counter()
+        for per_segment in postings:
+            for term, found in per_segment.items():
+                if found is not None:
+                    df[term] += len(found[0])
+
+        hits = []
+        for segment, mask, per_segment in zip(self.segments, self.deleted, postings):
+            scores = np.zeros(len(segment), dtype=np.float32)
+            for term, found in per_segment.items():
+                if found is None:
+                    continue
+                ids, tfs = found
+                idf = math.log(1 + (self.chunk_count - df[term] + 0.5) / (df[term] + 0.5))
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * segment.chunk_lengths[ids] / self.avg_length)
+                scores[ids] += idf * tfs * (BM25_K1 + 1) / (tfs + norm)
+            scores[mask] = 0
+            best = np.argpartition(-scores, min(k, len(scores) - 1))[:k] if len(scores) > k else np.arange(len(scores))
+            hits.extend((float(scores[i]), segment, int(i)) for i in best if scores[i] > 0)
+
+        hits.sort(key=lambda hit: -hit[0])
+        results = []
+        for score, segment, chunk_id in hits[:k]:
+            text = segment.text(chunk_id)
+            line = int(segment.chunk_lines[chunk_id])
+            results.append({
+                "path": segment.files[segment.chunk_files[chunk_id]][0],
+                "start_line": line,
+                "end_line": line + text.count("\n"),
+                "score": round(score, 3),
+                "text": text,
+            })
+        return results
+
+
+class ChatIndexStore:
+    """Per-repository retrieval indexes on disk, built incrementally.
+
+    A repository's directory holds immutable segments and a manifest naming
+    the segments (and the files in them that have since changed) that make
+    up the index at one commit. Moving to a new commit only chunks the files
+    whose blob changed into a new segment; segments are merged once there
+    are too many or too much of them is stale. Open indexes are shared by
+    every chat about the repository.
+
+    Worker processes can share ``root``: builds and evictions take the
+    repository's file lock (in ``root/.locks``), and a build only deletes
+    segments its own manifest no longer names.
+    """
+
+    def __init__(self, root: str = CHAT_INDEX_DIR, max_repos: int = CHAT_INDEX_MAX_REPOS,
+                 max_open: int = CHAT_OPEN_INDEXES):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_repos = max_repos
+        self.max_open = max_open
+        self._open = OrderedDict()  # index directory name -> RepoIndex
+        self._locks = defaultdict(threading.Lock)  # per index directory name: builds
+        self._lock = threading.Lock()
+
+    def _dir_for(self, repo_path: str) -> Path:
+        return self.root / repo_path.lower().replace("/", "__")
+
+    def get(self, repo_path: str, checkout: Path) -> RepoIndex:
+        """The index for the commit checked out at ``checkout``, updating
+        the stored one if it is for another commit."""
+        key = self._dir_for(repo_path).name
+        sha = _git("rev-parse", "HEAD", cwd=checkout)
+        index = self._cached(key, sha)
+        if index is not None:
+            return index
+        with self._locks[key], file_lock(self.root / ".locks" / f"{key}.lock"):
+            index = self._cached(key, sha)
+            if index is None:
+                index = self._load_or_build(repo_path, checkout, sha)
+                with self._lock:
+                    self._open[key] = index
+                    while len(self._open) > self.max_open:
+                        self._open.popitem(last=False)
+        self.evict()
+        return index
+
+    def _cached(self, key: str, sha: str) -> Optional[RepoIndex]:
+        with self._lock:
+            index = self._open.get(key)
+            if index is not None and index.sha == sha:
+                self._open.move_to_end(key)
+                return index
+        return None
+
+    def _load_or_build(self, repo_path: str, checkout: Path, sha: str) -> RepoIndex:
+        directory = self._dir_for(repo_path)
+        directory.mkdir(exist_ok=True)
+        manifest_path = directory / "manifest.json"
+        manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else None
+        if manifest and manifest["sha"] == sha:
+            os.utime(manifest_path)  # mark as recently used
+            return RepoIndex(directory, manifest)
+
+        blobs = {path: blob for path, blob, size in _list_files(checkout) if is_indexable(path, size)}
+        indexed = {}  # path -> (segment position, file index, blob sha) of live files
+        segments = manifest["segments"] if manifest else []
+        opened = {entry["name"]: Segment(directory / entry["name"]) for entry in segments}
+        for position, entry in enumerate(segments):
+            deleted = set(entry["deleted_files"])
+            for file_index, (path, blob, _, _) in enumerate(opened[entry["name"]].files):
+                if file_index not in deleted:
+                    indexed[path] = (position, file_index, blob)
+
+        changed = [path for path, blob in blobs.items() if indexed.get(path, (None, None, None))[2] != blob]
+        gone = [path for path, (_, _, blob) in indexed.items() if blobs.get(path) != blob]
+        segments = [dict(entry, deleted_files=list(entry["deleted_files"])) for entry in segments]
+        for path in gone:
+            position, file_index, _ = indexed[path]
+            segments[position]["deleted_files"].append(file_index)
+        logger.info(f"🗂️ Indexing {repo_path}@{sha[:7]} for chat: {len(changed)} changed file(s), "
+                    f"{len(blobs) - len(changed)} reused")
+
+        if changed:
+            name = f"seg-{uuid.uuid4().hex[:12]}"
+            segment = Segment(Segment.write(directory / name, _read_chunks(checkout, changed, blobs)))
+            if len(segment):
+                opened[name] = segment
+                segments.append({"name": name, "deleted_files": []})
+
+        total = sum(len(opened[entry["name"]]) for entry in segments)
+        deleted = sum(opened[entry["name"]].files[i][3] for entry in segments for i in entry["deleted_files"])
+        if len(segments) > MAX_SEGMENTS or (total and deleted / total > MAX_DELETED_RATIO):
+            segments = self._merge(directory, segments, opened)
+
+        manifest = {"sha": sha, "segments": segments}
+        tmp = directory / f".manifest-{uuid.uuid4().hex[:8]}"
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, manifest_path)
+        self._remove_unused(directory, manifest)
+        return RepoIndex(directory, manifest)
+
+    @staticmethod
+    def _merge(directory: Path, segments: List[Dict], opened: Dict[str, Segment]) -> List[Dict]:
+        """Rewrite the live chunks of every segment as one segment."""
+        logger.info(f"🗜️ Merging {len(segments)} chat index segments in {directory.name}")
+
+        def live_chunks():
+            for entry in segments:
+                segment = opened[entry["name"]]
+                deleted = set(entry["deleted_files"])
+                for file_index, (path, blob, _, _) in enumerate(segment.files):
+                    if file_index not in deleted:
+                        for line, text in segment.chunks_of(file_index):
+                            yield path, blob, line, text
+
+        name = f"seg-{uuid.uuid4().hex[:12]}"
+        Segment.write(directory / name, live_chunks())
+        return [{"name": name, "deleted_files": []}]
+
+    @staticmethod
+    def _remove_unused(directory: Path, manifest: Dict):
+        # Called with the build lock held, so ``manifest`` is the one on disk.
+        # Readers that still map an old segment keep its pages until they close.
+        keep = {entry["name"] for entry in manifest["segments"]}
+        for path in directory.iterdir():
+            if path.is_dir() and path.name.startswith("seg-") and path.name not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def evict(self):
+        """Drop the least recently used repositories beyond ``max_repos``."""
+        repos = sorted(
+            (p for p in self.root.iterdir() if (p / "manifest.json").exists()),
+            key=lambda p: (p / "manifest.json").stat().st_mtime, reverse=True,
+        )
+        for victim in repos[self.max_repos:]:
+            key = victim.name
+            lock = self._locks[key]
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                with file_lock(self.root / ".locks" / f"{key}.lock", blocking=False) as held:
+                    if not held:
+                        continue  # being built by another worker
+                    logger.info(f"🧹 Evicting chat index {victim.name}")
+                    with self._lock:
+                        self._open.pop(key, None)
+                    shutil.rmtree(victim, ignore_errors=True)
+            finally:
+                lock.release()
+
+
+def _git(*args, cwd=None) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True, timeout=CLONE_TIMEOUT
+    ).stdout.strip()
+
+
+def _list_files(checkout: Path) -> Iterable[Tuple[str, str, int]]:
+    """``(path, blob sha, size)`` of every file at HEAD, without reading blobs."""
+    for line in _git("ls-tree", "-r", "-l", "-z", "HEAD", cwd=checkout).split("\0"):
+        if not line:
+            continue
+        meta, path = line.split("\t", 1)
+        mode, kind, blob, size = meta.split()
+        if kind == "blob" and size != "-" and not mode.startswith("12"):  # skip symlinks
+            yield path, blob, int(size)
+
+
+def _read_chunks(checkout: Path, paths: List[str], blobs: Dict[str, str]) -> Iterable[Tuple[str, str, int, str]]:
+    for path in sorted(paths):
+        try:
+            data = (checkout / path).read_bytes()
+        except OSError:
+            continue
+        if b"\0" in data[:8192]:
+            continue
+        for line, text in chunk_text(data.decode("utf-8", "replace")):
+            yield path, blobs[path], line, text
@@ -0,0 +1,103 @@
+# backend/compression.py
+import gzip
+import os
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only without the brotli package
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # close to gzip's speed, noticeably smaller output
+
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """"br" or "gzip" from an Accept-Encoding header, preferring brotli."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", accepted.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """Compress complete responses of at least ``minimum_size`` bytes with
+    brotli (when installed) or gzip.
+
+    Streaming responses (NDJSON analyses, chat) pass through untouched so
+    their events aren't held back in a compressor's buffer. Strong ETags
+    get the coding appended (``"…-gzip"``), since a strong validator must
+    differ between encodings; http_cache.matching_etag strips it again.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "")
+            compressible = (
+                content_type.startswith(COMPRESSIBLE_TYPES) and "content-encoding" not in headers
+            )
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+            if compressible and not message.get("more_body") and len(body) >= self.minimum_size:
+                body = compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                self._tag_etag(headers, encoding)
+                message = {"type": "http.response.body", "body": body}
+            await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _tag_etag(headers: MutableHeaders, encoding: str):
+        etag = headers.get("etag")
+        if etag and etag.endswith('"') and not etag.startswith("W/"):
+            headers["ETag"] = f'{etag[:-1]}-{encoding}"'
@@ -0,0 +1,69 @@
+# backend/fanout.py
+import asyncio
+import contextvars
+import logging
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from telemetry import span
+
+logger = logging.getLogger(__name__)
+
+# PyGithub and requests are blocking clients, so every upstream call runs on
+# this bounded pool instead of inside the event loop.
+UPSTREAM_WORKERS = int(os.getenv("UPSTREAM_WORKERS", "16"))
+UPSTREAM_CALL_TIMEOUT = float(os.getenv("UPSTREAM_CALL_TIMEOUT", "20"))
+
+upstream_executor = ThreadPoolExecutor(
+    max_workers=UPSTREAM_WORKERS, thread_name_prefix="upstream"
+)
+
+
+async def run_blocking(func: Callable, *args, timeout: float = UPSTREAM_CALL_TIMEOUT,
+                       executor: Optional[Executor] = None, **kwargs):
+    """Run a blocking call on the upstream pool (or ``executor``) with a timeout.
+
+    On timeout the caller gets asyncio.TimeoutError straight away; the worker
+    thread finishes the call in the background and its result is dropped.
+    The call runs in a copy of the caller's context, so it reports into the
+    caller's trace.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    future = loop.run_in_executor(executor or upstream_executor, partial(context.run, func, *args, **kwargs))
+    return await asyncio.wait_for(future, timeout)
+
+
+async def gather_partial(
+    calls: Dict[str, Callable[[], Any]],
+    defaults: Dict[str, Any],
+    timeout: float = UPSTREAM_CALL_TIMEOUT,
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Run independent blocking calls concurrently and keep whatever finishes.
+
+    Returns the results keyed like ``calls`` plus the names of the calls that
+    failed or timed out; those fall back to their entry in ``defaults``.
+    """
+    names = list(calls)
+
+    def timed(name):
+        with span(name):
+            return calls[name]()
+
+    outcomes = await asyncio.gather(
+        *(run_blocking(timed, name, timeout=timeout) for name in names),
+        return_exceptions=True,
+    )
+
+    results, failed = {}, []
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, BaseException):
+            reason = "timed out" if isinstance(outcome, asyncio.TimeoutError) else outcome
+            logger.warning(f"⚠️ {name} failed ({reason}), using partial result")
+            results[name] = defaults.get(name)
+            failed.append(name)
+        else:
+            results[name] = outcome
+    return results, failed
@@ -0,0 +1,189 @@
+# backend/github_graphql.py
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from github_scheduler import GITHUB_API_URL
+from telemetry import record_upstream
+
+logger = logging.getLogger(__name__)
+
+GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", f"{GITHUB_API_URL}/graphql")
+
+# Repositories per aliased query; GitHub caps query cost, not alias count,
+# and 25 summaries stay well inside one query's node limit.
+GRAPHQL_CHUNK_SIZE = 25
+
+REPO_SUMMARY_FIELDS = """
+    nameWithOwner
+    description
+    url
+    stargazerCount
+    forkCount
+    watchers { totalCount }
+    issues(states: OPEN) { totalCount }
+    pullRequests(states: OPEN) { totalCount }
+    defaultBranchRef { name target { oid } }
+    languages(first: 100, orderBy: {field: SIZE, direction: DESC}) {
+        edges { size node { name } }
+    }
+"""
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session():
+    """Shared pooled session, built on first use (importing requests)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+                session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+                _session = session
+    return _session
+
+
+class GraphQLError(Exception):
+    """The GraphQL endpoint returned errors and no usable data."""
+
+
+def graphql(token: str, query: str, variables: Optional[Dict] = None) -> Dict:
+    """Run one GraphQL query and return its ``data``.
+
+    Partial errors (e.g. one aliased repository not found) are tolerated;
+    the missing aliases simply come back as null.
+    """
+    response = _get_session().post(
+        GITHUB_GRAPHQL_URL,
+        json={"query": query, "variables": variables or {}},
+        headers={"Authorization": f"bearer {token}"},
+        timeout=30,
+    )
+    record_upstream("github_graphql", response.status_code)
+    response.raise_for_status()
+    payload = response.json()
+    if payload.get("data") is None:
+        raise GraphQLError(payload.get("errors"))
+    for error in payload.get("errors") or []:
+        logger.warning(f"⚠️ GraphQL: {error.get('message')}")
+    return payload["data"]
+
+
+def summarize(node: Dict) -> Dict:
+    """Flatten a repository node into the repo_info shape plus language bytes."""
+    languages = {edge["node"]["name"]: edge["size"] for edge in node["languages"]["edges"]}
+    branch = node.get("defaultBranchRef") or {}
+    return {
+        "full_name": node["nameWithOwner"],
+        "description": node["description"],
+        "stars": node["stargazerCount"],
+        "forks": node["forkCount"],
+        "url": node["url"],
+        # REST's open_issues_count includes open pull requests.
+        "open_issues": node["issues"]["totalCount"] + node["pullRequests"]["totalCount"],
+        "watchers": node["watchers"]["totalCount"],
+        "languages": languages,
+        "default_branch": branch.get("name"),
+        "head_sha": (branch.get("target") or {}).get("oid"),
+    }
+
+
+def fetch_repo_summaries(token: str, repo_paths: List[str], chunk_size: int = GRAPHQL_CHUNK_SIZE) -> Dict:
+    """Summaries for many ``owner/repo`` paths, ``chunk_size`` per query.
+
+    Returns ``{repo_path: summary}``; repositories that don't exist or
+    aren't visible to the token are left out.
+    """
+    summaries = {}
+    for start in range(0, len(repo_paths), chunk_size):
+        chunk = repo_paths[start:start + chunk_size]
+        params, fields, variables = [], [], {}
+        for i, repo_path in enumerate(chunk):
+            owner, name = repo_path.split("/", 1)
+            params.append(f"$o{i}: String!, $n{i}: String!")
+            fields.append(f"r{i}: repository(owner: $o{i}, name: $n{i}) {{ {REPO_SUMMARY_FIELDS} }}")
+            variables.update({f"o{i}": owner, f"n{i}": name})
+        query = f"query({', '.join(params)}) {{ {' '.join(fields)} }}"
+
+        data = graphql(token, query, variables)
+        for i, repo_path in enumerate(chunk):
+            node = data.get(f"r{i}")
+            if node:
+                summaries[repo_path] = summarize(node)
+    return summaries
+
+
+def list_org_repos(token: str, org: str, limit: int = 200) -> List[Dict]:
+    """Summaries of an organization's public repos, most-starred first."""
+    query = f"""
+    query($org: String!, $first: Int!, $after: String) {{
+        organization(login: $org) {{
+            repositories(first: $first, after: $after, privacy: PUBLIC,
+                         orderBy: {{field: STARGAZERS, direction: DESC}}) {{
+                pageInfo {{ hasNextPage endCursor }}
+                nodes {{ {REPO_SUMMARY_FIELDS} }}
+            }}
+        }}
+    }}
+    """
+    summaries, after = [], None
+    while len(summaries) < limit:
+        data = graphql(token, query, {"org": org, "first": min(50, limit - len(summaries)), "after": after})
+        if not data.get("organization"):
+            raise GraphQLError(f"Organization '{org}' not found")
+        repositories = data["organization"]["repositories"]
+        summaries.extend(summarize(node) for node in repositories["nodes"])
+        if not repositories["pageInfo"]["hasNextPage"]:
+            break
+        after = repositories["pageInfo"]["endCursor"]
+    return summaries
+
+
+def _issue(node: Dict) -> Dict:
+    created_at = node["createdAt"]
+    return {
+        "number": node["number"],
+        "title": node["title"][:100] + "..." if len(node["title"]) > 100 else node["title"],
+        "url": node["url"],
+        "comments": node["comments"]["totalCount"],
+        # Same format the REST path produced (datetime.isoformat).
+        "created_at": datetime.fromisoformat(created_at.replace("Z", "+00:00")).isoformat() if created_at else None,
+        "state": node["state"].lower(),
+    }
+
+
+def fetch_repo_snapshot(token: str, repo_path: str, issue_limit: int = 5) -> Dict:
+    """Everything /api/analyze needs that GraphQL can serve, in one query.
+
+    Returns the summary fields plus ``active_issues``: the open issues
+    (pull requests excluded) with the most comments, in the REST shape.
+    Raises GraphQLError if the repository can't be resolved.
+    """
+    owner, name = repo_path.split("/", 1)
+    query = f"""
+    query($owner: String!, $name: String!, $issues: Int!) {{
+        repository(owner: $owner, name: $name) {{
+            {REPO_SUMMARY_FIELDS}
+            activeIssues: issues(first: $issues, states: OPEN,
+                                 orderBy: {{field: COMMENTS, direction: DESC}}) {{
+                nodes {{ number title url state createdAt comments {{ totalCount }} }}
+            }}
+        }}
+    }}
+    """
+    data = graphql(token, query, {"owner": owner, "name": name, "issues": issue_limit})
+    node = data.get("repository")
+    if not node:
+        raise GraphQLError(f"Repository '{repo_path}' not found")
+    return {
+        **summarize(node),
+        "active_issues": [_issue(issue) for issue in node["activeIssues"]["nodes"]],
+    }
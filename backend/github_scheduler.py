@@ -0,0 +1,142 @@
+# backend/github_scheduler.py
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    from github import Github
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+
+# Below this many remaining requests on every token, non-critical calls
+# (contributors, issues) are deferred so analyses keep working until reset.
+GITHUB_LOW_BUDGET = int(os.getenv("GITHUB_LOW_BUDGET", "500"))
+
+
+class RateLimitExhausted(Exception):
+    """Every token is out of requests until ``reset`` (unix time)."""
+
+    def __init__(self, reset: int):
+        self.reset = reset
+        super().__init__(f"GitHub rate limit exhausted, resets in {max(0, int(reset - time.time()))}s")
+
+
+def github_exception():
+    """PyGithub's GithubException, for except clauses (imports PyGithub)."""
+    from github import GithubException
+    return GithubException
+
+
+class TokenBudget:
+    """One token, its shared client and the rate limit GitHub last reported.
+
+    The client is built on first use: importing PyGithub takes a good part
+    of startup, so it is left to the first request or the startup warm-up.
+    """
+
+    __slots__ = ("token", "base_url", "pool_size", "_client", "_lock")
+
+    def __init__(self, token: str, base_url: str, pool_size: int):
+        self.token = token
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> "Github":
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from github import Auth, Github
+
+                    # PyGithub spaces requests 0.25s apart per client by default, which
+                    # would serialize every concurrent analysis sharing this client.
+                    interval = float(os.getenv("GITHUB_MIN_REQUEST_INTERVAL", "0")) or None
+                    self._client = Github(
+                        auth=Auth.Token(self.token),
+                        base_url=self.base_url,
+                        pool_size=self.pool_size,
+                        seconds_between_requests=interval,
+                    )
+        return self._client
+
+    def available(self, now: float) -> int:
+        """Requests this token can still make (its full limit once reset)."""
+        # Both values come from the X-RateLimit-* headers of the last
+        # response; only a brand-new client pays one (free) /rate_limit call.
+        remaining, limit = self.client.rate_limiting
+        return limit if self.client.rate_limiting_resettime <= now else remaining
+
+    def describe(self, now: float) -> Dict:
+        remaining, limit = self.client.rate_limiting
+        return {
+            "token": f"…{self.token[-4:]}",
+            "remaining": self.available(now),
+            "limit": limit,
+            "reset_in": max(0, int(self.client.rate_limiting_resettime - now)),
+        }
+
+
+class GitHubScheduler:
+    """Spread GitHub work over a pool of tokens by remaining budget."""
+
+    def __init__(self, tokens: List[str], base_url: str = GITHUB_API_URL, pool_size: int = 16,
+                 low_budget: int = GITHUB_LOW_BUDGET):
+        self.budgets = [TokenBudget(token, base_url, pool_size) for token in tokens]
+        self.low_budget = low_budget
+        self.deferred_calls = 0
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return bool(self.budgets)
+
+    def pick(self) -> TokenBudget:
+        """Token with the most requests left; raises when all are exhausted."""
+        now = time.time()
+        with self._lock:
+            best = max(self.budgets, key=lambda budget: budget.available(now))
+            if best.available(now) <= 0:
+                raise RateLimitExhausted(min(b.client.rate_limiting_resettime for b in self.budgets))
+            return best
+
+    def client(self) -> "Github":
+        return self.pick().client
+
+    def build_clients(self):
+        """Build every token's client now instead of on first use."""
+        for budget in self.budgets:
+            budget.client
+
+    def remaining(self) -> int:
+        now = time.time()
+        return sum(budget.available(now) for budget in self.budgets)
+
+    def should_defer(self, priority: str) -> bool:
+        """True when a non-critical call should wait for the budget to recover."""
+        if priority == "critical":
+            return False
+        now = time.time()
+        if all(budget.available(now) < self.low_budget for budget in self.budgets):
+            self.deferred_calls += 1
+            return True
+        return False
+
+    def snapshot(self) -> Dict:
+        now = time.time()
+        return {
+            "tokens": [budget.describe(now) for budget in self.budgets],
+            "remaining": self.remaining(),
+            "low_budget_threshold": self.low_budget,
+            "deferred_calls": self.deferred_calls,
+        }
+
+
+def tokens_from_env() -> List[str]:
+    """GITHUB_TOKENS (comma-separated) plus GITHUB_TOKEN, without duplicates."""
+    tokens = [t.strip() for t in os.getenv("GITHUB_TOKENS", "").split(",") if t.strip()]
+    single = os.getenv("GITHUB_TOKEN")
+    if single and single not in tokens:
+        tokens.append(single)
+    return tokens
@@ -0,0 +1,79 @@
+# backend/http_cache.py
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+try:
+    import orjson
+except ImportError:  # falls back to the standard library encoder
+    orjson = None
+
+# How long browsers and CDNs may reuse an /api/analyze response before
+# revalidating it with If-None-Match.
+ANALYZE_MAX_AGE = int(os.getenv("ANALYZE_MAX_AGE", "60"))
+
+# Content codings the compression middleware tags strong ETags with.
+ETAG_CODING_SUFFIXES = ("-br", "-gzip")
+
+# Top-level fields left out of an analysis's ETag: debug_info carries
+# per-request details (cached sections, timings) that differ between two
+# responses with the same analysis.
+VOLATILE_FIELDS = ("debug_info",)
+
+
+def dumps(content) -> bytes:
+    """Compact JSON bytes; orjson when it's installed."""
+    if orjson is not None:
+        return orjson.dumps(content, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=str, separators=(",", ":")).encode()
+
+
+def strong_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def content_etag(content: Dict) -> str:
+    """Weak ETag of a JSON payload without its VOLATILE_FIELDS; weak, since
+    responses with the same tag may still differ in those."""
+    stable = {key: value for key, value in content.items() if key not in VOLATILE_FIELDS}
+    return f"W/{strong_etag(dumps(stable))}"
+
+
+def _opaque(etag: str) -> str:
+    """An entity tag without its weakness prefix or content-coding tag."""
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for suffix in ETAG_CODING_SUFFIXES:
+        if opaque.endswith(f'{suffix}"'):
+            return opaque[:-len(suffix) - 1] + '"'
+    return opaque
+
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """The If-None-Match entry that matches ``etag``, compared weakly and
+    ignoring the content-coding tag, or None."""
+    if not if_none_match:
+        return None
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        if _opaque(candidate) == _opaque(etag):
+            return candidate
+    return None
+
+
+def cacheable_json(content, request: Request, max_age: int = ANALYZE_MAX_AGE) -> Response:
+    """A JSON response with an ETag (see content_etag) and Cache-Control, or
+    304 when the client already has it. Errors are sent uncached."""
+    if not isinstance(content, dict) or content.get("status") != "success":
+        return Response(dumps(content), media_type="application/json", headers={"Cache-Control": "no-store"})
+    etag = content_etag(content)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    matched = matching_etag(request.headers.get("if-none-match"), etag)
+    if matched:
+        # Echo the tag the client holds, which may carry a coding suffix.
+        return Response(status_code=304, headers={**headers, "ETag": matched})
+    return Response(dumps(content), media_type="application/json", headers=headers)
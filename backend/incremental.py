@@ -0,0 +1,77 @@
+# backend/incremental.py
+import logging
+import os
+from collections import Counter
+from pathlib import PurePosixPath
+from typing import Dict, List, Optional
+
+from local_clone import EXTENSION_LANGUAGES
+
+logger = logging.getLogger(__name__)
+
+# The compare API lists at most 300 changed files; a diff that size may be
+# incomplete, so the tree is rebuilt from scratch instead.
+MAX_COMPARE_FILES = 300
+
+# A diff is significant enough to re-run the LLM summary when it touches a
+# manifest or README, or changes this share of the files or this many lines.
+SIGNIFICANT_FILE_RATIO = float(os.getenv("INCREMENTAL_SIGNIFICANT_RATIO", "0.1"))
+SIGNIFICANT_LINES = int(os.getenv("INCREMENTAL_SIGNIFICANT_LINES", "500"))
+MANIFEST_FILES = {
+    "README.md", "package.json", "requirements.txt", "setup.py", "pyproject.toml",
+    "go.mod", "Cargo.toml", "pom.xml", "build.gradle", "Gemfile", "composer.json",
+}
+
+# Larger trees aren't kept for patching; they're refetched on every new commit.
+MAX_INDEX_ENTRIES = int(os.getenv("INCREMENTAL_MAX_INDEX", "100000"))
+
+# Rough source bytes per changed line, to move language byte counts by.
+AVG_LINE_BYTES = 40
+
+
+def fetch_changes(repo, base: str, head: str) -> Optional[List[Dict]]:
+    """Files changed between two commits, or None if the diff can't be used.
+
+    A force-push (base no longer an ancestor of head) or a diff at the
+    compare API's file limit needs a full rebuild.
+    """
+    logger.info(f"🔀 Comparing {base[:7]}...{head[:7]}")
+    comparison = repo.compare(base, head)
+    if comparison.status not in ("ahead", "identical"):
+        logger.warning(f"⚠️ {base[:7]} is {comparison.status} of {head[:7]}, rebuilding tree")
+        return None
+    if len(comparison.files) >= MAX_COMPARE_FILES:
+        logger.warning(f"⚠️ {len(comparison.files)}+ files changed, rebuilding tree")
+        return None
+    logger.info(f"✅ {comparison.total_commits} new commit(s), {len(comparison.files)} file(s) changed")
+    return [
+        {
+            "filename": f.filename,
+            "previous_filename": f.previous_filename,
+            "status": f.status,
+            "sha": f.sha,
+            "additions": f.additions,
+            "deletions": f.deletions,
+        }
+        for f in comparison.files
+    ]
+
+
+def patch_languages(languages: Dict[str, int], changes: List[Dict]) -> Dict[str, int]:
+    """Estimate the new language byte counts from line additions/deletions."""
+    delta = Counter()
+    for change in changes:
+        language = EXTENSION_LANGUAGES.get(PurePosixPath(change["filename"]).suffix.lower())
+        if language:
+            delta[language] += (change["additions"] - change["deletions"]) * AVG_LINE_BYTES
+    patched = {lang: size + delta.pop(lang, 0) for lang, size in languages.items()}
+    patched.update(delta)
+    return dict(sorted(((l, s) for l, s in patched.items() if s > 0), key=lambda item: -item[1]))
+
+
+def is_significant(changes: List[Dict], file_count: int) -> bool:
+    """Whether a diff changes the repository enough to re-run the AI summary."""
+    if any(PurePosixPath(change["filename"]).name in MANIFEST_FILES for change in changes):
+        return True
+    lines = sum(change["additions"] + change["deletions"] for change in changes)
+    return lines >= SIGNIFICANT_LINES or len(changes) >= SIGNIFICANT_FILE_RATIO * max(1, file_count)
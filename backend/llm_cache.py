@@ -0,0 +1,157 @@
+# backend/llm_cache.py
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from cache_store import SQLiteStore
+from telemetry import CACHE_LOOKUPS
+
+
+def prompt_inputs(repo_name, description, languages, file_sample, file_count, model, temperature) -> Dict:
+    """Canonical form of everything that shapes the analysis prompt."""
+    return {
+        "repo_name": repo_name.lower(),
+        "description": (description or "").strip(),
+        "languages": dict(sorted(languages.items())),
+        "file_sample": sorted(file_sample),
+        "file_count": file_count,
+        "model": model,
+        "temperature": temperature,
+    }
+
+
+def fingerprint(inputs: Dict) -> str:
+    canonical = json.dumps(inputs, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def similarity(a: Dict, b: Dict) -> float:
+    """0..1 closeness of two prompt inputs for the same repo and model."""
+    if (a["repo_name"], a["model"], a["temperature"]) != (b["repo_name"], b["model"], b["temperature"]):
+        return 0.0
+
+    # Byte-weighted language overlap
+    langs = set(a["languages"]) | set(b["languages"])
+    lang_max = sum(max(a["languages"].get(l, 0), b["languages"].get(l, 0)) for l in langs)
+    lang_min = sum(min(a["languages"].get(l, 0), b["languages"].get(l, 0)) for l in langs)
+    lang_score = lang_min / lang_max if lang_max else 1.0
+
+    files_a, files_b = set(a["file_sample"]), set(b["file_sample"])
+    file_score = len(files_a & files_b) / len(files_a | files_b) if files_a | files_b else 1.0
+
+    counts = (a["file_count"], b["file_count"])
+    count_score = min(counts) / max(counts) if max(counts) else 1.0
+
+    description_score = 1.0 if a["description"] == b["description"] else 0.5
+
+    return (lang_score + file_score + count_score + description_score) / 4
+
+
+class LLMResponseCache:
+    """Size-bounded LRU of LLM answers keyed by prompt fingerprint.
+
+    Entries persist in a shared store (see cache_store) when one is given,
+    or in an SQLite file at ``db_path``. With ``min_similarity`` set, a miss
+    falls back to the closest cached answer for the same repo if its inputs
+    score at least that high.
+    """
+
+    def __init__(self, max_entries: int = 1024, db_path: Optional[str] = None, min_similarity: Optional[float] = None,
+                 store=None):
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        self._entries = OrderedDict()  # fingerprint -> (inputs, response)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "near_hits": 0, "misses": 0}
+        self._store = store or (SQLiteStore(db_path) if db_path else None)
+
+    def get(self, inputs: Dict) -> Optional[Dict]:
+        key = fingerprint(inputs)
+        with self._lock:
+            entry = self._entries.get(key) or self._load(key)
+            if entry is not None:
+                self._remember(key, entry)
+                self.stats["hits"] += 1
+                CACHE_LOOKUPS.inc(cache="llm", result="hit")
+                return entry[1]
+
+            if self.min_similarity is not None:
+                nearest = self._nearest(inputs)
+                if nearest is not None:
+                    self.stats["near_hits"] += 1
+                    CACHE_LOOKUPS.inc(cache="llm", result="near_hit")
+                    return nearest
+
+            self.stats["misses"] += 1
+            CACHE_LOOKUPS.inc(cache="llm", result="miss")
+            return None
+
+    def put(self, inputs: Dict, response: Dict):
+        key = fingerprint(inputs)
+        with self._lock:
+            self._remember(key, (inputs, response))
+            if self._store:
+                self._store.hset(f"llm:{key}", {
+                    "repo_name": inputs["repo_name"], "inputs": json.dumps(inputs), "response": json.dumps(response),
+                })
+                self._store.hset(f"llm_repo:{inputs['repo_name']}", {key: "1"})
+                self._store.hset("llm_lru", {key: str(time.time())})
+                self._trim_store()
+
+    def snapshot(self) -> Dict:
+        lookups = sum(self.stats.values())
+        hits = self.stats["hits"] + self.stats["near_hits"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key):
+        if not self._store:
+            return None
+        stored = self._store.hgetall(f"llm:{key}")
+        if not stored:
+            return None
+        self._store.hset("llm_lru", {key: str(time.time())})
+        return json.loads(stored["inputs"]), json.loads(stored["response"])
+
+    def _trim_store(self):
+        """Drop the least recently used entries beyond max_entries."""
+        if self._store.hlen("llm_lru") <= self.max_entries:
+            return
+        last_used = self._store.hgetall("llm_lru")
+        stale = sorted(last_used, key=lambda key: float(last_used[key]))[:len(last_used) - self.max_entries]
+        for key in stale:
+            repo_name = self._store.hget(f"llm:{key}", "repo_name")
+            if repo_name is not None:
+                self._store.hdel(f"llm_repo:{repo_name}", key)
+        self._store.delete(*[f"llm:{key}" for key in stale])
+        self._store.hdel("llm_lru", *stale)
+
+    def _candidates(self, repo_name) -> List[tuple]:
+        candidates = {key: entry for key, entry in self._entries.items() if entry[0]["repo_name"] == repo_name}
+        if self._store:
+            for key in self._store.hgetall(f"llm_repo:{repo_name}"):
+                if key not in candidates:
+                    stored = self._store.hgetall(f"llm:{key}")
+                    if stored:
+                        candidates[key] = (json.loads(stored["inputs"]), json.loads(stored["response"]))
+        return list(candidates.values())
+
+    def _nearest(self, inputs) -> Optional[Dict]:
+        best_score, best = 0.0, None
+        for cached_inputs, response in self._candidates(inputs["repo_name"]):
+            score = similarity(inputs, cached_inputs)
+            if score > best_score:
+                best_score, best = score, response
+        return best if best_score >= self.min_similarity else None
@@ -0,0 +1,277 @@
+# backend/llm_client.py
+import json
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
+
+from telemetry import LLM_SECONDS, record_llm_usage, record_upstream
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+OPENROUTER_API_URL = os.getenv("OPENROUTER_API_URL", "https://openrouter.ai/api/v1").rstrip("/")
+DEFAULT_MODEL = "deepseek/deepseek-chat"  # Free model
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when the completion API keeps failing or returns an error."""
+
+
+class IncrementalJSONFields:
+    """Pick top-level fields out of a JSON object while it is still streaming.
+
+    Feed text chunks as they arrive; ``feed`` returns the ``(key, value)``
+    pairs whose values completed in that chunk. Anything before the first
+    ``{`` (e.g. a ```json fence) is ignored, as is anything after the object.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields = {}
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+        self._expecting = "key"
+        self._closed = False
+
+    def feed(self, chunk: str) -> List[tuple]:
+        self.buffer += chunk
+        completed = []
+        buf = self.buffer
+        while self._pos < len(buf) and not self._closed:
+            i, char = self._pos, buf[self._pos]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expecting == "key_end":
+                        self._key = json.loads(buf[self._key_start:i + 1])
+                        self._expecting = "colon"
+                continue
+
+            if self._depth == 1 and self._expecting == "value" and not char.isspace():
+                self._value_start = i
+                self._expecting = "value_end"
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expecting == "key":
+                    self._key_start = i
+                    self._expecting = "key_end"
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_value(buf, i, completed)
+                    self._closed = True
+            elif char == ":" and self._depth == 1 and self._expecting == "colon":
+                self._expecting = "value"
+            elif char == "," and self._depth == 1:
+                self._finish_value(buf, i, completed)
+        return completed
+
+    def _finish_value(self, buf, end, completed):
+        if self._value_start is not None:
+            try:
+                value = json.loads(buf[self._value_start:end])
+            except json.JSONDecodeError:
+                value = None
+            else:
+                self.fields[self._key] = value
+                completed.append((self._key, value))
+        self._key = self._key_start = self._value_start = None
+        self._expecting = "key"
+
+
+def extract_json(content: str) -> Optional[Dict]:
+    """Parse the outermost {...} in a completion, or None if there is none."""
+    json_start = content.find('{')
+    json_end = content.rfind('}') + 1
+    if json_start == -1 or json_end == 0:
+        return None
+    try:
+        return json.loads(content[json_start:json_end])
+    except json.JSONDecodeError as e:
+        logger.error(f"❌ JSON parse error: {e}")
+        return None
+
+
+class OpenRouterClient:
+    """Chat-completions client sharing one keep-alive connection pool.
+
+    Retries 429/5xx responses and connection errors with exponential backoff
+    (honouring Retry-After). ``base_url`` can point at a local mock server.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = OPENROUTER_API_URL,
+        model: str = DEFAULT_MODEL,
+        timeout: float = 30,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        pool_size: int = 10,
+    ):
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._api_key = api_key
+        self._pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self) -> "requests.Session":
+        """Pooled HTTP session, built on first use: importing requests is a
+        good part of startup, so it is left to the first call or the warm-up."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    session.headers.update({
+                        "Authorization": f"Bearer {self._api_key}",
+                        "Content-Type": "application/json",
+                    })
+                    adapter = HTTPAdapter(pool_connections=self._pool_size, pool_maxsize=self._pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def _post(self, payload: Dict, stream: bool = False) -> "requests.Response":
+        import requests
+
+        url = f"{self.base_url}/chat/completions"
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                record_upstream("openrouter", "error")
+                if last_attempt:
+                    raise LLMError(f"OpenRouter request failed: {e}") from e
+                delay = self.backoff * 2 ** attempt
+                logger.warning(f"⚠️ OpenRouter connection error ({e}), retrying in {delay:.1f}s...")
+            else:
+                record_upstream("openrouter", response.status_code)
+                if response.status_code == 200:
+                    return response
+                error_msg = f"API returned {response.status_code}: {response.text}"
+                if response.status_code not in RETRY_STATUSES or last_attempt:
+                    raise LLMError(error_msg)
+                delay = self._retry_after(response) or self.backoff * 2 ** attempt
+                logger.warning(f"⚠️ OpenRouter {response.status_code}, retrying in {delay:.1f}s...")
+                response.close()
+            time.sleep(delay)
+
+    @staticmethod
+    def _retry_after(response) -> Optional[float]:
+        try:
+            return float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            return None
+
+    def _payload(self, messages, stream, **params) -> Dict:
+        return {"model": self.model, "messages": messages, "stream": stream, **params}
+
+    def complete(self, messages: List[Dict], **params) -> str:
+        """Return the full completion text."""
+        started = time.perf_counter()
+        result = self._post(self._payload(messages, False, **params)).json()
+        LLM_SECONDS.observe(time.perf_counter() - started, model=self.model)
+        record_llm_usage(self.model, result.get("usage"))
+        return result['choices'][0]['message']['content']
+
+    def stream(self, messages: List[Dict], **params) -> Iterator[str]:
+        """Yield completion text deltas from a server-sent-events stream."""
+        started = time.perf_counter()
+        response = self._post(self._payload(messages, True, **params), stream=True)
+        finished = False
+        with response:
+            for line in self._lines(response):
+                # Blank lines separate events; ":" lines are keep-alive comments.
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    finished = True
+                    break
+                chunk = json.loads(data)
+                if "error" in chunk:
+                    raise LLMError(f"OpenRouter stream error: {chunk['error']}")
+                if chunk.get("usage"):
+                    # Sent with the last chunk when usage reporting is requested.
+                    record_llm_usage(self.model, chunk["usage"])
+                if not chunk.get("choices"):
+                    continue
+                delta = chunk['choices'][0].get('delta', {}).get('content')
+                if delta:
+                    yield delta
+        if not finished:
+            # Cut off mid-answer: don't let a partial completion pass as whole.
+            raise LLMError("OpenRouter stream ended before [DONE]")
+        LLM_SECONDS.observe(time.perf_counter() - started, model=self.model)
+
+    @staticmethod
+    def _lines(response) -> Iterator[str]:
+        import requests
+
+        try:
+            yield from response.iter_lines(decode_unicode=True)
+        except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+            raise LLMError(f"OpenRouter stream interrupted: {e}") from e
+
+    def complete_json(
+        self,
+        messages: List[Dict],
+        on_field: Optional[Callable[[str, object], None]] = None,
+        **params,
+    ) -> Dict:
+        """Stream a completion expected to contain a JSON object.
+
+        ``on_field(key, value)`` is called for each top-level field as soon as
+        it has fully arrived. Returns the parsed object, or the raw text as
+        ``ai_summary`` if the model didn't answer with JSON.
+        """
+        parser = IncrementalJSONFields()
+        for delta in self.stream(messages, **params):
+            for key, value in parser.feed(delta):
+                if on_field:
+                    on_field(key, value)
+
+        content = parser.buffer
+        logger.info(f"📥 Received response from OpenRouter: {content[:100]}...")
+        result_json = extract_json(content)
+        if result_json is not None:
+            logger.info("✅ Successfully parsed OpenRouter JSON response")
+            return result_json
+
+        # If no JSON, return the content as summary
+        logger.warning("⚠️ No JSON found in response, using raw content")
+        return {
+            "ai_summary": content,
+            "tech_insights": [],
+            "learning_path": [],
+            "patterns": []
+        }
@@ -0,0 +1,292 @@
+# backend/local_clone.py
+import logging
+import mmap
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: file locks then only hold within one process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Where clones come from. "{repo}" is owner/repo; point this at a directory of
+# bare mirrors (e.g. "/srv/mirrors/{repo}.git") to run fully offline.
+CLONE_SOURCE_TEMPLATE = os.getenv("CLONE_SOURCE_TEMPLATE", "https://github.com/{repo}.git")
+CLONE_CACHE_DIR = os.getenv("CLONE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "codesensei-clones"))
+CLONE_DISK_BUDGET_MB = int(os.getenv("CLONE_DISK_BUDGET_MB", "2048"))
+CLONE_MAX_REPOS = int(os.getenv("CLONE_MAX_REPOS", "20"))
+CLONE_TIMEOUT = float(os.getenv("CLONE_TIMEOUT", "120"))
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", str(min(8, (os.cpu_count() or 1) * 2))))
+
+MAX_SCAN_BYTES = 2 * 1024 * 1024  # larger files get line counts but no import scan
+SCAN_CHUNK = 1024 * 1024
+SKIP_DIRS = {".git", "node_modules", "vendor", "dist", "build", "__pycache__", ".venv", "venv"}
+
+EXTENSION_LANGUAGES = {
+    ".py": "Python", ".js": "JavaScript", ".jsx": "JavaScript", ".mjs": "JavaScript",
+    ".ts": "TypeScript", ".tsx": "TypeScript", ".java": "Java", ".kt": "Kotlin",
+    ".swift": "Swift", ".go": "Go", ".rs": "Rust", ".c": "C", ".h": "C",
+    ".cc": "C++", ".cpp": "C++", ".hpp": "C++", ".cs": "C#", ".rb": "Ruby",
+    ".php": "PHP", ".html": "HTML", ".css": "CSS", ".scss": "CSS", ".md": "Markdown",
+    ".sh": "Shell",
+}
+
+# One pattern per language; every capture group that matched is an import.
+IMPORT_PATTERNS = {
+    "Python": re.compile(rb"^[ \t]*(?:from[ \t]+([\w.]+)[ \t]+import|import[ \t]+([\w.]+))", re.M),
+    "JavaScript": re.compile(rb"(?:\bfrom[ \t]+|\brequire\(|^[ \t]*import[ \t]+)['\"]([^'\"]+)['\"]", re.M),
+    "Go": re.compile(rb"^[ \t]*(?:import[ \t]+)?(?:\w+[ \t]+)?\"([\w.\-/]+)\"[ \t]*$", re.M),
+    "Rust": re.compile(rb"^[ \t]*(?:pub[ \t]+)?use[ \t]+([\w:]+)", re.M),
+    "Java": re.compile(rb"^[ \t]*import[ \t]+(?:static[ \t]+)?([\w.]+)", re.M),
+    "C": re.compile(rb"^[ \t]*#[ \t]*include[ \t]*[<\"]([^>\"]+)[>\"]", re.M),
+}
+IMPORT_PATTERNS["TypeScript"] = IMPORT_PATTERNS["JavaScript"]
+IMPORT_PATTERNS["Kotlin"] = IMPORT_PATTERNS["Java"]
+IMPORT_PATTERNS["C++"] = IMPORT_PATTERNS["C"]
+
+
+def scan_file(path: Path, language: Optional[str]):
+    """Line count and imports of one file, read through mmap.
+
+    Returns ``(lines, imports)``, or None for binary files.
+    """
+    size = path.stat().st_size
+    if size == 0:
+        return 0, []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if b"\0" in mm[:8192]:
+            return None
+        lines = sum(mm[i:i + SCAN_CHUNK].count(b"\n") for i in range(0, size, SCAN_CHUNK))
+        if mm[size - 1:size] != b"\n":
+            lines += 1
+
+        imports = []
+        pattern = IMPORT_PATTERNS.get(language)
+        if pattern is not None and size <= MAX_SCAN_BYTES:
+            for match in pattern.finditer(mm):
+                imports.extend(g.decode("utf-8", "replace") for g in match.groups() if g)
+        return lines, imports
+
+
+def _scan_readable(path: Path, language: Optional[str]):
+    """scan_file, or False for a file that cannot be read."""
+    try:
+        return scan_file(path, language)
+    except OSError as e:
+        logger.debug(f"Skipping unreadable file {path}: {e}")
+        return False
+
+
+@contextmanager
+def file_lock(path: Path, blocking: bool = True):
+    """Exclusive advisory lock on ``path`` (created if missing), held across
+    every process on the host. Yields whether it was taken, which is only
+    ever False with ``blocking`` off.
+
+    Locks belong to the open file, so two threads of one process exclude
+    each other too; take the process's own lock first.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+        yield True  # closing the file releases the lock
+
+
+def _is_internal(module: str, language: str, source: str, paths: set) -> bool:
+    """Whether an import refers to a file inside the repository."""
+    if module.startswith("."):
+        return True  # relative JS/TS/Python import
+    if language == "Python":
+        base = module.replace(".", "/")
+        return f"{base}.py" in paths or f"{base}/__init__.py" in paths
+    if language in ("C", "C++"):
+        return module in paths or str(Path(source).parent / module) in paths
+    return False
+
+
+def scan_tree(root: Path, workers: int = SCAN_WORKERS) -> Dict:
+    """Per-language line counts and the import graph of a checked-out tree.
+
+    Symlinks are skipped: they may dangle or point outside the tree.
+    """
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            if not path.is_symlink():
+                files.append(path)
+
+    relative = [str(path.relative_to(root)).replace(os.sep, "/") for path in files]
+    languages = [EXTENSION_LANGUAGES.get(path.suffix.lower()) for path in files]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as pool:
+        results = list(pool.map(_scan_readable, files, languages))
+
+    lines_by_language = Counter()
+    files_by_language = Counter()
+    import_graph = defaultdict(list)
+    external = Counter()
+    paths = set(relative)
+    internal_imports = binary_files = unreadable_files = total_lines = source_files = 0
+    for path, language, result in zip(relative, languages, results):
+        if result is False:
+            unreadable_files += 1
+            continue
+        if result is None:
+            binary_files += 1
+            continue
+        lines, imports = result
+        total_lines += lines
+        if language:
+            lines_by_language[language] += lines
+            files_by_language[language] += 1
+        if language in IMPORT_PATTERNS:
+            source_files += 1
+        for module in imports:
+            import_graph[path].append(module)
+            if _is_internal(module, language, path, paths):
+                internal_imports += 1
+            else:
+                external[module.split("/")[0].split(".")[0].split("::")[0]] += 1
+
+    return {
+        "files_scanned": len(files),
+        "binary_files": binary_files,
+        "unreadable_files": unreadable_files,
+        "source_files": source_files,
+        "total_lines": total_lines,
+        "lines_by_language": dict(lines_by_language.most_common()),
+        "files_by_language": dict(files_by_language.most_common()),
+        "internal_imports": internal_imports,
+        "external_imports": sum(external.values()),
+        "top_dependencies": dict(external.most_common(10)),
+        "import_graph": dict(import_graph),
+    }
+
+
+class CloneCache:
+    """Shallow, blob-filtered clones kept under a disk budget (LRU eviction).
+
+    Worker processes can share ``root``: a checkout is only replaced or
+    evicted under its file lock (in ``root/.locks``), which is held for as
+    long as it is in use.
+    """
+
+    def __init__(self, root: str = CLONE_CACHE_DIR, disk_budget_mb: int = CLONE_DISK_BUDGET_MB,
+                 max_repos: int = CLONE_MAX_REPOS, source_template: str = CLONE_SOURCE_TEMPLATE):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.disk_budget = disk_budget_mb * 1024 * 1024
+        self.max_repos = max_repos
+        self.source_template = source_template
+        self._locks = defaultdict(threading.Lock)  # per clone directory name: checkout + scan
+        self._lock = threading.Lock()
+
+    def _dir_for(self, repo_path: str) -> Path:
+        return self.root / repo_path.lower().replace("/", "__")
+
+    @contextmanager
+    def _locked(self, name: str):
+        """Hold a clone directory against every thread and process."""
+        with self._locks[name], file_lock(self.root / ".locks" / f"{name}.lock"):
+            yield
+
+    @staticmethod
+    def _git(*args, cwd=None):
+        return subprocess.run(
+            ["git", *args], cwd=cwd, check=True, capture_output=True, text=True, timeout=CLONE_TIMEOUT
+        ).stdout.strip()
+
+    def checkout(self, repo_path: str, sha: Optional[str] = None) -> Path:
+        """Path to an up-to-date shallow checkout of the default branch. It
+        may be replaced once this returns; see checked_out."""
+        with self._locked(self._dir_for(repo_path).name):
+            return self._checkout(repo_path, sha)
+
+    def _checkout(self, repo_path: str, sha: Optional[str]) -> Path:
+        dest = self._dir_for(repo_path)
+        if dest.exists():
+            if sha is None or self._git("rev-parse", "HEAD", cwd=dest) == sha:
+                os.utime(dest)  # mark as recently used
+                return dest
+            shutil.rmtree(dest, ignore_errors=True)
+
+        source = self.source_template.format(repo=repo_path)
+        if os.path.isdir(source):
+            source = Path(source).resolve().as_uri()  # file:// so --depth is honoured
+        logger.info(f"📥 Cloning {repo_path} (depth 1, blobs on demand)...")
+        started = time.time()
+        tmp = Path(tempfile.mkdtemp(dir=self.root, prefix=".clone-"))
+        try:
+            self._git("clone", "--quiet", "--depth", "1", "--filter=blob:none", "--single-branch",
+                      source, str(tmp / "repo"))
+            (tmp / "repo").rename(dest)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        logger.info(f"✅ Cloned {repo_path} in {time.time() - started:.1f}s")
+        return dest
+
+    def _clones(self):
+        return [p for p in self.root.iterdir() if p.is_dir() and not p.name.startswith(".")]
+
+    @staticmethod
+    def _size(path: Path) -> int:
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file() and not f.is_symlink())
+
+    def evict(self):
+        """Drop least recently used clones until within count and disk budget.
+
+        The most recent clone is always kept, and clones in use by any thread
+        or worker are skipped.
+        """
+        with self._lock:
+            clones = sorted(self._clones(), key=lambda p: p.stat().st_mtime, reverse=True)
+            sizes = {clone: self._size(clone) for clone in clones}
+            total = sum(sizes.values())
+            for victim in reversed(clones[1:]):
+                if len(clones) <= self.max_repos and total <= self.disk_budget:
+                    break
+                lock = self._locks[victim.name]
+                if not lock.acquire(blocking=False):
+                    continue
+                try:
+                    with file_lock(self.root / ".locks" / f"{victim.name}.lock", blocking=False) as held:
+                        if not held:
+                            continue  # in use by another worker
+                        logger.info(f"🧹 Evicting clone {victim.name}")
+                        shutil.rmtree(victim, ignore_errors=True)
+                finally:
+                    lock.release()
+                clones.remove(victim)
+                total -= sizes[victim]
+
+    @contextmanager
+    def checked_out(self, repo_path: str, sha: Optional[str] = None):
+        """Checkout path that is neither replaced nor evicted until the block exits."""
+        with self._locked(self._dir_for(repo_path).name):
+            yield self._checkout(repo_path, sha)
+        self.evict()
+
+    def analyze(self, repo_path: str, sha: Optional[str] = None) -> Dict:
+        """Clone (or reuse) the repository and scan its contents."""
+        with self.checked_out(repo_path, sha) as root:
+            stats = scan_tree(root)
+            stats["commit"] = self._git("rev-parse", "HEAD", cwd=root)
+        return stats
@@ -1,36 +1,86 @@
+import asyncio
+import logging
+import math
 import os
+import re
+import shutil
 import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from github import Github, GithubException
+from typing import List, Optional
 import uvicorn
 import json
-import requests  # Add this
+from tree_index import TreeIndex, fetch_tree_index
+from path_index import PathIndex
+from fanout import gather_partial, run_blocking
+from analysis_cache import AnalysisCache
+from cache_store import store_from_env
+from llm_client import OpenRouterClient
+from llm_cache import LLMResponseCache, prompt_inputs
+from github_scheduler import GitHubScheduler, RateLimitExhausted, github_exception, tokens_from_env
+from github_graphql import fetch_repo_snapshot, fetch_repo_summaries, list_org_repos
+from prewarm import PREWARM_INTERVAL, PRIORITY_MANUAL, PrewarmQueue, hot_repos_from_env
+from local_clone import CLONE_TIMEOUT, CloneCache
+from incremental import MAX_INDEX_ENTRIES, fetch_changes, is_significant, patch_languages
+from admission import AdmissionController, Overloaded
+from compression import CompressionMiddleware
+from http_cache import cacheable_json
+from webhooks import (GITHUB_WEBHOOK_SECRET, is_default_branch_push, push_changes, update_active_issues,
+                      verify_signature)
+from telemetry import CACHE_LOOKUPS, REQUEST_SECONDS, render_metrics, setup_logging, span, start_trace, timed
+
+logger = logging.getLogger(__name__)
 
 
 # ========== 1. LOAD CONFIGURATION ==========
 env_path = Path(__file__).parent / ".env"
 load_dotenv(env_path)
+setup_logging()
 
 # ========== 2. API KEYS WITH DEBUG INFO ==========
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")  # Changed from GEMINI_API_KEY
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "35"))
+# Add per-stage timings and upstream call counts to debug_info.
+DEBUG_TIMINGS = os.getenv("DEBUG_TIMINGS", "0") == "1"
 
 # DEBUG: Print what keys we have
-print("\n🔑 API KEY STATUS:")
-print(f"GitHub Token: {'✅ SET' if GITHUB_TOKEN else '❌ MISSING'}")
-print(f"OpenRouter API Key: {'✅ SET' if OPENROUTER_API_KEY else '❌ MISSING'}")
+logger.info("🔑 API KEY STATUS:")
+logger.info(f"GitHub Token: {'✅ SET' if GITHUB_TOKEN else '❌ MISSING'}")
+logger.info(f"OpenRouter API Key: {'✅ SET' if OPENROUTER_API_KEY else '❌ MISSING'}")
+
+# All GitHub access goes through the scheduler, which spreads calls over
+# GITHUB_TOKENS (comma-separated) and GITHUB_TOKEN by remaining rate limit.
+github_scheduler = GitHubScheduler(tokens_from_env())
+logger.info(f"GitHub token pool: {len(github_scheduler.budgets)} token(s)")
 
 # Initialize OpenRouter client
 openrouter_client = None
 if OPENROUTER_API_KEY:
-    print("✅ OpenRouter client available")
-    openrouter_client = True  # Simple flag to indicate availability
+    logger.info("✅ OpenRouter client available")
+    # Shared client: one keep-alive connection pool for every analysis
+    openrouter_client = OpenRouterClient(OPENROUTER_API_KEY, timeout=LLM_CALL_TIMEOUT)
 else:
-    print("❌ OpenRouter client not initialized (missing API key)")
+    logger.warning("❌ OpenRouter client not initialized (missing API key)")
+
+# Optional content analysis: clone each repository (shallow, blobs on demand)
+# and scan the real files. Set CLONE_ANALYSIS=1 to enable; needs git.
+clone_cache = None
+if os.getenv("CLONE_ANALYSIS", "0") == "1":
+    if shutil.which("git"):
+        clone_cache = CloneCache()
+        logger.info(f"✅ Clone analysis enabled (cache: {clone_cache.root})")
+    else:
+        logger.error("❌ Clone analysis requested but git is not installed")
 
 # ========== 3. ENVIRONMENT DETECTION ==========
 IS_PRODUCTION = os.getenv("RENDER") is not None
@@ -53,7 +103,56 @@ else:
         "http://localhost:3000",
     ]
 
-app = FastAPI(title="CodeSensei API")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def warm_up():
+    """Import the heavy dependencies and build the shared clients.
+
+    Module import leaves these to first use so the server starts listening
+    sooner; the lifespan hook runs this in the background right after.
+    """
+    started = time.perf_counter()
+    try:
+        github_scheduler.build_clients()
+        if openrouter_client is not None:
+            openrouter_client.session  # imports requests
+        import scoring  # noqa: F401 (numpy)
+        if CHAT_ENABLED:
+            chat_indexes()
+    except Exception as e:
+        logger.warning(f"⚠️ Warm-up failed, clients will be built on first use: {e}")
+        return
+    logger.info(f"🔥 Clients ready in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    warming = asyncio.ensure_future(run_blocking(warm_up, timeout=60))
+    await prewarm_queue.start()
+    yield
+    warming.cancel()
+    await prewarm_queue.stop()
+
+
+app = FastAPI(title="CodeSensei API", lifespan=lifespan)
+# Brotli/gzip for complete responses over COMPRESS_MIN_BYTES; streams pass
+# through. Added first so it sits inside time_requests, which re-streams bodies.
+app.add_middleware(CompressionMiddleware)
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(
+        time.perf_counter() - started,
+        method=request.method,
+        route=route.path if route else "unmatched",
+        status=response.status_code,
+    )
+    return response
+
 
 app.add_middleware(
     CORSMiddleware,
@@ -65,11 +164,20 @@ app.add_middleware(
 
 class RepoRequest(BaseModel):
     github_url: str
+PER_PAGE = 30  # PyGithub's default page size
+
+
 def get_top_contributors(repo, limit=5):
-    """Get top contributors for a repository."""
+    """Get top contributors for a repository and the total contributor count.
+
+    Reads one page of contributors; counting them costs a second request only
+    when the repository has more contributors than fit on that page.
+    """
     try:
-        print(f"👥 Fetching top {limit} contributors...")
-        contributors = list(repo.get_contributors()[:limit])
+        logger.info(f"👥 Fetching top {limit} contributors...")
+        paginated = repo.get_contributors()
+        first_page = paginated.get_page(0)
+        contributors = first_page[:limit]
         
         contributors_data = []
         for contributor in contributors:
@@ -80,16 +188,20 @@ def get_top_contributors(repo, limit=5):
                 "profile_url": contributor.html_url
             })
         
-        print(f"✅ Found {len(contributors_data)} contributors")
-        return contributors_data
+        contributor_count = len(first_page)
+        if contributor_count >= PER_PAGE:
+            contributor_count = paginated.totalCount
+
+        logger.info(f"✅ Found {len(contributors_data)} contributors")
+        return contributors_data, contributor_count
     except Exception as e:
-        print(f"⚠️ Could not fetch contributors: {e}")
-        return []
+        logger.warning(f"⚠️ Could not fetch contributors: {e}")
+        return [], None
 
 def get_most_active_issues(repo, limit=5):
     """Get issues with most comments (indicating high activity)."""
     try:
-        print(f"📝 Fetching top {limit} active issues...")
+        logger.info(f"📝 Fetching top {limit} active issues...")
         # Get issues sorted by comments (most commented = most active)
         issues = list(repo.get_issues(state='open', sort='comments', direction='desc')[:limit])
         
@@ -106,200 +218,899 @@ def get_most_active_issues(repo, limit=5):
                     "state": issue.state
                 })
         
-        print(f"✅ Found {len(issues_data)} active issues")
+        logger.info(f"✅ Found {len(issues_data)} active issues")
         return issues_data
     except Exception as e:
-        print(f"⚠️ Could not fetch issues: {e}")
+        logger.warning(f"⚠️ Could not fetch issues: {e}")
         return []
-@app.post("/api/analyze")
-async def analyze_repo(request: RepoRequest):
-    """Analyze a GitHub repository with AI insights."""
-    print(f"\n🔍 Analyzing repository: {request.github_url}")
-    
+# ========== ANALYSIS PIPELINE ==========
+# Cached sections and how long each stays fresh live in analysis_cache.py.
+# "tree" holds the raw languages and file list the derived sections are built from.
+CACHE_SECTIONS = ("repo_info", "tree", "community", "ai_analysis")
+# Sections that don't change with a new commit; still-fresh copies are carried
+# over from the last analyzed SHA instead of being refetched.
+COMMIT_INDEPENDENT_SECTIONS = ("repo_info", "community")
+
+# Shared by all worker processes when CACHE_DB or CACHE_REDIS_URL is set
+# (see cache_store.py); the per-cache *_CACHE_DB files still work on their own.
+cache_store = store_from_env()
+
+analysis_cache = AnalysisCache(
+    max_entries=int(os.getenv("ANALYSIS_CACHE_SIZE", "256")),
+    db_path=os.getenv("ANALYSIS_CACHE_DB") or None,
+    store=cache_store,
+)
+
+# LLM answers keyed by a fingerprint of the prompt inputs. Set
+# LLM_CACHE_SIMILARITY (0-1) to also reuse answers for near-identical inputs.
+llm_cache = LLMResponseCache(
+    max_entries=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+    db_path=os.getenv("LLM_CACHE_DB") or None,
+    min_similarity=float(os.getenv("LLM_CACHE_SIMILARITY")) if os.getenv("LLM_CACHE_SIMILARITY") else None,
+    store=cache_store,
+)
+
+
+def describe_repo(repo):
+    """Build the repo_info section from a PyGithub repository."""
+    return {
+        "full_name": repo.full_name,
+        "description": repo.description,
+        "stars": repo.stargazers_count,
+        "forks": repo.forks_count,
+        "url": repo.html_url,
+        "open_issues": repo.open_issues_count,
+        "watchers": repo.subscribers_count,
+    }
+
+
+REPO_INFO_FIELDS = ("full_name", "description", "stars", "forks", "url", "open_issues", "watchers")
+
+# Fetch repo info, languages and top issues in one GraphQL query instead of
+# separate REST calls. Set GITHUB_GRAPHQL_SNAPSHOT=0 to use REST only.
+USE_GRAPHQL_SNAPSHOT = os.getenv("GITHUB_GRAPHQL_SNAPSHOT", "1") != "0"
+
+
+async def fetch_snapshot(token, repo_path):
+    """GraphQL snapshot of the repository, or None to fall back to REST."""
+    if not USE_GRAPHQL_SNAPSHOT:
+        return None
+    try:
+        with span("graphql_snapshot"):
+            return await run_blocking(fetch_repo_snapshot, token, repo_path)
+    except Exception as e:
+        logger.warning(f"⚠️ GraphQL snapshot failed, falling back to REST: {e}")
+        return None
+
+
+async def resolve_head_sha(repo_path):
+    """Current head SHA for cache keying, or None if it can't be determined.
+
+    With every token out of requests the last known head is used, so cached
+    analyses are still served until the rate limit resets.
+    """
+    try:
+        with span("head_sha"):
+            return await run_blocking(
+                analysis_cache.resolve_head, repo_path, lambda: github_scheduler.pick().token
+            )
+    except RateLimitExhausted as e:
+        head = await run_blocking(analysis_cache.get_head, repo_path)
+        if head:
+            logger.warning(f"⏳ {e}; using the cached head {head[0][:7]}")
+            return head[0]
+        logger.warning(f"⚠️ Could not resolve head SHA, skipping cache: {e}")
+        return None
+    except Exception as e:
+        logger.warning(f"⚠️ Could not resolve head SHA, skipping cache: {e}")
+        return None
+
+
+async def run_ai_analysis(repo_info, tree, on_field=None):
+    """Run the OpenRouter analysis. Returns (analysis, succeeded)."""
+    languages = tree["languages"]
+    file_structure = tree["file_structure"]
+    primary_language = get_primary_language(languages)
+
+    logger.info("🤖 Calling OpenRouter (DeepSeek) API...")
+    try:
+        with span("ai_analysis"):
+            ai_analysis = await run_blocking(
+                analyze_with_openrouter,
+                repo_info["full_name"],
+                repo_info["description"],
+                languages,
+                file_structure[:20],
+                primary_language,
+                tree.get("file_count", len(file_structure)),
+                on_field=on_field,
+                timeout=LLM_CALL_TIMEOUT,
+            )
+        logger.info("✅ OpenRouter analysis successful")
+        return ai_analysis, True
+    except asyncio.TimeoutError:
+        logger.error(f"❌ OpenRouter timed out after {LLM_CALL_TIMEOUT}s")
+        error = "the request timed out."
+    except Exception as e:
+        logger.error(f"❌ OpenRouter error: {e}")
+        error = f"{str(e)[:100]}..."
+    return {
+        "ai_summary": f"OpenRouter API Error: {error}",
+        "tech_insights": [],
+        "learning_path": [],
+        "patterns": [],
+        "community_tips": []
+    }, False
+
+
+async def fetch_content_stats(repo_path, ref=None):
+    """Clone and scan the repository; None if clone analysis is off or fails."""
+    if clone_cache is None:
+        return None
+    stats = await run_blocking(clone_cache.analyze, repo_path, ref, timeout=CLONE_TIMEOUT)
+    # Only the totals are cached; the per-file import graph is too large.
+    stats.pop("import_graph", None)
+    return stats
+
+
+async def fetch_tree_changes(repo, base_sha, ref):
+    """Compare diff since ``base_sha``, or None to rebuild the tree in full."""
+    try:
+        with span("compare"):
+            return await run_blocking(fetch_changes, repo, base_sha, ref)
+    except Exception as e:
+        logger.warning(f"⚠️ Compare failed, rebuilding tree: {e}")
+        return None
+
+
+async def fetch_tree_section(repo, languages=None, ref=None, repo_path=None, base=None):
+    """Fetch languages and the file tree. Returns (section, failed calls).
+
+    ``languages`` already known from the GraphQL snapshot are not refetched.
+    ``base`` is the ``(sha, tree section, path index)`` of the last analyzed
+    commit: when its index can be patched from the compare diff, the tree
+    and languages aren't refetched. With clone analysis enabled the section
+    also carries ``content`` stats.
+    """
+    changes = None
+    if base and ref:
+        changes = await fetch_tree_changes(repo, base[0], ref)
+
+    if changes is not None:
+        with span("describe_paths"):
+            section = await run_blocking(patch_tree_section, base, ref, changes, languages)
+        failed = []
+    else:
+        calls = {"tree_index": lambda: fetch_tree_index(repo, ref)}
+        if languages is None:
+            calls["languages"] = repo.get_languages
+        upstream, failed = await gather_partial(calls, defaults={"languages": {}, "tree_index": None})
+        if languages is None:
+            languages = upstream["languages"]
+        with span("describe_paths"):
+            section = await run_blocking(build_tree_section, upstream["tree_index"], languages)
+    if clone_cache is not None and repo_path:
+        try:
+            with span("clone_analysis"):
+                section["content"] = await fetch_content_stats(repo_path, ref)
+        except Exception as e:
+            logger.warning(f"⚠️ Clone analysis failed: {e}")
+            failed.append("content")
+    return section, failed
+
+
+def build_tree_section(tree_index, languages):
+    """The tree section for a fetched (or patched) index. Its "index" goes
+    into a cache section of its own (see tree_cache_sections)."""
+    section = {
+        "languages": languages,
+        "file_structure": (
+            list_files_with_limits(tree_index, max_depth=3, max_files=100) if tree_index else []
+        ),
+        # Per-path index the next commit's diff is applied to.
+        "index": tree_index.pack() if tree_index and len(tree_index) <= MAX_INDEX_ENTRIES else None,
+    }
+    if tree_index:
+        section.update(describe_paths(tree_index, languages))
+    return section
+
+
+def patch_tree_section(base, ref, changes, languages=None):
+    """The tree section at ``ref`` from ``base`` (``(sha, tree section, path
+    index)`` of an earlier commit) and the files changed since."""
+    base_sha, base_tree, base_index = base
+    base_tree_index = TreeIndex.unpack(base_sha, base_index)
+    tree_index = base_tree_index.apply_changes(ref, changes)
+    if languages is None:
+        languages = patch_languages(base_tree["languages"], changes)
+    section = build_tree_section(tree_index, languages)
+    section["diff"] = {
+        "base": base_sha,
+        "files_changed": len(changes),
+        "significant": is_significant(changes, len(base_tree_index)),
+    }
+    return section
+
+
+def tree_cache_sections(tree):
+    """A tree section as cache sections: the tree without its path index, and
+    the index as "tree_index" when there is one. Reading the tree (as the
+    leaderboard does for every cached repo) then never decodes the index,
+    which is only needed to patch the next commit's tree."""
+    tree = dict(tree)
+    index = tree.pop("index", None)
+    return {"tree": tree, **({"tree_index": index} if index is not None else {})}
+
+
+def describe_paths(tree_index, languages):
+    """Whole-tree facts from the compact path index; file_structure is only a
+    sample (3 levels, 100 files)."""
+    paths = PathIndex.from_tree_index(tree_index)
+    return {
+        "file_count": len(paths),
+        "top_directories": paths.top_directories(),
+        "recommended_start": recommend_starting_point(paths, get_primary_language(languages)),
+    }
+
+
+async def fetch_community_section(repo, active_issues=None):
+    """Fetch contributors and issues. Returns (section, failed calls).
+
+    ``active_issues`` already known from the GraphQL snapshot are not refetched.
+    """
+    calls = {"top_contributors": lambda: get_top_contributors(repo, limit=5)}
+    if active_issues is None:
+        calls["active_issues"] = lambda: get_most_active_issues(repo, limit=5)
+    upstream, failed = await gather_partial(
+        calls, defaults={"top_contributors": ([], None), "active_issues": []}
+    )
+    top_contributors, contributor_count = upstream["top_contributors"]
+    return {
+        "top_contributors": top_contributors,
+        "active_issues": upstream["active_issues"] if active_issues is None else active_issues,
+        "contributor_count": (
+            contributor_count if contributor_count is not None else len(top_contributors)
+        ),
+    }, failed
+
+
+def build_tech_analysis(tree):
+    languages = tree["languages"]
+    file_structure = tree["file_structure"]
+    total_size = sum(languages.values())
+    return {
+        "languages": {
+            lang: f"{(count/total_size)*100:.1f}%"
+            for lang, count in languages.items()
+        },
+        "primary_language": get_primary_language(languages),
+        "file_count": tree.get("file_count", len(file_structure)),
+        "sample_structure": file_structure[:10],
+        "top_languages": list(languages.keys())[:5] if languages else [],
+        **({"top_directories": tree["top_directories"]} if "top_directories" in tree else {}),
+        **({"content_metrics": {
+            key: tree["content"][key]
+            for key in ("files_scanned", "total_lines", "lines_by_language", "internal_imports",
+                        "external_imports", "top_dependencies")
+        }} if tree.get("content") else {}),
+    }
+
+
+def build_community_data(community):
+    active_issues = community["active_issues"]
+    return {
+        "top_contributors": community["top_contributors"],
+        "active_issues": active_issues,
+        "contributor_count": community["contributor_count"],
+        "issue_engagement": sum(issue.get("comments", 0) for issue in active_issues) if active_issues else 0
+    }
+
+
+def scoring_record(tree, community):
+    """One repository's inputs to scoring.score_batch."""
+    return {
+        "languages": tree["languages"],
+        "file_count": tree.get("file_count", len(tree["file_structure"])),
+        "contributor_count": len(community["top_contributors"]),
+        "issue_comments": sum(issue.get("comments", 0) for issue in community["active_issues"]),
+    }
+
+
+def build_learning_metrics(tree, community):
+    from scoring import score_batch
+
+    scores = score_batch([scoring_record(tree, community)])
+    complexity = float(scores["complexity_score"][0])
+    if tree.get("content"):
+        complexity = calculate_content_complexity(complexity, tree["content"])
+    return {
+        "complexity_score": complexity,
+        "complexity_level": get_complexity_level(complexity),
+        "recommended_start": (
+            tree.get("recommended_start")
+            or recommend_starting_point(tree["file_structure"], scores["primary_language"][0])
+        ),
+        "community_score": float(scores["community_score"][0]),
+    }
+
+
+def build_debug_info(sections, extra=None):
+    # Either section may be missing when the request asked for fewer fields.
+    tree, community = sections.get("tree"), sections.get("community")
+    return {
+        "openrouter_available": openrouter_client is not None,
+        "openrouter_key_set": bool(OPENROUTER_API_KEY),
+        "github_token_set": bool(github_scheduler),
+        "file_count": tree.get("file_count", len(tree["file_structure"])) if tree else None,
+        "language_count": len(tree["languages"]) if tree else None,
+        "contributors_fetched": len(community["top_contributors"]) if community else None,
+        "issues_fetched": len(community["active_issues"]) if community else None,
+        **(extra or {})
+    }
+
+
+EMPTY_COMMUNITY = {"top_contributors": [], "active_issues": [], "contributor_count": 0}
+
+NO_AI_ANALYSIS = {
+    "ai_summary": "AI analysis is not enabled.",
+    "tech_insights": [],
+    "learning_path": [],
+    "patterns": [],
+    "community_tips": []
+}
+
+# Served instead of a fresh AI analysis when the server is too busy to run one.
+AI_SKIPPED_ANALYSIS = {
+    **NO_AI_ANALYSIS,
+    "ai_summary": "AI analysis was skipped because the server is busy. Try again in a moment.",
+}
+
+# Order of the sections in the /api/analyze response.
+RESPONSE_SECTIONS = ("repo_info", "tech_analysis", "community_data", "learning_metrics", "ai_analysis")
+
+# Response fields /api/analyze can be narrowed to with ``fields=``, and the
+# cached sections each is built from. repo_info is always fetched: the other
+# sections are read through the repository it describes.
+FIELD_SECTIONS = {
+    "repo_info": (),
+    "tech_analysis": ("tree",),
+    "community_data": ("community",),
+    "learning_metrics": ("tree", "community"),
+    "ai_analysis": ("tree", "ai_analysis"),
+    "debug_info": (),
+}
+
+
+def parse_fields(fields):
+    """Requested response fields from a comma-separated list; None for all.
+    Raises ValueError on unknown names."""
+    if not fields:
+        return None
+    requested = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in requested if field not in FIELD_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (expected: {', '.join(FIELD_SECTIONS)})")
+    return requested or None
+
+
+def needed_sections(fields):
+    """The cached sections a response with these fields is built from."""
+    if fields is None:
+        return CACHE_SECTIONS
+    needed = {"repo_info"}.union(*(FIELD_SECTIONS[field] for field in fields))
+    return tuple(section for section in CACHE_SECTIONS if section in needed)
+
+
+def project_analysis(result, fields):
+    """Keep only the requested fields of an /api/analyze response."""
+    if fields is None or result.get("status") != "success":
+        return result
+    projected = {"status": result["status"], **{field: result[field] for field in fields if field in result}}
+    if "ai_analysis" in fields:
+        projected["has_ai_analysis"] = result["has_ai_analysis"]
+    return projected
+
+
+async def stream_analysis(github_url, refresh_ahead=0, skip_ai=False, needed=CACHE_SECTIONS):
+    """Run the analysis pipeline, yielding ``(event, data)`` pairs.
+
+    Each response section is yielded as soon as its inputs are ready, with
+    "ai_field" events relaying the AI answer field by field while it streams,
+    followed by a final "done" event (has_ai_analysis, debug_info). Failures yield a
+    single "error" event carrying the usual error payload. Cached sections
+    expiring within ``refresh_ahead`` seconds are recomputed. With ``skip_ai``
+    an AI analysis that isn't cached is skipped rather than computed. Only
+    the ``needed`` cache sections are fetched; response sections built from
+    others are yielded only if those happen to be cached.
+    """
+    logger.info(f"🔍 Analyzing repository: {github_url}")
+    tasks, ai_task, skipped_ai = {}, None, False
+    trace = start_trace(github_url)
+
     try:
         # Check for required tokens
-        if not GITHUB_TOKEN:
-            return {
+        if not github_scheduler:
+            yield "error", {
                 "status": "error", 
                 "message": "GitHub token not configured.",
                 "debug": {"github_token_set": False}
             }
+            return
         
-        print(f"✅ GitHub token available")
-        print(f"✅ OpenRouter available: {openrouter_client is not None}")
-        
-        g = Github(GITHUB_TOKEN)
-        repo = g.get_repo(extract_repo_path(request.github_url))
+        logger.info(f"✅ GitHub token available")
+        logger.info(f"✅ OpenRouter available: {openrouter_client is not None}")
 
-        # ========== NEW: Get Contributors & Issues ==========
-        print("📊 Fetching community data...")
-        
-        # Get top contributors (limit to 5 for performance)
-        top_contributors = get_top_contributors(repo, limit=5)
-        
-        # Get most active issues (limit to 5)
-        active_issues = get_most_active_issues(repo, limit=5)
-        # ========== END NEW SECTION ==========
-        
-        # Extract basic information (your existing code)
-        languages = repo.get_languages()
-        contents = repo.get_contents("")
-        file_structure = list_files_with_limits(
-            contents, repo, path="", max_depth=3, max_files=100, current_depth=0
+        repo_path = extract_repo_path(github_url)
+        trace.repo = repo_path
+
+        # ========== Cache lookup (one conditional request) ==========
+        # Cache calls may be store I/O (SQLite, Redis), so they run off the loop.
+        head_sha = await resolve_head_sha(repo_path)
+        sections = (
+            await run_blocking(analysis_cache.get_sections, repo_path, head_sha, refresh_ahead=refresh_ahead)
+            if head_sha else {}
         )
+        cached_at_head = set(sections)
 
-        # Calculate metrics (your existing code)
-        primary_language = max(languages, key=languages.get) if languages else "Unknown"
-        total_size = sum(languages.values())
-        
-        # Calculate language percentages (your existing code)
-        language_percentages = {
-            lang: f"{(count/total_size)*100:.1f}%" 
-            for lang, count in languages.items()
-        }
-        
-        # Get AI analysis (your existing code)
-        ai_analysis = None
-        if openrouter_client:
-            print("🤖 Calling OpenRouter (DeepSeek) API...")
-            try:
-                # Enhance the AI prompt with contributor info
-                enhanced_prompt = f"""
-                You are CodeSensei, an AI mentor for codebases.
-
-                Briefly analyze this repository:
-                Name: {repo.full_name}
-                Description: {repo.description or "No description"}
-                Primary Language: {primary_language}
-                File Count: {len(file_structure)}
-                Top Contributors: {len(top_contributors)} contributors
-                Active Issues: {len(active_issues)} active discussions
-
-                Provide a short educational summary in JSON format with this structure:
-                {{
-                    "ai_summary": "A 2-3 sentence educational overview",
-                    "tech_insights": ["Insight 1", "Insight 2"],
-                    "learning_path": ["Step 1: Start with X", "Step 2: Learn Y"],
-                    "patterns": ["Pattern 1", "Pattern 2"],
-                    "community_tips": ["Tip about contributors", "Tip about issue engagement"]
-                }}
-
-                Keep it concise and educational.
-                """
-                
-                ai_analysis = analyze_with_openrouter(
-                    repo.full_name,
-                    repo.description,
-                    languages,
-                    file_structure[:20],
-                    primary_language,
-                    len(file_structure)
-                )
-                print("✅ OpenRouter analysis successful")
-            except Exception as e:
-                print(f"❌ OpenRouter error: {e}")
-                ai_analysis = {
-                    "ai_summary": f"OpenRouter API Error: {str(e)[:100]}...",
-                    "tech_insights": [],
-                    "learning_path": [],
-                    "patterns": [],
-                    "community_tips": []
-                }
+        # ========== Incremental: start from the last analyzed commit ==========
+        previous_sha, previous, previous_fresh = None, {}, {}
+        if head_sha and any(section not in sections for section in needed):
+            previous_sha = await run_blocking(analysis_cache.previous_sha, repo_path, head_sha)
+        if previous_sha:
+            previous = await run_blocking(analysis_cache.get_sections, repo_path, previous_sha, include_expired=True)
+            previous_fresh = await run_blocking(
+                analysis_cache.get_sections, repo_path, previous_sha, refresh_ahead=refresh_ahead
+            )
+            carried = [
+                section for section in COMMIT_INDEPENDENT_SECTIONS
+                if section not in sections and section in previous_fresh
+            ]
+            await run_blocking(analysis_cache.carry_over, repo_path, previous_sha, head_sha, carried)
+            sections.update({section: previous_fresh[section] for section in carried})
+        for section in needed:
+            if section == "ai_analysis" and not openrouter_client:
+                continue
+            result = "hit" if section in cached_at_head else "carried" if section in sections else "miss"
+            CACHE_LOOKUPS.inc(cache="analysis", result=result)
+        stale = [
+            section for section in needed
+            if section not in sections and not (section == "ai_analysis" and not openrouter_client)
+        ]
+        cached = [section for section in CACHE_SECTIONS if section in sections]
+        if stale:
+            logger.info(f"🧮 Computing sections: {', '.join(stale)} (cached: {', '.join(cached) or 'none'})")
         else:
-            print("⚠️ OpenRouter client not available, skipping AI analysis")
-        
-        # Structure the response - ADD THE NEW FIELDS
-        analysis_result = {
+            logger.info("⚡ Serving fully cached analysis")
+
+        cacheable, partial_sections, deferred_sections = {}, [], []
+        if any(section != "ai_analysis" for section in stale):
+            budget = await run_blocking(github_scheduler.pick)
+            snapshot = await fetch_snapshot(budget.token, repo_path)
+            if snapshot:
+                # The snapshot already carries repo info, languages and issues;
+                # a lazy repository object costs no request of its own.
+                repo = budget.client.get_repo(snapshot["full_name"], lazy=True)
+                repo_info = {key: snapshot[key] for key in REPO_INFO_FIELDS}
+            elif "repo_info" not in stale and head_sha:
+                # Repo info is cached and the tree is read at head_sha, so
+                # nothing needs the repository's own fields.
+                repo = budget.client.get_repo(repo_path, lazy=True)
+                repo_info = sections["repo_info"]
+            else:
+                with span("get_repo"):
+                    repo = await run_blocking(budget.client.get_repo, repo_path)
+                repo_info = describe_repo(repo)
+            if "repo_info" in stale:
+                sections["repo_info"] = cacheable["repo_info"] = repo_info
+            # ========== Fan out the independent GitHub calls ==========
+            if "tree" in stale:
+                tasks[asyncio.ensure_future(timed("tree", fetch_tree_section(
+                    repo,
+                    languages=snapshot["languages"] if snapshot else None,
+                    ref=snapshot["head_sha"] if snapshot else head_sha,
+                    repo_path=repo_path,
+                    base=(
+                        (previous_sha, previous["tree"], previous["tree_index"])
+                        if "tree" in previous and "tree_index" in previous else None
+                    ),
+                )))] = "tree"
+            if "community" in stale:
+                if await run_blocking(github_scheduler.should_defer, "low"):
+                    # Low on rate limit: keep the budget for the tree and serve
+                    # the expired community data (or none) until it recovers.
+                    logger.warning("⏳ GitHub budget low, deferring contributors and issues")
+                    expired = (
+                        await run_blocking(analysis_cache.get_sections, repo_path, head_sha, include_expired=True)
+                        if head_sha else {}
+                    )
+                    sections["community"] = expired.get("community") or EMPTY_COMMUNITY
+                    deferred_sections.append("community")
+                else:
+                    tasks[asyncio.ensure_future(timed("community", fetch_community_section(
+                        repo, active_issues=snapshot["active_issues"] if snapshot else None,
+                    )))] = "community"
+        yield "repo_info", sections["repo_info"]
+
+        # The LLM call runs on a worker thread; hand its fields back to the loop.
+        loop = asyncio.get_running_loop()
+        ai_fields = asyncio.Queue()
+
+        def on_ai_field(key, value):
+            loop.call_soon_threadsafe(ai_fields.put_nowait, (key, value))
+
+        emitted = set()
+        while True:
+            if "tree" in sections and "tech_analysis" not in emitted:
+                emitted.add("tech_analysis")
+                yield "tech_analysis", build_tech_analysis(sections["tree"])
+                diff = sections["tree"].get("diff")
+                if ("ai_analysis" in stale and openrouter_client and diff and not diff["significant"]
+                        and "ai_analysis" in previous_fresh):
+                    logger.info("♻️ Minor changes since the last analysis, reusing its AI summary")
+                    await run_blocking(analysis_cache.carry_over, repo_path, previous_sha, head_sha, ["ai_analysis"])
+                    sections["ai_analysis"] = previous_fresh["ai_analysis"]
+                elif "ai_analysis" in stale and openrouter_client and skip_ai:
+                    logger.warning("🚦 Server busy, skipping AI analysis")
+                    admission.count("skipped_ai")
+                    skipped_ai = True
+                elif "ai_analysis" in stale and openrouter_client:
+                    ai_task = asyncio.ensure_future(
+                        run_ai_analysis(sections["repo_info"], sections["tree"], on_field=on_ai_field)
+                    )
+            if "community" in sections and "community_data" not in emitted:
+                emitted.add("community_data")
+                yield "community_data", build_community_data(sections["community"])
+            if "tree" in sections and "community" in sections and "learning_metrics" not in emitted:
+                emitted.add("learning_metrics")
+                yield "learning_metrics", build_learning_metrics(sections["tree"], sections["community"])
+            if not tasks:
+                break
+
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks.pop(task)
+                section, failed = task.result()
+                split = tree_cache_sections(section) if name == "tree" else {name: section}
+                sections[name] = split[name]
+                partial_sections.extend(failed)
+                # A section built from a failed call is shown once but not cached.
+                if not failed:
+                    cacheable.update(split)
+
+        if ai_task is not None:
+            # Relay AI fields (ai_summary first) while the completion streams in.
+            while not ai_task.done() or not ai_fields.empty():
+                next_field = asyncio.ensure_future(ai_fields.get())
+                await asyncio.wait({ai_task, next_field}, return_when=asyncio.FIRST_COMPLETED)
+                if next_field.done():
+                    key, value = next_field.result()
+                    yield "ai_field", {"field": key, "value": value}
+                else:
+                    next_field.cancel()
+            ai_analysis, succeeded = ai_task.result()
+            sections["ai_analysis"] = ai_analysis
+            if succeeded and ("tree" in cacheable or "tree" not in stale):
+                cacheable["ai_analysis"] = ai_analysis
+        elif not openrouter_client:
+            logger.warning("⚠️ OpenRouter client not available, skipping AI analysis")
+        ai_analysis = sections.get("ai_analysis")
+        if "ai_analysis" in needed:
+            yield "ai_analysis", ai_analysis or (AI_SKIPPED_ANALYSIS if skipped_ai else NO_AI_ANALYSIS)
+
+        if head_sha:
+            await run_blocking(analysis_cache.put_sections, repo_path, head_sha, cacheable)
+
+        logger.info(f"✅ Analysis complete. Has AI: {ai_analysis is not None}")
+        if "community" in sections:
+            logger.info(f"   Contributors: {len(sections['community']['top_contributors'])}, Active Issues: {len(sections['community']['active_issues'])}")
+        if not DEBUG_TIMINGS:
+            trace.finish()
+        yield "done", {
             "status": "success",
-            "repo_info": {
-                "full_name": repo.full_name,
-                "description": repo.description,
-                "stars": repo.stargazers_count,
-                "forks": repo.forks_count,
-                "url": repo.html_url,
-                "open_issues": repo.open_issues_count,  # Add this
-                "watchers": repo.subscribers_count,      # Add this
-            },
-            "tech_analysis": {
-                "languages": language_percentages,
-                "primary_language": primary_language,
-                "file_count": len(file_structure),
-                "sample_structure": file_structure[:10],
-                "top_languages": list(languages.keys())[:5] if languages else []
-            },
-            # ========== NEW: Community Data ==========
-            "community_data": {
-                "top_contributors": top_contributors,
-                "active_issues": active_issues,
-                "contributor_count": repo.get_contributors().totalCount,
-                "issue_engagement": sum(issue.get("comments", 0) for issue in active_issues) if active_issues else 0
-            },
-            # ========== END NEW ==========
-            "learning_metrics": {
-                "complexity_score": calculate_enhanced_complexity(languages, file_structure),
-                "complexity_level": get_complexity_level(calculate_enhanced_complexity(languages, file_structure)),
-                "recommended_start": recommend_starting_point(file_structure, primary_language),
-                "community_score": calculate_community_score(top_contributors, active_issues),  # New metric
-            },
-            # AI-generated content
-            "ai_analysis": ai_analysis or {
-                "ai_summary": "AI analysis is not enabled.",
-                "tech_insights": [],
-                "learning_path": [],
-                "patterns": [],
-                "community_tips": []
-            },
             "has_ai_analysis": ai_analysis is not None,
-            "debug_info": {
-                "openrouter_available": openrouter_client is not None,
-                "openrouter_key_set": bool(OPENROUTER_API_KEY),
-                "github_token_set": bool(GITHUB_TOKEN),
-                "file_count": len(file_structure),
-                "language_count": len(languages),
-                "contributors_fetched": len(top_contributors),
-                "issues_fetched": len(active_issues)
-            }
+            "debug_info": build_debug_info(sections, {
+                "head_sha": head_sha,
+                "cached_sections": cached,
+                "partial_sections": partial_sections,
+                "deferred_sections": deferred_sections,
+                "incremental_from": (sections.get("tree", {}).get("diff") or {}).get("base"),
+                **({"degraded": "skipped_ai"} if skipped_ai else {}),
+                **({"timings": trace.finish()} if DEBUG_TIMINGS else {}),
+            }),
         }
-        
-        print(f"✅ Analysis complete. Has AI: {ai_analysis is not None}")
-        print(f"   Contributors: {len(top_contributors)}, Active Issues: {len(active_issues)}")
-        return analysis_result
 
-    except GithubException as e:
-        print(f"❌ GitHub API error: {e}")
-        return {
+    except RateLimitExhausted as e:
+        logger.error(f"❌ {e}")
+        yield "error", {
+            "status": "error",
+            "message": str(e),
+            "debug": {"github_error": True, "rate_limit_reset": e.reset}
+        }
+    except github_exception() as e:
+        logger.error(f"❌ GitHub API error: {e}")
+        yield "error", {
             "status": "error", 
             "message": f"GitHub API error: {e.data.get('message', str(e))}",
             "debug": {"github_error": True}
         }
     except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        return {
+        logger.error(f"❌ Unexpected error: {e}")
+        yield "error", {
             "status": "error", 
             "message": f"An unexpected error occurred: {str(e)}",
             "debug": {"error": str(e)}
         }
-    
+    finally:
+        # The client went away or something failed: stop any upstream work.
+        for task in [*tasks, ai_task]:
+            if task is not None and not task.done():
+                task.cancel()
+
+
+# ========== SINGLE-FLIGHT ==========
+# One running analysis per normalized owner/repo; identical requests that
+# arrive while it runs await the same task instead of starting their own.
+inflight_analyses = {}
+# New analyses per worker are capped (ADMISSION_* env); see admitted_analysis.
+admission = AdmissionController()
+analysis_metrics = {"analyze_requests": 0, "coalesced_requests": 0, "stream_requests": 0, "batch_requests": 0,
+                    "cross_worker_waits": 0}
+
+# Across worker processes sharing cache_store, one analyzes a repository at a
+# time; the others wait for its lock and then find the result in the cache.
+ANALYSIS_LOCK_TTL = float(os.getenv("ANALYSIS_LOCK_TTL", "120"))
+ANALYSIS_LOCK_WAIT = float(os.getenv("ANALYSIS_LOCK_WAIT", "60"))
+ANALYSIS_LOCK_POLL = 0.25
 
-def calculate_community_score(contributors, issues):
-    """Calculate a community engagement score (0-10)."""
-    if not contributors and not issues:
-        return 0.0
-    
-    # Factors
-    contributor_score = min(5, len(contributors) * 0.5)
-    
-    # Issue engagement score
-    total_comments = sum(issue.get("comments", 0) for issue in issues)
-    issue_score = min(5, total_comments * 0.1)
-    
-    # Combined score
-    score = contributor_score + issue_score
-    
-    return round(min(10, score), 1)
 
-def analyze_with_openrouter(repo_name, description, languages, file_structure, primary_language, file_count):
-    """Analyze repository using OpenRouter API with DeepSeek model."""
+def analysis_key(github_url):
+    """Normalized owner/repo used to coalesce and cache analyses."""
+    try:
+        return extract_repo_path(github_url).lower()
+    except IndexError:
+        return github_url
+
+
+@asynccontextmanager
+async def worker_single_flight(key):
+    """Hold the shared lock for this repository's analysis, if there is a store.
+
+    Gives up waiting after ANALYSIS_LOCK_WAIT seconds and runs anyway; a lock
+    whose worker died expires after ANALYSIS_LOCK_TTL.
+    """
+    if cache_store is None:
+        yield
+        return
+    name, owner = f"lock:analysis:{key}", f"{os.getpid()}:{uuid.uuid4().hex}"
+    acquired = await run_blocking(cache_store.acquire, name, owner, ANALYSIS_LOCK_TTL)
+    if not acquired:
+        analysis_metrics["cross_worker_waits"] += 1
+        logger.info(f"⏳ Another worker is analyzing {key}, waiting for it")
+        deadline = time.monotonic() + ANALYSIS_LOCK_WAIT
+        while not acquired and time.monotonic() < deadline:
+            await asyncio.sleep(ANALYSIS_LOCK_POLL)
+            acquired = await run_blocking(cache_store.acquire, name, owner, ANALYSIS_LOCK_TTL)
+        if not acquired:
+            logger.warning(f"⚠️ Gave up waiting for the lock on {key}, analyzing anyway")
+    try:
+        yield
+    finally:
+        if acquired:
+            await run_blocking(cache_store.release, name, owner)
+
+
+async def worker_coalesced_analysis(key, github_url, refresh_ahead=0, needed=CACHE_SECTIONS):
+    async with worker_single_flight(key):
+        return await admitted_analysis(github_url, refresh_ahead=refresh_ahead, needed=needed)
+
+
+@app.post("/api/analyze")
+async def analyze_repo(request: RepoRequest, http_request: Request, fields: Optional[str] = None):
+    """Analyze a GitHub repository with AI insights.
+
+    ``fields`` (comma-separated, see FIELD_SECTIONS) narrows the response and
+    skips the upstream calls behind the sections left out.
+    """
+    return await analyze_response(request.github_url, fields, http_request)
+
+
+@app.get("/api/analyze")
+async def analyze_repo_get(github_url: str, http_request: Request, fields: Optional[str] = None):
+    """Same as POST /api/analyze, in a form browsers and CDNs can cache."""
+    return await analyze_response(github_url, fields, http_request)
+
+
+async def analyze_response(github_url, fields, http_request):
+    """The /api/analyze response with an ETag and Cache-Control; 304 when the
+    client's copy (If-None-Match) is still current."""
+    analysis_metrics["analyze_requests"] += 1
+    try:
+        projection = parse_fields(fields)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
+    prewarm_queue.record_request(analysis_key(github_url), github_url)
+    try:
+        result = await analyze_coalesced(github_url, fields=projection)
+    except Overloaded as e:
+        return overloaded_response(e)
+    return cacheable_json(result, http_request)
+
+
+async def analyze_coalesced(github_url, refresh_ahead=0, fields=None):
+    """Run (or join the already running) analysis for this repository,
+    projected to ``fields``.
+
+    A full analysis in flight serves any projection; a narrower one is
+    shared only by requests needing the same sections. Raises Overloaded
+    when admission control turned the analysis away.
+    """
+    key = analysis_key(github_url)
+    needed = needed_sections(fields)
+    flight = key if needed == CACHE_SECTIONS else f"{key}|{','.join(needed)}"
+
+    task = inflight_analyses.get(key) or inflight_analyses.get(flight)
+    if task is None:
+        task = asyncio.ensure_future(
+            worker_coalesced_analysis(key, github_url, refresh_ahead=refresh_ahead, needed=needed)
+        )
+        inflight_analyses[flight] = task
+        task.add_done_callback(
+            lambda done: inflight_analyses.pop(flight, None) if inflight_analyses.get(flight) is done else None
+        )
+    else:
+        analysis_metrics["coalesced_requests"] += 1
+        logger.info(f"🔗 Joining in-flight analysis for {key}")
+
+    # Shielded so one client disconnecting doesn't cancel the analysis for the rest.
+    return project_analysis(await asyncio.shield(task), fields)
+
+
+async def admitted_analysis(github_url, refresh_ahead=0, needed=CACHE_SECTIONS):
+    """run_analysis behind admission control.
+
+    At capacity, a cached analysis (even an expired one) is served straight
+    away; otherwise the request queues for a slot and, having waited, skips
+    the AI call to free the slot sooner.
+    """
+    waited = False
+    if not admission.try_acquire():
+        cached = await cached_analysis_events(github_url)
+        if cached:
+            return collect_analysis(cached)
+        await admission.acquire()
+        waited = True
+    try:
+        return await run_analysis(github_url, refresh_ahead=refresh_ahead, skip_ai=waited, needed=needed)
+    finally:
+        admission.release()
+
+
+async def run_analysis(github_url, refresh_ahead=0, skip_ai=False, needed=CACHE_SECTIONS):
+    """Run the analysis pipeline and collect it into one response."""
+    return collect_analysis([
+        item async for item in stream_analysis(github_url, refresh_ahead=refresh_ahead, skip_ai=skip_ai,
+                                               needed=needed)
+    ])
+
+
+def collect_analysis(events):
+    """Turn a list of stream_analysis events into the /api/analyze response."""
+    collected = {}
+    for event, data in events:
+        if event == "error":
+            return data
+        collected[event] = data
+
+    done = collected.pop("done")
+    return {
+        "status": done["status"],
+        **{section: collected[section] for section in RESPONSE_SECTIONS if section in collected},
+        "has_ai_analysis": done["has_ai_analysis"],
+        "debug_info": done["debug_info"],
+    }
+
+
+def load_cached_analysis(repo_path):
+    """``(head, sections expired or not, fresh sections)`` at the stored
+    head, or None without one. Blocking: run it with run_blocking."""
+    head = analysis_cache.get_head(repo_path)
+    if not head:
+        return None
+    sections = analysis_cache.get_sections(repo_path, head[0], include_expired=True)
+    return head, sections, analysis_cache.get_sections(repo_path, head[0])
+
+
+async def cached_analysis_events(github_url):
+    """The last cached analysis as stream_analysis events, without any
+    upstream request, or None if it isn't fully cached. Expired sections are
+    used too; debug_info lists them under ``stale_sections``."""
+    try:
+        repo_path = extract_repo_path(github_url)
+    except IndexError:
+        return None
+    cached = await run_blocking(load_cached_analysis, repo_path)
+    if not cached:
+        return None
+    head, sections, fresh = cached
+    if not all(section in sections for section in ("repo_info", "tree", "community")):
+        return None
+    admission.count("served_stale")
+    logger.warning(f"🚦 Server busy, serving cached analysis of {repo_path}")
+    ai_analysis = sections.get("ai_analysis")
+    return [
+        ("repo_info", sections["repo_info"]),
+        ("tech_analysis", build_tech_analysis(sections["tree"])),
+        ("community_data", build_community_data(sections["community"])),
+        ("learning_metrics", build_learning_metrics(sections["tree"], sections["community"])),
+        ("ai_analysis", ai_analysis or AI_SKIPPED_ANALYSIS),
+        ("done", {
+            "status": "success",
+            "has_ai_analysis": ai_analysis is not None,
+            "debug_info": build_debug_info(sections, {
+                "head_sha": head[0],
+                "cached_sections": [section for section in CACHE_SECTIONS if section in sections],
+                "stale_sections": [section for section in CACHE_SECTIONS if section in sections and section not in fresh],
+                "degraded": "cached",
+            }),
+        }),
+    ]
+
+
+def overloaded_response(error):
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(error.retry_after)},
+        content={
+            "status": "error",
+            "message": "The server is busy analyzing other repositories. Please try again shortly.",
+            "debug": {"overloaded": True, "retry_after": error.retry_after},
+        },
+    )
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """Streaming response that holds an admission slot until it's finished,
+    even if the client disconnects before the body starts."""
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            admission.release()
+
+
+@app.post("/api/analyze/stream")
+async def analyze_repo_stream(request: RepoRequest):
+    """Stream the analysis as NDJSON, one ``{"event", "data"}`` line per section."""
+    analysis_metrics["stream_requests"] += 1
+
+    waited = False
+    if not admission.try_acquire():
+        cached = await cached_analysis_events(request.github_url)
+        if cached:
+            return StreamingResponse(
+                (json.dumps({"event": event, "data": data}, default=str) + "\n" for event, data in cached),
+                media_type="application/x-ndjson",
+            )
+        try:
+            await admission.acquire()
+        except Overloaded as e:
+            return overloaded_response(e)
+        waited = True
+
+    async def ndjson_lines():
+        async for event, data in stream_analysis(request.github_url, skip_ai=waited):
+            yield json.dumps({"event": event, "data": data}, default=str) + "\n"
+
+    return AdmittedStreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+def analyze_with_openrouter(repo_name, description, languages, file_structure, primary_language, file_count, on_field=None):
+    """Analyze repository using OpenRouter API with DeepSeek model.
+
+    The completion is streamed; ``on_field(key, value)`` is called for each
+    top-level field of the JSON answer as soon as it arrives.
+    """
     try:
         # Create prompt
         prompt = f"""
@@ -322,100 +1133,47 @@ def analyze_with_openrouter(repo_name, description, languages, file_structure, p
         Keep it concise and educational.
         """
 
-        print(f"📝 Sending prompt to OpenRouter...")
-        
-        # OpenRouter API endpoint
-        url = "https://openrouter.ai/api/v1/chat/completions"
-        
-        headers = {
-            "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        # Request payload - using DeepSeek Free model
-        payload = {
-            "model": "deepseek/deepseek-chat",  # Free model
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "max_tokens": 500,
-            "temperature": 0.7
-        }
-        
-        # Make API call
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
-        
-        if response.status_code != 200:
-            error_msg = f"API returned {response.status_code}: {response.text}"
-            print(f"❌ OpenRouter API error: {error_msg}")
-            raise Exception(error_msg)
-        
-        result = response.json()
-        
-        # Extract content
-        content = result['choices'][0]['message']['content']
-        print(f"📥 Received response from OpenRouter: {content[:100]}...")
+        temperature = 0.7
+        inputs = prompt_inputs(
+            repo_name, description, languages, file_structure, file_count,
+            openrouter_client.model, temperature,
+        )
+        cached = llm_cache.get(inputs)
+        if cached is not None:
+            logger.info("⚡ Using cached OpenRouter response")
+            if on_field:
+                for key, value in cached.items():
+                    on_field(key, value)
+            return cached
 
-        try:
-            # Try to find and parse JSON
-            json_start = content.find('{')
-            json_end = content.rfind('}') + 1
-            if json_start != -1 and json_end != 0:
-                result_json = json.loads(content[json_start:json_end])
-                print("✅ Successfully parsed OpenRouter JSON response")
-                return result_json
-            else:
-                # If no JSON, return the content as summary
-                print("⚠️ No JSON found in response, using raw content")
-                return {
-                    "ai_summary": content,
-                    "tech_insights": [],
-                    "learning_path": [],
-                    "patterns": []
-                }
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON parse error: {e}")
-            return {
-                "ai_summary": content,
-                "tech_insights": [],
-                "learning_path": [],
-                "patterns": []
-            }
+        logger.info(f"📝 Sending prompt to OpenRouter...")
+        result = openrouter_client.complete_json(
+            [{"role": "user", "content": prompt}],
+            on_field=on_field,
+            max_tokens=500,
+            temperature=temperature,
+            usage={"include": True},  # OpenRouter reports token usage in the last chunk
+        )
+        llm_cache.put(inputs, result)
+        return result
 
     except Exception as e:
-        print(f"❌ OpenRouter API call failed: {e}")
+        logger.error(f"❌ OpenRouter API call failed: {e}")
         raise
 
-def calculate_enhanced_complexity(languages, files, ai_analysis=None):
-    """More sophisticated complexity calculation."""
-    # Base factors
-    lang_diversity = len(languages)
-    file_count = len(files)
-    
-    # Language complexity weights (you can expand this)
-    complexity_weights = {
-        "C++": 2.0, "Rust": 1.8, "Go": 1.5, 
-        "Python": 1.0, "JavaScript": 1.0, "TypeScript": 1.2,
-        "Java": 1.3, "Kotlin": 1.3, "Swift": 1.3,
-        "HTML": 0.5, "CSS": 0.5, "Markdown": 0.1
-    }
-    
-    # Weighted language complexity
-    lang_complexity = 0
-    for lang in languages:
-        lang_complexity += complexity_weights.get(lang, 1.0)
-    
-    # File complexity (more files = more complex, but diminishing returns)
-    file_factor = min(5, file_count / 50)
-    
-    # Combine factors
-    score = (lang_diversity * 0.5) + (lang_complexity * 0.3) + (file_factor * 2)
-    
-    # Cap at 10 and round
-    return round(min(10, score), 1)
+
+def calculate_content_complexity(score, content):
+    """Complexity from the scanned contents: the tree-based ``score`` plus size
+    and internal coupling, both with diminishing returns."""
+    # +2 at most: 1M+ lines of code
+    size_factor = min(2, math.log10(content["total_lines"] + 1) / 3)
+    # +1.5 at most: five or more internal imports per source file
+    coupling_factor = min(1.5, content["internal_imports"] / max(1, content["source_files"]) * 0.3)
+    return round(min(10, score + size_factor + coupling_factor), 1)
+
+def get_primary_language(languages):
+    """Language with the most bytes, or "Unknown" for an empty map."""
+    return max(languages, key=languages.get) if languages else "Unknown"
 
 def get_complexity_level(score):
     """Convert numeric score to descriptive level."""
@@ -434,37 +1192,18 @@ def extract_repo_path(url: str) -> str:
     parts = url.rstrip('/').split('/')
     return f"{parts[-2]}/{parts[-1]}"
 
-def list_files_with_limits(contents, repo, path="", max_depth=3, max_files=100, current_depth=0):
-    """Recursively list files with depth and count limits."""
-    files = []
-    if current_depth >= max_depth:
-        return files
-    
-    for content in contents:
-        if len(files) >= max_files:
-            break
-        
-        if content.type == "dir":
-            try:
-                if current_depth < max_depth - 1 and len(files) < max_files:
-                    sub_files = list_files_with_limits(
-                        repo.get_contents(content.path),
-                        repo,
-                        f"{path}/{content.name}",
-                        max_depth,
-                        max_files - len(files),
-                        current_depth + 1
-                    )
-                    files.extend(sub_files)
-            except Exception:
-                continue
-        else:
-            files.append(f"{path}/{content.name}")
-    
-    return files
+def list_files_with_limits(tree_index, max_depth=3, max_files=100):
+    """List files from the tree index with depth and count limits."""
+    return tree_index.list_files(max_depth=max_depth, max_files=max_files)
 
 def recommend_starting_point(files, primary_lang):
-    """Suggests a starting file based on common patterns."""
+    """Suggests a starting file based on common patterns.
+
+    ``files`` is a PathIndex or a list of paths. A candidate matches a file at
+    that exact path, or else the shallowest file whose path ends with it
+    (so "main.py" finds "app/main.py" but never "old_main.py"). The result
+    has no leading slash.
+    """
     look_for = {
         "Python": ["README.md", "requirements.txt", "setup.py", "app.py", "main.py"],
         "JavaScript": ["README.md", "package.json", "src/index.js", "src/App.js"],
@@ -473,20 +1212,482 @@ def recommend_starting_point(files, primary_lang):
         "Go": ["README.md", "go.mod", "main.go"],
         "Rust": ["README.md", "Cargo.toml", "src/main.rs"],
     }
+    index = files if isinstance(files, PathIndex) else PathIndex((f, None) for f in files)
     for filename in look_for.get(primary_lang, ["README.md"]):
-        if any(filename in f for f in files):
+        node = index.find(filename)
+        if node is not None and node.is_file:
             return filename
-    return files[0] if files else "README.md"
+        matches = [
+            match for match in index.by_basename(filename.rsplit("/", 1)[-1])
+            if match.path.endswith(f"/{filename}")
+        ]
+        if matches:
+            return min(matches, key=lambda match: match.depth).path
+    return next(index.iter_files(), "README.md")
+
+
+# ========== BATCH ANALYSIS ==========
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_REPOS = int(os.getenv("BATCH_MAX_REPOS", "200"))
+
+
+REPO_PATH_PATTERN = re.compile(r"^[\w.-]+/[\w.-]+$")
+
+
+class BatchRequest(BaseModel):
+    github_urls: List[str] = []
+    org: Optional[str] = None
+    max_repos: int = BATCH_MAX_REPOS
+    include_analysis: bool = True
+
+
+async def stream_batch(request):
+    """Yield batch events: one GraphQL "summary" per repo up front, then one
+    "analysis" per repo as each full analysis finishes, then "done"."""
+    if not github_scheduler:
+        yield {"event": "error", "data": {"status": "error", "message": "GitHub token not configured."}}
+        return
+
+    max_repos = min(request.max_repos, BATCH_MAX_REPOS)
+    invalid = []  # URLs that don't name an owner/repo
+    try:
+        token = (await run_blocking(github_scheduler.pick)).token
+        if request.org:
+            logger.info(f"🏢 Listing up to {max_repos} repos of {request.org}...")
+            summaries = await run_blocking(list_org_repos, token, request.org, max_repos)
+            repos = {analysis_key(s["url"]): (s["url"], s) for s in summaries}
+        else:
+            urls = {}
+            for url in request.github_urls:
+                urls.setdefault(analysis_key(url), url)
+            urls = dict(list(urls.items())[:max_repos])
+            invalid = [key for key in urls if not REPO_PATH_PATTERN.match(key)]
+            valid = [key for key in urls if key not in invalid]
+            logger.info(f"📦 Fetching summaries for {len(valid)} repos via GraphQL...")
+            summaries = await run_blocking(fetch_repo_summaries, token, valid) if valid else {}
+            repos = {key: (url, summaries.get(key)) for key, url in urls.items()}
+    except Exception as e:
+        logger.error(f"❌ Batch setup failed: {e}")
+        yield {"event": "error", "data": {"status": "error", "message": f"Batch analysis failed: {str(e)}"}}
+        return
+
+    for key, (url, summary) in repos.items():
+        message = "Invalid GitHub repository URL" if key in invalid else "Repository not found"
+        yield {
+            "event": "summary",
+            "repo": key,
+            "data": summary or {"status": "error", "message": message},
+        }
+
+    found = {key: url for key, (url, summary) in repos.items() if summary}
+    succeeded = 0
+    if request.include_analysis and found:
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def analyze_one(key, url):
+            async with semaphore:
+                try:
+                    return key, await analyze_coalesced(url)
+                except Overloaded as e:
+                    return key, {"status": "error", "message": str(e), "debug": {"overloaded": True}}
+
+        tasks = [asyncio.ensure_future(analyze_one(key, url)) for key, url in found.items()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                key, result = await next_done
+                succeeded += result.get("status") == "success"
+                yield {"event": "analysis", "repo": key, "data": result}
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    yield {
+        "event": "done",
+        "data": {
+            "repos": len(repos),
+            "found": len(found),
+            "analyzed": succeeded,
+            "failed": len(found) - succeeded if request.include_analysis else 0,
+        },
+    }
+
+
+@app.post("/api/analyze/batch")
+async def analyze_batch(request: BatchRequest):
+    """Analyze a list of repositories or a whole org, streaming NDJSON lines."""
+    if request.max_repos < 1:
+        raise HTTPException(status_code=400, detail="max_repos must be at least 1")
+    analysis_metrics["batch_requests"] += 1
+
+    async def ndjson_lines():
+        async for item in stream_batch(request):
+            yield json.dumps(item, default=str) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+# ========== LEADERBOARD ==========
+LEADERBOARD_METRICS = ("complexity_score", "community_score")
+
+
+@app.get("/api/leaderboard")
+async def leaderboard(by: str = "complexity_score", limit: int = 50):
+    """Rank every cached repository by a learning metric, scored in one pass."""
+    if by not in LEADERBOARD_METRICS:
+        raise HTTPException(status_code=400, detail=f"'by' must be one of: {', '.join(LEADERBOARD_METRICS)}")
+    from scoring import rank, score_batch
+
+    cached = await run_blocking(analysis_cache.latest_sections, ("repo_info", "tree", "community"))
+    repos = [(path, sections) for path, sections in cached.items() if "tree" in sections and "community" in sections]
+    scores = score_batch([scoring_record(sections["tree"], sections["community"]) for _, sections in repos])
+    return {
+        "by": by,
+        "total": len(repos),
+        "repos": [
+            {
+                "repo": (repos[i][1].get("repo_info") or {}).get("full_name", repos[i][0]),
+                "complexity_score": float(scores["complexity_score"][i]),
+                "complexity_level": str(scores["complexity_level"][i]),
+                "community_score": float(scores["community_score"][i]),
+                "primary_language": scores["primary_language"][i],
+            }
+            for i in rank(scores[by])[:max(0, limit)]
+        ],
+    }
+
+
+# ========== CHAT ==========
+# Questions about a repository are answered from the chunks of its files that
+# best match them (BM25 over an on-disk index of a clone), so the prompt stays
+# the same size however large the repository is. Needs git.
+CHAT_TOP_K = int(os.getenv("CHAT_TOP_K", "6"))
+CHAT_CONTEXT_CHARS = int(os.getenv("CHAT_CONTEXT_CHARS", "12000"))
+CHAT_INDEX_TIMEOUT = float(os.getenv("CHAT_INDEX_TIMEOUT", "180"))
+# Clones and index builds can take minutes, so they get their own small pool
+# rather than holding upstream workers the analysis fan-out needs.
+CHAT_INDEX_WORKERS = int(os.getenv("CHAT_INDEX_WORKERS", "2"))
+CHAT_HISTORY_MESSAGES = 6
+CHAT_MESSAGE_CHARS = 2000
+CHAT_MAX_TOKENS = 800
+
+CHAT_ENABLED = shutil.which("git") is not None
+
+chat_clones = clone_cache or (CloneCache() if CHAT_ENABLED else None)
+chat_index_executor = ThreadPoolExecutor(max_workers=CHAT_INDEX_WORKERS, thread_name_prefix="chat-index")
+_chat_indexes = None
+
+
+def chat_indexes():
+    """The shared ChatIndexStore, created on first use (chat_index loads numpy)."""
+    global _chat_indexes
+    if _chat_indexes is None:
+        from chat_index import ChatIndexStore
+
+        _chat_indexes = ChatIndexStore()
+    return _chat_indexes
+
+
+class ChatMessage(BaseModel):
+    role: str
+    content: str
+
+
+class ChatRequest(BaseModel):
+    messages: List[ChatMessage]
+    github_url: Optional[str] = None
+    stream: bool = False
+
+
+def retrieve_chunks(repo_path, sha, query):
+    """Top chunks for ``query`` from the repository's index at ``sha``."""
+    with chat_clones.checked_out(repo_path, sha) as checkout:
+        index = chat_indexes().get(repo_path, checkout)
+    return index.search(query, CHAT_TOP_K), index.stats()
+
+
+async def chat_context(github_url, query):
+    """``(chunks, index stats)`` for a question; no chunks if retrieval fails."""
+    if not CHAT_ENABLED:
+        return [], None
+    try:
+        repo_path = extract_repo_path(github_url)
+        head_sha = await resolve_head_sha(repo_path)
+        with span("chat_retrieval"):
+            return await run_blocking(retrieve_chunks, repo_path, head_sha, query,
+                                      timeout=CHAT_INDEX_TIMEOUT, executor=chat_index_executor)
+    except Exception as e:
+        logger.warning(f"⚠️ Chat retrieval failed, answering without code context: {e}")
+        return [], None
+
+
+def build_chat_messages(request, chunks):
+    """System prompt with the repository summary and retrieved excerpts, then
+    the most recent turns of the conversation."""
+    prompt = [
+        "You are CodeSensei, an AI mentor for codebases. Answer questions about the "
+        "repository using the excerpts below and cite the file paths you rely on. "
+        "If the excerpts don't cover the question, say so."
+    ]
+    if request.github_url:
+        repo_path = extract_repo_path(request.github_url)
+        head = analysis_cache.get_head(repo_path)
+        cached = analysis_cache.get_sections(repo_path, head[0], include_expired=True) if head else {}
+        repo_info = cached.get("repo_info") or {"full_name": repo_path}
+        prompt.append(f"Repository: {repo_info['full_name']} - {repo_info.get('description') or ''}")
+        if cached.get("ai_analysis"):
+            prompt.append(f"Summary: {cached['ai_analysis'].get('ai_summary', '')}")
+
+    budget, used = CHAT_CONTEXT_CHARS, []
+    for chunk in chunks:
+        excerpt = f"--- {chunk['path']} (lines {chunk['start_line']}-{chunk['end_line']}) ---\n{chunk['text']}"
+        if len(excerpt) > budget:
+            break
+        prompt.append(excerpt)
+        budget -= len(excerpt)
+        used.append(chunk)
+
+    history = [
+        {"role": message.role, "content": message.content[-CHAT_MESSAGE_CHARS:]}
+        for message in request.messages if message.role in ("user", "assistant")
+    ][-CHAT_HISTORY_MESSAGES:]
+    sources = [{key: chunk[key] for key in ("path", "start_line", "end_line", "score")} for chunk in used]
+    return [{"role": "system", "content": "\n\n".join(prompt)}, *history], sources
+
+
+async def chat_events(messages, sources, debug_info):
+    """Stream the answer: "sources", then a "delta" per piece of text, then
+    "done" (or "error")."""
+    yield "sources", sources
+    loop = asyncio.get_running_loop()
+    deltas = asyncio.Queue()
+
+    def produce():
+        with span("chat_completion"):
+            for delta in openrouter_client.stream(messages, max_tokens=CHAT_MAX_TOKENS):
+                loop.call_soon_threadsafe(deltas.put_nowait, delta)
+
+    task = asyncio.ensure_future(run_blocking(produce, timeout=LLM_CALL_TIMEOUT))
+    try:
+        while not task.done() or not deltas.empty():
+            next_delta = asyncio.ensure_future(deltas.get())
+            await asyncio.wait({task, next_delta}, return_when=asyncio.FIRST_COMPLETED)
+            if next_delta.done():
+                yield "delta", next_delta.result()
+            else:
+                next_delta.cancel()
+        task.result()
+        yield "done", {"status": "success", "debug_info": debug_info}
+    except Exception as e:
+        logger.error(f"❌ Chat completion failed: {e}")
+        yield "error", {"status": "error", "message": f"Chat failed: {str(e)[:100]}"}
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+@app.post("/api/chat")
+async def chat(request: Request):
+    """Answer the last user message about ``github_url``'s code.
+
+    Takes ``{"messages": [{"role", "content"}], "github_url"?, "stream"?}``
+    and returns ``{"response", "sources"}``, or with ``stream`` NDJSON
+    events. The body is read as JSON whatever its content type. Answering
+    takes an admission slot, like an analysis.
+    """
+    try:
+        payload = ChatRequest(**json.loads(await request.body() or b"{}"))
+    except (TypeError, ValueError) as e:  # TypeError: the body isn't a JSON object
+        raise HTTPException(status_code=400, detail=f"Invalid chat request: {e}")
+    questions = [message.content for message in payload.messages if message.role == "user"]
+    if not questions:
+        raise HTTPException(status_code=400, detail="No user message to answer")
+    if not openrouter_client:
+        return {"status": "error", "response": "AI chat is not enabled.", "sources": []}
+
+    try:
+        await admission.acquire()
+    except Overloaded as e:
+        return overloaded_response(e)
+    streaming = False
+    try:
+        chunks, index_stats = await chat_context(payload.github_url, " ".join(questions[-2:])) \
+            if payload.github_url else ([], None)
+        messages, sources = await run_blocking(build_chat_messages, payload, chunks)  # reads the cache
+        debug_info = {"index": index_stats, "prompt_chars": sum(len(m["content"]) for m in messages)}
+
+        if payload.stream:
+            async def ndjson_lines():
+                async for event, data in chat_events(messages, sources, debug_info):
+                    yield json.dumps({"event": event, "data": data}, default=str) + "\n"
+
+            # The response releases the slot once the answer has streamed.
+            streaming = True
+            return AdmittedStreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+        try:
+            with span("chat_completion"):
+                answer = await run_blocking(
+                    openrouter_client.complete, messages, max_tokens=CHAT_MAX_TOKENS, timeout=LLM_CALL_TIMEOUT
+                )
+        except Exception as e:
+            logger.error(f"❌ Chat completion failed: {e}")
+            message = f"Chat failed: {str(e)[:100]}"
+            return {"status": "error", "message": message, "response": message, "sources": sources}
+        return {"status": "success", "response": answer, "sources": sources, "debug_info": debug_info}
+    finally:
+        if not streaming:
+            admission.release()
+
+
+# ========== BACKGROUND PRE-WARMING ==========
+# Re-analyzes PREWARM_REPOS and the most-requested repos on a schedule so
+# /api/analyze finds them in the cache. Sections that would expire before the
+# next cycle are refreshed early.
+prewarm_queue = PrewarmQueue(
+    lambda github_url: analyze_coalesced(github_url, refresh_ahead=PREWARM_INTERVAL),
+    analysis_key,
+    hot_repos_from_env(),
+)
+
+
+def require_admin(x_admin_token):
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.get("/api/admin/prewarm")
+async def prewarm_status(x_admin_token: str = Header(None)):
+    """Pre-warm queue depth, running jobs and recent job timings."""
+    require_admin(x_admin_token)
+    return prewarm_queue.snapshot()
+
+
+@app.post("/api/admin/prewarm")
+async def prewarm_repo(request: RepoRequest, x_admin_token: str = Header(None)):
+    """Queue a repository for background analysis."""
+    require_admin(x_admin_token)
+    queued = prewarm_queue.enqueue(analysis_key(request.github_url), request.github_url, PRIORITY_MANUAL)
+    return {"status": "queued" if queued else "already_queued", "queue_depth": prewarm_queue.snapshot()["queue_depth"]}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: stage timings, upstream calls, cache lookups, LLM usage."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+# ========== WEBHOOKS ==========
+# GitHub webhooks (push, issues, issue_comment, member) keep cached analyses
+# current without polling: each event patches or drops only the sections it
+# affects, so the next /api/analyze is served from the cache. Deliveries are
+# verified against GITHUB_WEBHOOK_SECRET.
+webhook_metrics = {"push": 0, "issues": 0, "issue_comment": 0, "member": 0, "ignored": 0, "rejected": 0}
+
+
+def apply_push(repo_path, payload):
+    """Move the cache to the pushed head, patching the tree from the push."""
+    before, after = payload.get("before"), payload["after"]
+    previous = analysis_cache.get_sections(repo_path, before, include_expired=True) if before else {}
+    changes = push_changes(payload)
+    patched = []
+    if changes is not None and "tree" in previous and "tree_index" in previous and clone_cache is None:
+        tree = patch_tree_section((before, previous["tree"], previous["tree_index"]), after, changes)
+        carried = [section for section in COMMIT_INDEPENDENT_SECTIONS if section in previous]
+        if not tree["diff"]["significant"] and "ai_analysis" in previous:
+            carried.append("ai_analysis")
+        analysis_cache.carry_over(repo_path, before, after, carried)
+        analysis_cache.put_sections(repo_path, after, tree_cache_sections(tree))
+        patched = ["tree", *carried]
+    # Without a patched tree the next analysis starts from ``before`` and
+    # fetches only the diff, as for any new commit.
+    analysis_cache.set_head(repo_path, after, None, pushed=True)
+    return {"head": after, "patched": patched, "invalidated": [] if patched else ["tree"]}
+
+
+def apply_issue_event(repo_path, event, action, issue):
+    """Update the cached active issues (community section) at the head SHA."""
+    head = analysis_cache.get_head(repo_path)
+    community = analysis_cache.get_sections(repo_path, head[0], include_expired=True).get("community") if head else None
+    if community is None:
+        return {"patched": [], "invalidated": []}
+    active = update_active_issues(community["active_issues"], event, action, issue)
+    if active is None:
+        analysis_cache.invalidate(repo_path, ["community"])
+        return {"patched": [], "invalidated": ["community"]}
+    if active != community["active_issues"]:
+        analysis_cache.update_section(repo_path, head[0], "community", {**community, "active_issues": active})
+    return {"patched": ["community"], "invalidated": []}
+
+
+def apply_webhook(event, payload):
+    repo_path = payload["repository"]["full_name"]
+    if event == "push":
+        if not is_default_branch_push(payload):
+            return None
+        return apply_push(repo_path, payload)
+    if event in ("issues", "issue_comment"):
+        if payload["issue"].get("pull_request"):
+            return None
+        return apply_issue_event(repo_path, event, payload.get("action", ""), payload["issue"])
+    if event == "member":
+        # Collaborator changes may change the contributor list.
+        analysis_cache.invalidate(repo_path, ["community"])
+        return {"patched": [], "invalidated": ["community"]}
+    return None
+
+
+@app.post("/api/webhooks/github")
+async def github_webhook(request: Request):
+    """Receive a GitHub webhook delivery and update the cache for its repository."""
+    if not GITHUB_WEBHOOK_SECRET:
+        return JSONResponse(status_code=503, content={
+            "status": "error", "message": "Webhooks are not configured (GITHUB_WEBHOOK_SECRET)",
+        })
+    body = await request.body()
+    if not verify_signature(GITHUB_WEBHOOK_SECRET, body, request.headers.get("X-Hub-Signature-256")):
+        webhook_metrics["rejected"] += 1
+        logger.warning("🔒 Rejected webhook with a bad signature")
+        return JSONResponse(status_code=401, content={"status": "error", "message": "Invalid signature"})
+
+    event = request.headers.get("X-GitHub-Event", "")
+    try:
+        payload = json.loads(body)
+        result = None if event == "ping" else await run_blocking(apply_webhook, event, payload)
+    except (ValueError, KeyError, TypeError) as e:
+        return JSONResponse(status_code=400, content={
+            "status": "error", "message": "Malformed webhook payload", "debug": {"error": str(e)},
+        })
+    if result is None:
+        webhook_metrics["ignored"] += 1
+        return {"status": "ignored", "event": event}
+    webhook_metrics[event] += 1
+    repo_path = payload["repository"]["full_name"]
+    logger.info(f"🪝 {event} webhook for {repo_path}: patched {result['patched'] or 'nothing'}, "
+                f"invalidated {result['invalidated'] or 'nothing'}")
+    return {"status": "success", "event": event, "repo": repo_path, **result}
 
 
 @app.get("/api/health")
 async def health_check():
+    try:
+        github_budget = await run_blocking(github_scheduler.snapshot, timeout=5)
+    except Exception as e:
+        github_budget = {"error": str(e)}
     return {
         "status": "healthy",
         "services": {
-            "github_api": "✅" if GITHUB_TOKEN else "❌",
+            "github_api": "✅" if github_scheduler else "❌",
             "openrouter_api": "✅" if OPENROUTER_API_KEY else "❌"
-        }
+        },
+        "metrics": {
+            **analysis_metrics,
+            "inflight_analyses": len(inflight_analyses),
+            "admission": admission.snapshot(),
+            "llm_cache": llm_cache.snapshot(),
+            "cache_store": cache_store.describe() if cache_store else "memory",
+            "webhooks": webhook_metrics,
+        },
+        "github_budget": github_budget,
     }
 
 @app.get("/")
@@ -501,38 +1702,54 @@ async def root():
 
 # ========== 4. DEPLOYMENT ==========
 if __name__ == "__main__":
+    if "--startup-report" in sys.argv:
+        from startup_report import print_startup_report
+
+        sys.exit(print_startup_report())
+
     port_str = os.getenv("PORT", "").strip()
     
     if port_str and port_str.isdigit():
         port = int(port_str)
-        print(f"✅ Render provided PORT: {port}")
+        logger.info(f"✅ Render provided PORT: {port}")
     else:
         port = 8000
-        print(f"⚠️  Using default PORT: {port}")
+        logger.warning(f"⚠️  Using default PORT: {port}")
     
     is_render = os.getenv("RENDER") is not None
     
-    print(f"\n🚀 Starting CodeSensei Backend")
-    print(f"   Environment: {'Production (Render)' if is_render else 'Development'}")
-    print(f"   Port: {port}")
-    print(f"   GitHub Token: {'✅ Loaded' if GITHUB_TOKEN else '❌ Missing'}")
-    print(f"   OpenRouter API Key: {'✅ Loaded' if OPENROUTER_API_KEY else '❌ Missing'}")
-    print(f"   AI Model: DeepSeek Chat (Free via OpenRouter)")
+    logger.info(f"🚀 Starting CodeSensei Backend")
+    logger.info(f"   Environment: {'Production (Render)' if is_render else 'Development'}")
+    logger.info(f"   Port: {port}")
+    logger.info(f"   GitHub Token: {'✅ Loaded' if GITHUB_TOKEN else '❌ Missing'}")
+    logger.info(f"   OpenRouter API Key: {'✅ Loaded' if OPENROUTER_API_KEY else '❌ Missing'}")
+    logger.info(f"   AI Model: DeepSeek Chat (Free via OpenRouter)")
     
+    # WEB_CONCURRENCY worker processes; with more than one they share a cache
+    # store, defaulting to an SQLite file when none is configured.
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1 and cache_store is None:
+        os.environ["CACHE_DB"] = os.path.join(tempfile.gettempdir(), "codesensei-cache.db")
+        logger.info(f"   Shared cache: {os.environ['CACHE_DB']}")
+    logger.info(f"   Workers: {workers}")
+    # Workers import the app themselves, so it has to be passed by name.
+    target = "main:app" if workers > 1 else app
+
     if is_render:
-        uvicorn.run(app, host="0.0.0.0", port=port)
+        uvicorn.run(target, host="0.0.0.0", port=port, workers=workers)
     else:
         cert_path = Path(__file__).parent / "cert.pem"
         key_path = Path(__file__).parent / "key.pem"
         
         if cert_path.exists() and key_path.exists():
             uvicorn.run(
-                app,
+                target,
                 host="0.0.0.0",
                 port=port,
+                workers=workers,
                 ssl_keyfile=str(key_path),
                 ssl_certfile=str(cert_path)
             )
         else:
-            print("⚠️  SSL certs not found. Starting HTTP...")
-            uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+            logger.warning("⚠️  SSL certs not found. Starting HTTP...")
+            uvicorn.run(target, host="0.0.0.0", port=port, workers=workers)
@@ -0,0 +1,240 @@
+# backend/path_index.py
+from array import array
+from bisect import bisect_left, bisect_right
+from fnmatch import fnmatchcase
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+ROOT = 0
+
+
+class PathNode:
+    """Lightweight view of one node (file or directory) of a PathIndex."""
+
+    __slots__ = ("index", "id")
+
+    def __init__(self, index: "PathIndex", node_id: int):
+        self.index = index
+        self.id = node_id
+
+    def __repr__(self):
+        return f"PathNode({self.path!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, PathNode) and other.index is self.index and other.id == self.id
+
+    def __hash__(self):
+        return hash((id(self.index), self.id))
+
+    @property
+    def name(self) -> str:
+        return self.index.segment(self.index.name[self.id])
+
+    @property
+    def path(self) -> str:
+        return self.index.path_of(self.id)
+
+    @property
+    def is_file(self) -> bool:
+        return bool(self.index.is_file[self.id])
+
+    @property
+    def size(self) -> int:
+        """File size, or the total size of the files below a directory."""
+        index = self.index
+        return index.size_prefix[index.end[self.id]] - index.size_prefix[self.id]
+
+    @property
+    def file_count(self) -> int:
+        index = self.index
+        return index.file_prefix[index.end[self.id]] - index.file_prefix[self.id]
+
+    @property
+    def depth(self) -> int:
+        """Number of parent directories (0 for top-level entries)."""
+        depth, node = 0, self.index.parent[self.id]
+        while node != ROOT:
+            depth, node = depth + 1, self.index.parent[node]
+        return depth
+
+    def children(self) -> List["PathNode"]:
+        index = self.index
+        node, end, children = self.id + 1, index.end[self.id], []
+        while node < end:
+            children.append(PathNode(index, node))
+            node = index.end[node]  # skip the child's own subtree
+        return children
+
+
+class PathIndex:
+    """Compact index of a repository's file paths.
+
+    Path segments are interned once, sorted and packed into one string, and
+    nodes live in flat arrays (parent, segment, subtree end, running file and
+    size totals) laid out in pre-order, so every directory's subtree is one
+    contiguous range. Basename lookups are a bisection, path lookups only
+    visit siblings along the path, per-directory aggregates are O(1), and a
+    node costs ~35 bytes instead of a full path string per file.
+    """
+
+    __slots__ = ("segment_data", "segment_offsets", "parent", "name", "is_file", "end",
+                 "file_prefix", "size_prefix", "files_by_name", "names_sorted")
+
+    def __init__(self, files: Iterable[Tuple[str, Optional[int]]]):
+        """Build from ``(path, size)`` pairs; paths use "/" and may start with one."""
+        split = sorted((path.strip("/").split("/"), size or 0) for path, size in files)
+        segments = sorted({segment for parts, _ in split for segment in parts})
+        ids = {segment: i for i, segment in enumerate(segments)}  # build-time only
+        self.segment_data = "".join(segments)
+        self.segment_offsets = array("i", [0])
+        for segment in segments:
+            self.segment_offsets.append(self.segment_offsets[-1] + len(segment))
+
+        self.parent, self.name = array("i", [ROOT]), array("i", [0])
+        self.is_file, sizes = bytearray(b"\0"), array("q", [0])
+        chain_names, chain_ids = [], [ROOT]
+        for parts, size in split:
+            dirs = parts[:-1]
+            common = 0
+            while common < min(len(dirs), len(chain_names)) and chain_names[common] == dirs[common]:
+                common += 1
+            del chain_names[common:], chain_ids[common + 1:]
+            for directory in dirs[common:]:
+                self._append(chain_ids[-1], ids[directory], False)
+                sizes.append(0)
+                chain_names.append(directory)
+                chain_ids.append(len(self.parent) - 1)
+            self._append(chain_ids[-1], ids[parts[-1]], True)
+            sizes.append(size)
+
+        count = len(self.parent)
+        self.end = array("i", range(1, count + 1))
+        for node in range(count - 1, 0, -1):
+            parent = self.parent[node]
+            if self.end[node] > self.end[parent]:
+                self.end[parent] = self.end[node]
+        self.file_prefix, self.size_prefix = array("i", [0]), array("q", [0])
+        for node in range(count):
+            self.file_prefix.append(self.file_prefix[-1] + self.is_file[node])
+            self.size_prefix.append(self.size_prefix[-1] + sizes[node])
+
+        # Files sorted by segment id, for basename lookups by bisection.
+        by_name = sorted((self.name[node], node) for node in range(count) if self.is_file[node])
+        self.names_sorted = array("i", (name for name, _ in by_name))
+        self.files_by_name = array("i", (node for _, node in by_name))
+
+    def _append(self, parent: int, name: int, is_file: bool):
+        self.parent.append(parent)
+        self.name.append(name)
+        self.is_file.append(is_file)
+
+    @classmethod
+    def from_tree_index(cls, tree_index) -> "PathIndex":
+        return cls((entry.path, entry.size) for entry in tree_index.iter_files())
+
+    def __len__(self):
+        """Number of files."""
+        return self.file_prefix[-1]
+
+    @property
+    def root(self) -> PathNode:
+        return PathNode(self, ROOT)
+
+    def segment(self, segment_id: int) -> str:
+        return self.segment_data[self.segment_offsets[segment_id]:self.segment_offsets[segment_id + 1]]
+
+    def _segment_id(self, segment: str) -> Optional[int]:
+        lo, hi = 0, len(self.segment_offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.segment(mid) < segment:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self.segment_offsets) - 1 and self.segment(lo) == segment else None
+
+    def path_of(self, node: int) -> str:
+        parts = []
+        while node != ROOT:
+            parts.append(self.segment(self.name[node]))
+            node = self.parent[node]
+        return "/".join(reversed(parts))
+
+    def iter_files(self) -> Iterator[str]:
+        """Every file path, directories first-visited in path order."""
+        for node in range(len(self.parent)):
+            if self.is_file[node]:
+                yield self.path_of(node)
+
+    # ---------- Lookups ----------
+    def by_basename(self, basename: str) -> List[PathNode]:
+        """Every file called ``basename``, in path order."""
+        name = self._segment_id(basename)
+        if name is None:
+            return []
+        lo = bisect_left(self.names_sorted, name)
+        hi = bisect_right(self.names_sorted, name)
+        return [PathNode(self, node) for node in self.files_by_name[lo:hi]]
+
+    def find(self, path: str) -> Optional[PathNode]:
+        """The file or directory at ``path`` ("" or "/" is the root)."""
+        node = ROOT
+        for segment in filter(None, path.strip("/").split("/")):
+            name = self._segment_id(segment)
+            if name is None:
+                return None
+            child, end = node + 1, self.end[node]
+            while child < end and self.name[child] != name:
+                child = self.end[child]
+            if child >= end:
+                return None
+            node = child
+        return PathNode(self, node)
+
+    def glob(self, pattern: str) -> Iterator[str]:
+        """Paths of files matching ``pattern``: fnmatch per segment, with
+        "**" matching any number of directories.
+
+        A literal directory prefix narrows the search to that subtree, and a
+        literal file name to the files with that name.
+        """
+        parts = pattern.strip("/").split("/")
+        literal = 0
+        while literal < len(parts) - 1 and not any(c in parts[literal] for c in "*?["):
+            literal += 1
+        base = self.find("/".join(parts[:literal]))
+        if base is None:
+            return
+        rest = parts[literal:]
+        if not any(c in rest[-1] for c in "*?["):
+            nodes = (node.id for node in self.by_basename(rest[-1]) if base.id < node.id < self.end[base.id])
+        else:
+            nodes = (n for n in range(base.id + 1, self.end[base.id]) if self.is_file[n])
+        for node in nodes:
+            path = self.path_of(node)
+            relative = path.split("/")[literal:]
+            if _match(rest, relative):
+                yield path
+
+    # ---------- Aggregates ----------
+    def directory_stats(self, path: str) -> Optional[dict]:
+        node = self.find(path)
+        if node is None or node.is_file:
+            return None
+        return {"path": node.path or "/", "files": node.file_count, "size": node.size}
+
+    def top_directories(self, limit: int = 10) -> List[dict]:
+        """Top-level directories with the most files."""
+        directories = [child for child in self.root.children() if not child.is_file]
+        directories.sort(key=lambda child: -child.file_count)
+        return [
+            {"path": child.path, "files": child.file_count, "size": child.size}
+            for child in directories[:limit]
+        ]
+
+
+def _match(pattern: List[str], parts: List[str]) -> bool:
+    if not pattern:
+        return not parts
+    if pattern[0] == "**":
+        return any(_match(pattern[1:], parts[i:]) for i in range(len(parts) + 1))
+    return bool(parts) and fnmatchcase(parts[0], pattern[0]) and _match(pattern[1:], parts[1:])
@@ -0,0 +1,162 @@
+# backend/prewarm.py
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import Counter, deque
+from typing import Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+PREWARM_INTERVAL = float(os.getenv("PREWARM_INTERVAL", "600"))  # 0 disables the scheduler
+PREWARM_CONCURRENCY = int(os.getenv("PREWARM_CONCURRENCY", "2"))
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", "10"))
+# Distinct repos counted per cycle; past this the least-requested half is dropped.
+PREWARM_MAX_TRACKED = int(os.getenv("PREWARM_MAX_TRACKED", "10000"))
+
+# Lower runs first.
+PRIORITY_MANUAL = 0
+PRIORITY_HOT = 1
+PRIORITY_POPULAR = 2
+
+
+def hot_repos_from_env() -> List[str]:
+    """PREWARM_REPOS as GitHub URLs (entries may be URLs or owner/repo)."""
+    repos = [r.strip() for r in os.getenv("PREWARM_REPOS", "").split(",") if r.strip()]
+    return [r if r.startswith("http") else f"https://github.com/{r}" for r in repos]
+
+
+class PrewarmQueue:
+    """Priority job queue that re-analyzes hot and popular repositories.
+
+    Every ``interval`` seconds the configured hot repos and the ``top_n``
+    most-requested repos since the last cycle are queued. ``concurrency``
+    workers run them through ``analyze(github_url)``, which is expected to
+    store its result in the analysis cache. ``key_func`` maps a URL to the
+    normalized repo key used to skip duplicate jobs.
+    """
+
+    def __init__(
+        self,
+        analyze: Callable[[str], Awaitable[Dict]],
+        key_func: Callable[[str], str],
+        hot_repos: List[str],
+        interval: float = PREWARM_INTERVAL,
+        concurrency: int = PREWARM_CONCURRENCY,
+        top_n: int = PREWARM_TOP_N,
+        max_tracked: int = PREWARM_MAX_TRACKED,
+    ):
+        self.analyze = analyze
+        self.key_func = key_func
+        self.hot_repos = hot_repos
+        self.interval = interval
+        self.concurrency = concurrency
+        self.top_n = top_n
+        self.max_tracked = max_tracked
+        self.request_counts = Counter()  # normalized key -> requests this cycle
+        self.request_urls = {}  # normalized key -> last URL seen
+        self.recent_jobs = deque(maxlen=50)
+        self.stats = {"queued": 0, "completed": 0, "failed": 0, "skipped_duplicates": 0}
+        self._queue = None
+        self._pending = set()
+        self._running = {}
+        self._seq = itertools.count()
+        self._tasks = []
+
+    def record_request(self, key: str, github_url: str):
+        """Count a user request so popular repos get pre-warmed. A no-op
+        unless the queue is running."""
+        if self._queue is None:
+            return
+        if key not in self.request_counts and len(self.request_counts) >= self.max_tracked:
+            self._prune(self.max_tracked // 2)
+        self.request_counts[key] += 1
+        self.request_urls[key] = github_url
+
+    def _prune(self, keep: int):
+        """Keep only the ``keep`` most-requested repos."""
+        self.request_counts = Counter(dict(self.request_counts.most_common(keep)))
+        self.request_urls = {key: self.request_urls[key] for key in self.request_counts}
+
+    def enqueue(self, key: str, github_url: str, priority: int = PRIORITY_MANUAL) -> bool:
+        if self._queue is None:
+            return False
+        if key in self._pending or key in self._running:
+            self.stats["skipped_duplicates"] += 1
+            return False
+        self._pending.add(key)
+        self._queue.put_nowait((priority, next(self._seq), key, github_url, time.time()))
+        self.stats["queued"] += 1
+        return True
+
+    def schedule_cycle(self):
+        """Queue the hot repos and this cycle's most-requested repos."""
+        for github_url in self.hot_repos:
+            self.enqueue(self.key_func(github_url), github_url, PRIORITY_HOT)
+        for key, _ in self.request_counts.most_common(self.top_n):
+            self.enqueue(key, self.request_urls[key], PRIORITY_POPULAR)
+        self.request_counts.clear()
+        self.request_urls.clear()
+
+    async def start(self):
+        if self.interval <= 0 or self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.ensure_future(self._scheduler())]
+        self._tasks += [asyncio.ensure_future(self._worker()) for _ in range(self.concurrency)]
+        logger.info(f"🔥 Pre-warm queue started: {len(self.hot_repos)} hot repo(s), "
+              f"every {self.interval:.0f}s, {self.concurrency} worker(s)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _scheduler(self):
+        while True:
+            self.schedule_cycle()
+            await asyncio.sleep(self.interval)
+
+    async def _worker(self):
+        while True:
+            priority, _, key, github_url, enqueued_at = await self._queue.get()
+            self._pending.discard(key)
+            started = time.time()
+            self._running[key] = started
+            status = "completed"
+            try:
+                result = await self.analyze(github_url)
+                if result.get("status") != "success":
+                    status = "failed"
+            except Exception as e:
+                logger.warning(f"⚠️ Pre-warm of {key} failed: {e}")
+                status = "failed"
+            finally:
+                del self._running[key]
+                self._queue.task_done()
+            self.stats[status] += 1
+            self.recent_jobs.append({
+                "repo": key,
+                "priority": priority,
+                "status": status,
+                "waited_s": round(started - enqueued_at, 3),
+                "duration_s": round(time.time() - started, 3),
+            })
+
+    def snapshot(self) -> Dict:
+        durations = [job["duration_s"] for job in self.recent_jobs]
+        now = time.time()
+        return {
+            "enabled": bool(self._tasks),
+            "interval_s": self.interval,
+            "concurrency": self.concurrency,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "running": {key: round(now - started, 3) for key, started in self._running.items()},
+            "hot_repos": self.hot_repos,
+            "tracked_requests": dict(self.request_counts.most_common(self.top_n)),
+            **self.stats,
+            "avg_duration_s": round(sum(durations) / len(durations), 3) if durations else None,
+            "recent_jobs": list(self.recent_jobs),
+        }
@@ -0,0 +1,105 @@
+# backend/scoring.py
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Relative difficulty of each language; anything else counts as 1.0.
+LANGUAGE_WEIGHTS = {
+    "C++": 2.0, "Rust": 1.8, "Go": 1.5,
+    "Python": 1.0, "JavaScript": 1.0, "TypeScript": 1.2,
+    "Java": 1.3, "Kotlin": 1.3, "Swift": 1.3,
+    "HTML": 0.5, "CSS": 0.5, "Markdown": 0.1
+}
+
+LEVEL_BOUNDS = np.array([3, 6, 8])
+LEVEL_NAMES = np.array(["Beginner", "Intermediate", "Advanced", "Expert"])
+
+
+class LanguageColumns:
+    """Language maps of many repositories laid out position by position.
+
+    Column k holds each repository's k-th language in its own dict order,
+    so sums and argmaxes run in the same order as a loop over the dict would
+    and give bit-identical floats. Rows shorter than the widest map are padded.
+    """
+
+    __slots__ = ("names", "sizes", "weights", "counts")
+
+    def __init__(self, language_maps: Sequence[Dict[str, int]]):
+        width = max((len(languages) for languages in language_maps), default=0)
+        rows = len(language_maps)
+        self.names = np.full((rows, width), None, dtype=object)
+        self.sizes = np.full((rows, width), -1, dtype=np.int64)
+        self.weights = np.zeros((rows, width))
+        self.counts = np.zeros(rows, dtype=np.int64)
+        for row, languages in enumerate(language_maps):
+            n = len(languages)
+            self.counts[row] = n
+            if n:
+                self.names[row, :n] = list(languages)
+                self.sizes[row, :n] = list(languages.values())
+                self.weights[row, :n] = [LANGUAGE_WEIGHTS.get(lang, 1.0) for lang in languages]
+
+
+def _round(values: np.ndarray, digits: int = 1) -> np.ndarray:
+    # np.round scales and rounds half-to-even in binary, which disagrees with
+    # Python's round() on some ties; scores are rounded the way round() does.
+    return np.array([round(value, digits) for value in values.tolist()])
+
+
+def complexity_scores(languages: LanguageColumns, file_counts: np.ndarray) -> np.ndarray:
+    """Complexity (0-10) from language diversity, weighted language
+    complexity and file count (with diminishing returns)."""
+    lang_complexity = np.zeros(len(languages.counts))
+    for column in languages.weights.T:
+        lang_complexity = lang_complexity + column  # padding adds exactly 0.0
+    file_factor = np.minimum(5, np.asarray(file_counts) / 50)
+    score = (languages.counts * 0.5) + (lang_complexity * 0.3) + (file_factor * 2)
+    return _round(np.minimum(10, score))
+
+
+def complexity_levels(scores: np.ndarray) -> np.ndarray:
+    """Vectorized get_complexity_level."""
+    return LEVEL_NAMES[np.searchsorted(LEVEL_BOUNDS, scores, side="right")]
+
+
+def community_scores(contributor_counts: np.ndarray, issue_comments: np.ndarray) -> np.ndarray:
+    """Community engagement (0-10) from contributor counts and the total
+    comments on each repository's active issues."""
+    contributor_score = np.minimum(5, np.asarray(contributor_counts) * 0.5)
+    issue_score = np.minimum(5, np.asarray(issue_comments) * 0.1)
+    return _round(np.minimum(10, contributor_score + issue_score))
+
+
+def primary_languages(languages: LanguageColumns) -> List[str]:
+    """Vectorized get_primary_language (first language with the most bytes)."""
+    if not languages.sizes.shape[1]:
+        return ["Unknown"] * len(languages.counts)
+    best = languages.sizes.argmax(axis=1)
+    names = languages.names[np.arange(len(best)), best]
+    return [name if count else "Unknown" for name, count in zip(names, languages.counts)]
+
+
+def score_batch(records: Sequence[Dict]) -> Dict[str, np.ndarray]:
+    """Score many repositories in one pass.
+
+    Each record has ``languages`` (name -> bytes), ``file_count``,
+    ``contributor_count`` (contributors considered, i.e. the top ones) and
+    ``issue_comments``. Returns one array per metric, aligned with records.
+    """
+    languages = LanguageColumns([record["languages"] for record in records])
+    complexity = complexity_scores(languages, np.array([r["file_count"] for r in records], dtype=np.int64))
+    return {
+        "complexity_score": complexity,
+        "complexity_level": complexity_levels(complexity),
+        "community_score": community_scores(
+            np.array([r["contributor_count"] for r in records], dtype=np.int64),
+            np.array([r["issue_comments"] for r in records], dtype=np.int64),
+        ),
+        "primary_language": np.array(primary_languages(languages), dtype=object),
+    }
+
+
+def rank(values: np.ndarray, descending: bool = True) -> np.ndarray:
+    """Indices that order ``values``; ties keep their input order."""
+    return np.argsort(-values if descending else values, kind="stable")
@@ -0,0 +1,82 @@
+# backend/startup_report.py
+"""Where backend startup time goes: ``python main.py --startup-report``.
+
+Imports main in a fresh interpreter with ``-X importtime`` and reports the
+total import time, its heaviest direct imports, how long the lifespan
+warm-up takes, and which heavy dependencies were left to first use.
+"""
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+# Heavy modules main leaves to first use or the lifespan warm-up.
+DEFERRED_MODULES = ("github", "requests", "numpy", "scoring", "chat_index")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+loaded = [name for name in {deferred!r} if name in sys.modules]
+main.warm_up()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "warm_up_ms": (time.perf_counter() - imported) * 1000,
+    "loaded_at_import": loaded,
+}}))
+"""
+
+
+def parse_importtime(output: str, module: str = "main") -> Tuple[float, List[Tuple[str, float]]]:
+    """Cumulative ms of ``module`` and its direct imports, heaviest first."""
+    children = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header
+        name = name[1:]
+        level = (len(name) - len(name.lstrip())) // 2
+        if level == 1:
+            children.append((name.strip(), int(cumulative) / 1000))
+        elif level == 0:
+            if name.strip() == module:
+                return int(cumulative) / 1000, sorted(children, key=lambda child: -child[1])
+            children = []
+    raise ValueError(f"{module} not found in -X importtime output")
+
+
+def startup_report() -> Dict:
+    env = {**os.environ, "LOG_LEVEL": "WARNING", "PREWARM_INTERVAL": "0"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(deferred=DEFERRED_MODULES)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    total_ms, imports = parse_importtime(result.stderr)
+    return {
+        **probe,
+        "main_import_ms": total_ms,
+        "imports": imports,
+        "deferred": [name for name in DEFERRED_MODULES if name not in probe["loaded_at_import"]],
+    }
+
+
+def print_startup_report(top: int = 12) -> int:
+    report = startup_report()
+    print("🚀 Startup report")
+    print(f"   import main:        {report['import_ms']:8.1f} ms")
+    print(f"   lifespan warm-up:   {report['warm_up_ms']:8.1f} ms (in the background)")
+    print("   Heaviest imports (cumulative):")
+    for name, ms in report["imports"][:top]:
+        print(f"     {name:<24} {ms:8.1f} ms")
+    print(f"   Deferred to first use: {', '.join(report['deferred']) or '-'}")
+    if report["loaded_at_import"]:
+        print(f"   ⚠️ Loaded at import: {', '.join(report['loaded_at_import'])}")
+    return 0
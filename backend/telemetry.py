@@ -0,0 +1,271 @@
+# backend/telemetry.py
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Sequence
+
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "json" for one JSON object per line
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+# ========== METRICS (Prometheus text format) ==========
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: tuple, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        return [f"{self.name}{self._labels(key)} {value:g}" for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+        self._counts = {}  # labels -> per-bucket counts (last one is +Inf)
+        self._sums = defaultdict(float)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._sums[key] += value
+
+    def _samples(self):
+        lines = []
+        for key, counts in sorted(self._counts.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {self._sums[key]:g}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REGISTRY = []
+
+REQUEST_SECONDS = Histogram(
+    "codesensei_http_request_duration_seconds", "HTTP request latency until the response starts.",
+    ["method", "route", "status"],
+)
+STAGE_SECONDS = Histogram(
+    "codesensei_stage_duration_seconds", "Duration of each analysis pipeline stage.", ["stage"],
+)
+UPSTREAM_REQUESTS = Counter(
+    "codesensei_upstream_requests_total", "Requests made to upstream services.", ["service", "status"],
+)
+CACHE_LOOKUPS = Counter(
+    "codesensei_cache_lookups_total", "Cache lookups by cache and result.", ["cache", "result"],
+)
+LLM_TOKENS = Counter(
+    "codesensei_llm_tokens_total", "LLM tokens used, as reported by the API.", ["model", "kind"],
+)
+LLM_SECONDS = Histogram(
+    "codesensei_llm_request_duration_seconds", "Full LLM completion latency, including streaming.",
+    ["model"], buckets=(0.5, 1, 2, 4, 8, 15, 30, 60),
+)
+ADMISSIONS = Counter(
+    "codesensei_admissions_total", "Admission control decisions for new analyses.", ["result"],
+)
+
+
+def render_metrics() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# ========== PER-REQUEST TRACES ==========
+class Trace:
+    """Stage timings and upstream call counts of one analysis."""
+
+    __slots__ = ("id", "repo", "started", "stages", "upstream", "_lock")
+
+    def __init__(self, repo: Optional[str] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.repo = repo
+        self.started = time.perf_counter()
+        self.stages = defaultdict(float)
+        self.upstream = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def finish(self) -> Dict:
+        """Record the whole analysis as the "analysis" stage; returns to_dict()."""
+        STAGE_SECONDS.observe(time.perf_counter() - self.started, stage="analysis")
+        return self.to_dict()
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.id,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()},
+            "upstream_calls": dict(self.upstream),
+        }
+
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+
+
+def start_trace(repo: Optional[str] = None) -> Trace:
+    """Start a trace for the current task; work it spawns (tasks, run_blocking
+    calls) records into it too."""
+    trace = Trace(repo)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(stage: str):
+    """Time a pipeline stage into the stage histogram and the current trace."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        trace = _current_trace.get()
+        if trace is not None:
+            with trace._lock:
+                trace.stages[stage] += elapsed
+
+
+async def timed(stage: str, awaitable):
+    """Await ``awaitable`` inside span(stage)."""
+    with span(stage):
+        return await awaitable
+
+
+def record_upstream(service: str, status):
+    UPSTREAM_REQUESTS.inc(service=service, status=status)
+    trace = _current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            trace.upstream[service] += 1
+
+
+def record_llm_usage(model: str, usage: Optional[Dict]):
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage and usage.get(kind):
+            LLM_TOKENS.inc(usage[kind], model=model, kind=kind.replace("_tokens", ""))
+
+
+class GitHubRequestCounter(logging.Handler):
+    """Counts PyGithub's requests from the DEBUG line it logs for each one."""
+
+    def emit(self, record):
+        if len(record.args or ()) >= 7:
+            record_upstream("github", record.args[6])
+
+
+# ========== LOGGING ==========
+class ContextFilter(logging.Filter):
+    """Tag records with the current trace, in the thread that logs them."""
+
+    def filter(self, record):
+        trace = _current_trace.get()
+        record.trace_id = trace.id if trace else None
+        record.repo = trace.repo if trace else None
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "trace_id", None):
+            entry["trace_id"] = record.trace_id
+            entry["repo"] = record.repo
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+_listener = None
+
+
+def setup_logging():
+    """Route logging through a queue so callers never block on stdout."""
+    global _listener
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JSONFormatter() if LOG_FORMAT == "json" else logging.Formatter("%(message)s"))
+    records = queue.SimpleQueue()
+    handler = QueueHandler(records)
+    handler.addFilter(ContextFilter())
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    _listener = QueueListener(records, output)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    # PyGithub logs every request at DEBUG; count them instead of printing.
+    github_logger = logging.getLogger("github.Requester")
+    github_logger.addHandler(GitHubRequestCounter())
+    github_logger.setLevel(logging.DEBUG)
+    github_logger.propagate = False
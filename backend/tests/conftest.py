@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+import os
+import sys
+
+# The backend is a flat set of modules run from backend/.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
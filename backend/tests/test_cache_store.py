@@ -0,0 +1,139 @@
+# backend/tests/test_cache_store.py
+"""SQLiteStore and RedisStore (against an in-process stand-in for Redis),
+and AnalysisCache instances sharing a store the way worker processes do."""
+import fnmatch
+import re
+import time
+import types
+
+import pytest
+
+import cache_store
+from analysis_cache import AnalysisCache
+from cache_store import RedisStore, SQLiteStore
+
+
+class FakeRedis:
+    """The subset of redis.Redis (decode_responses=True) RedisStore uses."""
+
+    def __init__(self):
+        self.hashes, self.strings = {}, {}  # strings: key -> (value, expires)
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.get(key, {}).pop(field, None)
+        if not self.hashes.get(key, True):
+            del self.hashes[key]
+
+    def hlen(self, key):
+        return len(self.hashes.get(key, {}))
+
+    def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+            self.strings.pop(key, None)
+
+    def scan_iter(self, match, count=None):
+        # Redis glob: like fnmatch, but a backslash escapes the next character.
+        pattern = re.sub(r"\\(.)", r"[\1]", match)
+        return [key for key in list(self.hashes) + list(self.strings) if fnmatch.fnmatchcase(key, pattern)]
+
+    def get(self, key):
+        value, expires = self.strings.get(key, (None, 0))
+        return value if expires > time.time() else None
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and self.get(key) is not None:
+            return None
+        self.strings[key] = (value, time.time() + px / 1000)
+        return True
+
+    def register_script(self, script):
+        assert script == RedisStore.RELEASE_SCRIPT
+
+        def release(keys, args):
+            if self.get(keys[0]) == args[0]:
+                self.delete(keys[0])
+        return release
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    server = FakeRedis()
+    redis = types.SimpleNamespace(Redis=types.SimpleNamespace(from_url=lambda url, decode_responses: server))
+    monkeypatch.setattr(cache_store, "redis", redis)
+    return lambda: RedisStore("redis://localhost:6379/0")
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def connect(request, tmp_path, fake_redis):
+    """Opens a new connection to one shared store, as each worker would."""
+    if request.param == "sqlite":
+        return lambda: SQLiteStore(str(tmp_path / "cache.db"))
+    return fake_redis
+
+
+def test_hashes(connect):
+    store, other = connect(), connect()
+    store.hset("sections:o/r:abc", {"tree": "1", "community": "2"})
+    assert other.hget("sections:o/r:abc", "tree") == "1"
+    assert other.hgetall("sections:o/r:abc") == {"tree": "1", "community": "2"}
+    assert other.hlen("sections:o/r:abc") == 2
+    other.hdel("sections:o/r:abc", "tree")
+    assert store.hgetall("sections:o/r:abc") == {"community": "2"}
+    store.hset("shas:o/r", {"abc": "1"})
+    store.hset("shas:o/r[1]", {"def": "1"})
+    assert sorted(store.keys("shas:")) == ["shas:o/r", "shas:o/r[1]"]
+    assert store.keys("shas:o/r[") == ["shas:o/r[1]"]
+    store.delete("sections:o/r:abc", "shas:o/r")
+    assert store.hgetall("sections:o/r:abc") == {} and store.hget("shas:o/r", "abc") is None
+
+
+def test_locks(connect):
+    first, second = connect(), connect()
+    assert first.acquire("lock:analysis:o/r", "worker-1", ttl=30)
+    assert not second.acquire("lock:analysis:o/r", "worker-2", ttl=30)
+    second.release("lock:analysis:o/r", "worker-2")  # not the owner: no effect
+    assert not second.acquire("lock:analysis:o/r", "worker-2", ttl=30)
+    first.release("lock:analysis:o/r", "worker-1")
+    assert second.acquire("lock:analysis:o/r", "worker-2", ttl=0.05)
+    time.sleep(0.1)  # an expired lock can be taken over
+    assert first.acquire("lock:analysis:o/r", "worker-1", ttl=30)
+    second.release("lock:analysis:o/r", "worker-2")  # expired owner can't release the new holder's lock
+    assert not second.acquire("lock:analysis:o/r", "worker-2", ttl=30)
+
+
+def test_workers_share_sections(connect):
+    a, b = AnalysisCache(store=connect()), AnalysisCache(store=connect())
+    a.put_sections("Octo/Repo", "sha1", {"repo_info": {"stars": 1}, "tree": {"languages": {}}})
+    assert b.get_sections("octo/repo", "sha1") == {"repo_info": {"stars": 1}, "tree": {"languages": {}}}
+
+    # b holds a local copy now; a write by a must still reach it.
+    assert a.update_section("octo/repo", "sha1", "repo_info", {"stars": 2})
+    assert b.get_sections("octo/repo", "sha1")["repo_info"] == {"stars": 2}
+    b.invalidate("octo/repo", ["repo_info"])
+    assert "repo_info" not in a.get_sections("octo/repo", "sha1")
+
+    a.set_head("octo/repo", "sha1", '"etag"')
+    assert b.get_head("octo/repo") == ("sha1", '"etag"')
+    b.put_sections("octo/repo", "sha2", {"tree": {"languages": {"Go": 1}}})
+    assert a.previous_sha("octo/repo", "sha2") is None  # older SHAs are dropped
+    assert a.get_sections("octo/repo", "sha1") == {}
+    assert a.latest_sections(("tree",)) == {"octo/repo": {"tree": {"languages": {"Go": 1}}}}
+
+
+def test_carry_over_keeps_timestamps(connect):
+    a, b = AnalysisCache(store=connect(), ttls={"community": 60}), AnalysisCache(store=connect(), ttls={"community": 60})
+    a.put_sections("o/r", "sha1", {"community": {"active_issues": []}})
+    b.carry_over("o/r", "sha1", "sha2", ["community"])
+    assert a.get_sections("o/r", "sha2", refresh_ahead=30) == {"community": {"active_issues": []}}
+    assert a.get_sections("o/r", "sha2", refresh_ahead=61) == {}
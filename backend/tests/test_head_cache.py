@@ -0,0 +1,89 @@
+# backend/tests/test_head_cache.py
+import importlib
+import os
+import time
+
+import pytest
+
+import analysis_cache
+from analysis_cache import AnalysisCache
+from bench.fixtures import get_fixture
+from bench.replay_server import ReplayState, start_replay_server
+
+
+@pytest.fixture(scope="module")
+def fake_github():
+    state = ReplayState()
+    server = start_replay_server(state)
+    yield state, "http://127.0.0.1:%d" % server.server_address[1]
+    server.shutdown()
+
+
+@pytest.fixture
+def cache(fake_github, monkeypatch):
+    monkeypatch.setattr(analysis_cache, "GITHUB_API_URL", fake_github[1])
+    return AnalysisCache(16)
+
+
+def test_head_is_revalidated_with_etag(fake_github, cache):
+    state, _ = fake_github
+    fixture = get_fixture("bench", "tiny-head")
+    assert cache.resolve_head("bench/tiny-head", lambda: "token") == fixture.head_sha
+    etag = cache.get_head("bench/tiny-head")[1]
+    # The second lookup is a conditional request answered 304.
+    assert cache.resolve_head("bench/tiny-head", lambda: "token") == fixture.head_sha
+    assert cache.get_head("bench/tiny-head")[1] == etag
+
+
+def test_no_token_is_picked_for_a_pushed_head(cache):
+    cache.set_head("bench/tiny-pushed", "a" * 40, None, pushed=True)
+
+    def pick():
+        raise AssertionError("picked a token without making a request")
+
+    assert cache.resolve_head("bench/tiny-pushed", pick) == "a" * 40
+
+
+@pytest.fixture(scope="module")
+def app_main(fake_github):
+    """main imported against the fake GitHub/OpenRouter server."""
+    _, url = fake_github
+    env = {"GITHUB_API_URL": url, "OPENROUTER_API_URL": url, "GITHUB_TOKENS": "test-token",
+           "OPENROUTER_API_KEY": "test-key", "PREWARM_INTERVAL": "0"}
+    saved = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    import github_scheduler
+    importlib.reload(github_scheduler)
+    importlib.reload(analysis_cache)
+    import main
+    importlib.reload(main)
+    yield main
+    for name, value in saved.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+
+def test_cached_analysis_is_served_with_tokens_exhausted(fake_github, app_main, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    state, _ = fake_github
+    client = TestClient(app_main.app)
+    body = {"github_url": "https://github.com/bench/tiny-limits"}
+    assert client.post("/api/analyze", json=body).json()["status"] == "success"
+
+    def exhausted():
+        raise app_main.RateLimitExhausted(time.time() + 600)
+
+    monkeypatch.setattr(app_main.github_scheduler, "pick", exhausted)
+    before = state.snapshot()
+    cached = client.post("/api/analyze", json=body).json()
+    assert cached["status"] == "success"
+    assert cached["repo_info"]["full_name"] == "bench/tiny-limits"
+    assert state.snapshot() == before  # no upstream request at all
+
+    # Nothing cached: the rate limit error still comes through.
+    uncached = client.post("/api/analyze", json={"github_url": "https://github.com/bench/tiny-other"}).json()
+    assert uncached["status"] == "error"
+    assert uncached["debug"]["rate_limit_reset"]
@@ -0,0 +1,21 @@
+# backend/tests/test_http_cache.py
+from http_cache import content_etag, matching_etag
+
+ANALYSIS = {"status": "success", "repo_info": {"full_name": "octo-org/codesensei", "stars": 12}}
+
+
+def test_etag_ignores_debug_info():
+    first = content_etag({**ANALYSIS, "debug_info": {"cached_sections": [], "timings": {"total_ms": 812.4}}})
+    again = content_etag({**ANALYSIS, "debug_info": {"cached_sections": ["repo_info"], "timings": {"total_ms": 3.1}}})
+    assert first == again and first.startswith('W/"')
+    assert content_etag({**ANALYSIS, "repo_info": {**ANALYSIS["repo_info"], "stars": 13}}) != first
+
+
+def test_matching_etag():
+    etag = content_etag(ANALYSIS)
+    opaque = etag[2:]
+    assert matching_etag(etag, etag) == etag
+    assert matching_etag(f'"other", {opaque[:-1]}-gzip"', etag) == f'{opaque[:-1]}-gzip"'
+    assert matching_etag("*", etag) == etag
+    assert matching_etag('W/"other"', etag) is None
+    assert matching_etag(None, etag) is None
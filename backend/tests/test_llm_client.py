@@ -0,0 +1,164 @@
+# backend/tests/test_llm_client.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from llm_client import IncrementalJSONFields, LLMError, OpenRouterClient
+
+ANSWER = {
+    "ai_summary": 'Says "hi" \\ and {braces} [brackets], done',
+    "tech_insights": ["a", "b,c"],
+    "learning_path": [{"step": 1, "note": "}"}],
+    "patterns": [],
+}
+TEXT = "```json\n" + json.dumps(ANSWER) + "\n```"
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJSONFields()
+    fields = []
+    for start in range(0, len(text), size):
+        fields.extend(parser.feed(text[start:start + size]))
+    return parser, fields
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(TEXT)])
+def test_fields_arrive_whole_however_the_text_is_split(size):
+    parser, fields = feed_in_chunks(TEXT, size)
+    assert fields == list(ANSWER.items())
+    assert parser.fields == ANSWER
+
+
+def test_escaped_quote_split_from_its_backslash():
+    text = '{"ai_summary": "a \\"quoted\\" word", "patterns": []}'
+    split = text.index("\\") + 1  # the chunk ends right after a backslash
+    parser = IncrementalJSONFields()
+    assert parser.feed(text[:split]) == []
+    assert parser.feed(text[split:]) == [("ai_summary", 'a "quoted" word'), ("patterns", [])]
+
+
+def test_field_is_reported_once_its_value_completes():
+    parser = IncrementalJSONFields()
+    assert parser.feed('{"ai_summary": "first", "tech') == [("ai_summary", "first")]
+    assert parser.feed('_insights": ["x"') == []
+    assert parser.feed(']}') == [("tech_insights", ["x"])]
+
+
+def test_text_after_the_object_is_ignored():
+    parser, fields = feed_in_chunks('{"a": 1} {"b": 2}', 4)
+    assert fields == [("a", 1)]
+
+
+class MockOpenRouter(BaseHTTPRequestHandler):
+    """Serves ``script`` responses in order: (status, body, headers) or
+    ("stream", events, complete)."""
+
+    protocol_version = "HTTP/1.1"
+    script = []
+    requests_seen = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        cls = type(self)
+        step = cls.script[min(cls.requests_seen, len(cls.script) - 1)]
+        cls.requests_seen += 1
+        if step[0] == "stream":
+            _, events, complete = step
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for event in events:
+                self._chunk(f"data: {json.dumps(event)}\n\n".encode())
+            if complete:
+                self._chunk(b"data: [DONE]\n\n")
+                self._chunk(b"")
+            # Otherwise the connection just closes mid-stream.
+            self.close_connection = True
+            return
+        status, body, headers = step
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+@pytest.fixture
+def mock_server():
+    handler = type("Handler", (MockOpenRouter,), {"script": [], "requests_seen": 0})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield handler, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def client(url, max_retries=3):
+    return OpenRouterClient("key", base_url=url, max_retries=max_retries, backoff=0, timeout=5)
+
+
+def completion(text):
+    return {"choices": [{"message": {"content": text}}]}
+
+
+def deltas(text, size=5):
+    return [{"choices": [{"delta": {"content": text[i:i + size]}}]} for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retries_retryable_statuses(mock_server, status):
+    handler, url = mock_server
+    handler.script = [(status, {"error": "busy"}, {"Retry-After": "0"}), (200, completion("ok"), {})]
+    assert client(url).complete([{"role": "user", "content": "hi"}]) == "ok"
+    assert handler.requests_seen == 2
+
+
+def test_gives_up_after_max_retries(mock_server):
+    handler, url = mock_server
+    handler.script = [(503, {"error": "down"}, {})]
+    with pytest.raises(LLMError, match="503"):
+        client(url, max_retries=2).complete([])
+    assert handler.requests_seen == 3
+
+
+def test_client_errors_are_not_retried(mock_server):
+    handler, url = mock_server
+    handler.script = [(400, {"error": "bad request"}, {})]
+    with pytest.raises(LLMError, match="400"):
+        client(url).complete([])
+    assert handler.requests_seen == 1
+
+
+def test_retry_after_header_is_honoured():
+    class Response:
+        headers = {"Retry-After": "2.5"}
+    assert OpenRouterClient._retry_after(Response()) == 2.5
+    Response.headers = {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}
+    assert OpenRouterClient._retry_after(Response()) is None
+
+
+def test_streamed_json_fields_after_a_retry(mock_server):
+    handler, url = mock_server
+    handler.script = [(429, {}, {"Retry-After": "0"}), ("stream", deltas(TEXT), True)]
+    fields = []
+    result = client(url).complete_json([], on_field=lambda key, value: fields.append(key))
+    assert result == ANSWER
+    assert fields == list(ANSWER)
+
+
+def test_truncated_stream_raises(mock_server):
+    handler, url = mock_server
+    handler.script = [("stream", deltas(TEXT)[:3], False)]
+    with pytest.raises(LLMError):
+        client(url).complete_json([])
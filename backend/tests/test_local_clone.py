@@ -0,0 +1,69 @@
+# backend/tests/test_local_clone.py
+import os
+import subprocess
+
+import pytest
+
+from local_clone import CloneCache
+
+
+def git(*args, cwd=None):
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "-c", "init.defaultBranch=main", *args],
+        cwd=cwd, check=True, capture_output=True,
+    )
+
+
+def make_mirror(tmp_path, repo_path, files, symlinks=None):
+    """Bare repository at tmp_path/mirrors/<repo_path>.git with one commit."""
+    work = tmp_path / "work" / repo_path
+    work.mkdir(parents=True)
+    for name, text in files.items():
+        (work / name).parent.mkdir(parents=True, exist_ok=True)
+        (work / name).write_text(text)
+    for name, target in (symlinks or {}).items():
+        os.symlink(target, work / name)
+    git("init", "--quiet", cwd=work)
+    git("add", "-A", cwd=work)
+    git("commit", "--quiet", "-m", "initial", cwd=work)
+    mirror = tmp_path / "mirrors" / f"{repo_path}.git"
+    mirror.parent.mkdir(parents=True, exist_ok=True)
+    git("clone", "--quiet", "--bare", str(work), str(mirror))
+
+
+@pytest.fixture
+def clones(tmp_path):
+    return CloneCache(root=str(tmp_path / "clones"), max_repos=1,
+                      source_template=str(tmp_path / "mirrors" / "{repo}.git"))
+
+
+def test_analyze_skips_symlinks(tmp_path, clones):
+    secret = tmp_path / "secret.py"
+    secret.write_text("import outside\n" * 100)
+    make_mirror(tmp_path, "acme/app", {
+        "app/main.py": "import os\nfrom app.util import x\n",
+        "app/util.py": "x = 1\n",
+        "README.md": "# app\n",
+    }, symlinks={"dangling.py": "missing.py", "outside.py": str(secret)})
+
+    stats = clones.analyze("acme/app")
+    assert stats["files_scanned"] == 3
+    assert stats["unreadable_files"] == 0
+    assert stats["lines_by_language"] == {"Python": 3, "Markdown": 1}
+    assert stats["internal_imports"] == 1
+    assert stats["top_dependencies"] == {"os": 1}
+    assert "outside" not in stats["top_dependencies"]
+    assert len(stats["commit"]) == 40
+
+
+def test_eviction_of_names_with_double_underscores(tmp_path, clones):
+    make_mirror(tmp_path, "acme/a__b", {"a.py": "a = 1\n"})
+    make_mirror(tmp_path, "acme/c", {"c.py": "c = 1\n"})
+
+    clones.analyze("acme/a__b")
+    first = clones._dir_for("acme/a__b")
+    assert first.exists()
+    os.utime(first, (1, 1))  # least recently used
+    clones.analyze("acme/c")
+    assert not first.exists()
+    assert clones._dir_for("acme/c").exists()
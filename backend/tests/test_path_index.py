@@ -0,0 +1,76 @@
+# backend/tests/test_path_index.py
+from path_index import PathIndex
+
+FILES = [
+    ("README.md", 100),
+    ("/setup.py", 50),  # a leading slash is accepted
+    ("app/main.py", 900),
+    ("app/old_main.py", 800),
+    ("app/util/__init__.py", 0),
+    ("app/util/strings.py", 300),
+    ("docs/index.md", 40),
+    ("docs/api/main.py", 20),
+    ("tests/test_main.py", 60),
+    ("tests/unit/test_util.py", None),
+]
+
+
+def test_find():
+    index = PathIndex(FILES)
+    assert len(index) == 10
+    assert index.find("app/main.py").is_file
+    assert index.find("/app/main.py").path == "app/main.py"
+    util = index.find("app/util")
+    assert not util.is_file
+    assert (util.file_count, util.size, util.depth) == (2, 300, 1)
+    assert index.find("").path == "" and index.find("/").file_count == 10
+    assert index.find("app/missing.py") is None
+    assert index.find("nowhere/main.py") is None
+    assert index.find("main.py") is None  # only at the top level
+
+
+def test_by_basename():
+    index = PathIndex(FILES)
+    assert [node.path for node in index.by_basename("main.py")] == ["app/main.py", "docs/api/main.py"]
+    assert [node.path for node in index.by_basename("README.md")] == ["README.md"]
+    assert index.by_basename("util") == []  # directories are not files
+    assert index.by_basename("nothing.py") == []
+
+
+def test_glob():
+    index = PathIndex(FILES)
+    assert sorted(index.glob("**/*.py")) == sorted(path.strip("/") for path, _ in FILES if path.endswith(".py"))
+    assert list(index.glob("*.md")) == ["README.md"]
+    assert sorted(index.glob("**/main.py")) == ["app/main.py", "docs/api/main.py"]
+    assert sorted(index.glob("app/**/*.py")) == [
+        "app/main.py", "app/old_main.py", "app/util/__init__.py", "app/util/strings.py",
+    ]
+    assert list(index.glob("app/*/strings.py")) == ["app/util/strings.py"]
+    assert sorted(index.glob("tests/**/test_*.py")) == ["tests/test_main.py", "tests/unit/test_util.py"]
+    assert list(index.glob("missing/**/*.py")) == []
+
+
+def test_top_directories():
+    index = PathIndex(FILES)
+    assert index.top_directories() == [
+        {"path": "app", "files": 4, "size": 2000},
+        {"path": "docs", "files": 2, "size": 60},
+        {"path": "tests", "files": 2, "size": 60},
+    ]
+    assert index.top_directories(limit=1) == [{"path": "app", "files": 4, "size": 2000}]
+    assert index.directory_stats("docs/api") == {"path": "docs/api", "files": 1, "size": 20}
+    assert index.directory_stats("README.md") is None
+
+
+def test_recommend_starting_point():
+    from main import recommend_starting_point
+
+    # "main.py" must match app/main.py, not old_main.py, which sorts first.
+    files = ["/app/old_main.py", "/app/main.py", "/lib/helpers.py"]
+    assert recommend_starting_point(files, "Python") == "app/main.py"
+    assert recommend_starting_point(PathIndex((path, None) for path in files), "Python") == "app/main.py"
+    assert recommend_starting_point(["/old_main.py", "/src/deep/main.py", "/main.py"], "Python") == "main.py"
+    assert recommend_starting_point(["/web/src/index.ts", "/src/index.ts"], "TypeScript") == "src/index.ts"
+    # Without a match the first file is returned, in the same form.
+    assert recommend_starting_point(["/app/old_main.py", "/lib/helpers.py"], "Python") == "app/old_main.py"
+    assert recommend_starting_point([], "Go") == "README.md"
@@ -0,0 +1,38 @@
+# backend/tests/test_prewarm.py
+import asyncio
+
+from prewarm import PrewarmQueue
+
+
+async def analyze(github_url):
+    return {"status": "success"}
+
+
+def make_queue(**kwargs):
+    return PrewarmQueue(analyze, lambda url: url.split("github.com/")[-1], [], **kwargs)
+
+
+def test_requests_are_not_tracked_when_disabled():
+    queue = make_queue(interval=0)
+    asyncio.run(queue.start())
+    for n in range(100):
+        queue.record_request(f"o/r{n}", f"https://github.com/o/r{n}")
+    assert not queue.request_counts and not queue.request_urls
+
+
+def test_tracking_is_capped_and_cleared_each_cycle():
+    async def run():
+        queue = make_queue(interval=3600, max_tracked=10, top_n=2)
+        await queue.start()
+        await asyncio.sleep(0)  # let the first (empty) cycle run
+        for n in range(25):
+            for _ in range(n % 3 + 1):
+                queue.record_request(f"o/r{n}", f"https://github.com/o/r{n}")
+        assert len(queue.request_counts) <= 10
+        assert set(queue.request_urls) == set(queue.request_counts)
+        queue.schedule_cycle()
+        assert not queue.request_counts and not queue.request_urls
+        assert queue.stats["queued"] == 2
+        await queue.stop()
+
+    asyncio.run(run())
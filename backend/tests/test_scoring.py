@@ -0,0 +1,98 @@
+# backend/tests/test_scoring.py
+import itertools
+
+import numpy as np
+
+from scoring import complexity_levels, rank, score_batch
+
+
+# Scalar scoring as it was before score_batch replaced it.
+def calculate_enhanced_complexity(languages, files):
+    lang_diversity = len(languages)
+    file_count = len(files)
+    complexity_weights = {
+        "C++": 2.0, "Rust": 1.8, "Go": 1.5,
+        "Python": 1.0, "JavaScript": 1.0, "TypeScript": 1.2,
+        "Java": 1.3, "Kotlin": 1.3, "Swift": 1.3,
+        "HTML": 0.5, "CSS": 0.5, "Markdown": 0.1
+    }
+    lang_complexity = 0
+    for lang in languages:
+        lang_complexity += complexity_weights.get(lang, 1.0)
+    file_factor = min(5, file_count / 50)
+    score = (lang_diversity * 0.5) + (lang_complexity * 0.3) + (file_factor * 2)
+    return round(min(10, score), 1)
+
+
+def calculate_community_score(contributors, issues):
+    if not contributors and not issues:
+        return 0.0
+    contributor_score = min(5, len(contributors) * 0.5)
+    total_comments = sum(issue.get("comments", 0) for issue in issues)
+    issue_score = min(5, total_comments * 0.1)
+    return round(min(10, contributor_score + issue_score), 1)
+
+
+def get_complexity_level(score):
+    if score < 3:
+        return "Beginner"
+    elif score < 6:
+        return "Intermediate"
+    elif score < 8:
+        return "Advanced"
+    else:
+        return "Expert"
+
+
+def get_primary_language(languages):
+    return max(languages, key=languages.get) if languages else "Unknown"
+
+
+LANGUAGE_MAPS = [
+    {},
+    {"Markdown": 10},
+    {"Go": 100},  # 0.5 + 0.45: halfway cases every fifth file count
+    {"Python": 500, "Shell": 20},
+    {"HTML": 7, "CSS": 7, "JavaScript": 7},  # tied sizes: the first one wins
+    {"C++": 9000, "Rust": 800, "Go": 70, "Zig": 6, "Markdown": 5, "TypeScript": 4},
+    {name: 1 for name in ["C++", "Rust", "Go", "Python", "JavaScript", "TypeScript", "Java", "Kotlin",
+                          "Swift", "HTML", "CSS", "Markdown", "Elixir", "Haskell"]},
+]
+
+
+def test_score_batch_matches_scalar_scoring():
+    records = [
+        {"languages": languages, "file_count": files, "contributor_count": contributors, "issue_comments": comments}
+        for languages, files, (contributors, comments) in itertools.product(
+            LANGUAGE_MAPS, range(0, 301), [(0, 0), (0, 5), (1, 0), (3, 7), (5, 25), (10, 50), (12, 80)]
+        )
+    ]
+    scores = score_batch(records)
+
+    expected_complexity = [calculate_enhanced_complexity(r["languages"], range(r["file_count"])) for r in records]
+    assert scores["complexity_score"].tolist() == expected_complexity
+    assert scores["complexity_level"].tolist() == [get_complexity_level(s) for s in expected_complexity]
+    assert scores["community_score"].tolist() == [
+        calculate_community_score(range(r["contributor_count"]), [{"comments": r["issue_comments"]}])
+        for r in records
+    ]
+    assert scores["primary_language"].tolist() == [get_primary_language(r["languages"]) for r in records]
+
+    # The grid hits halfway cases, where np.round and round() can disagree.
+    go = [0.5 + 1.5 * 0.3 + min(5, r["file_count"] / 50) * 2 for r in records if r["languages"] == {"Go": 100}]
+    assert sum(abs(value * 10 % 1 - 0.5) < 1e-6 for value in go if value < 10) > 10
+
+
+def test_levels_at_boundaries():
+    scores = np.array([0.0, 2.9, 3.0, 5.9, 6.0, 7.9, 8.0, 10.0])
+    assert complexity_levels(scores).tolist() == [get_complexity_level(s) for s in scores.tolist()]
+    # Empty language maps land exactly on each boundary through the file factor.
+    records = [{"languages": {}, "file_count": n, "contributor_count": 0, "issue_comments": 0} for n in (75, 150, 200)]
+    scores = score_batch(records)
+    assert scores["complexity_score"].tolist() == [3.0, 6.0, 8.0]
+    assert scores["complexity_level"].tolist() == ["Intermediate", "Advanced", "Expert"]
+
+
+def test_rank_keeps_ties_in_input_order():
+    assert rank(np.array([1.5, 3.0, 1.5, 3.0])).tolist() == [1, 3, 0, 2]
+    assert rank(np.array([1.5, 3.0, 1.5]), descending=False).tolist() == [0, 2, 1]
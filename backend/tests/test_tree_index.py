@@ -0,0 +1,94 @@
+# backend/tests/test_tree_index.py
+import json
+from types import SimpleNamespace
+
+from tree_index import TreeEntry, TreeIndex, fetch_tree_index
+
+ENTRIES = [
+    TreeEntry("README.md", 120, "blob", "s1"),
+    TreeEntry("src", None, "tree", "t1"),
+    TreeEntry("src/app", None, "tree", "t2"),
+    TreeEntry("src/app/main.py", 900, "blob", "s2"),
+    TreeEntry("src/app/util.py", 300, "blob", "s3"),
+    TreeEntry("src/setup.py", 50, "blob", "s4"),
+    TreeEntry("vendor/lib", None, "commit", "c1"),
+]
+
+
+def test_pack_round_trips_files_without_shas():
+    packed = json.loads(json.dumps(TreeIndex("head", ENTRIES).pack()))
+    assert packed["dirs"] == ["", "src/app", "src", "vendor"]
+    unpacked = TreeIndex.unpack("head", packed)
+    assert unpacked.sha == "head"
+    assert [(e.path, e.size, e.type) for e in unpacked.entries] == [
+        (e.path, e.size, e.type) for e in ENTRIES if e.type != "tree"
+    ]
+    assert all(entry.sha is None for entry in unpacked.entries)
+
+
+def test_unpacked_index_takes_changes():
+    index = TreeIndex.unpack("old", TreeIndex("old", ENTRIES).pack()).apply_changes("new", [
+        {"filename": "src/app/new.py", "status": "added", "sha": "n1"},
+        {"filename": "docs/README.md", "previous_filename": "README.md", "status": "renamed", "sha": "r1"},
+        {"filename": "src/setup.py", "status": "removed", "sha": None},
+    ])
+    assert [entry.path for entry in index.entries] == [
+        "docs/README.md", "src/app/main.py", "src/app/new.py", "src/app/util.py", "vendor/lib",
+    ]
+
+
+class TruncatingRepo:
+    """Git Trees API over nested dicts, truncating recursive listings longer
+    than ``limit`` entries the way GitHub does (at 100k)."""
+
+    default_branch = "main"
+
+    def __init__(self, root, limit):
+        self.trees = {}
+        self.root = self._add(root)
+        self.limit = limit
+        self.calls = 0
+
+    def _add(self, node):
+        elements = [
+            {"path": name, "type": "tree", "sha": self._add(child)} if isinstance(child, dict)
+            else {"path": name, "type": "blob", "sha": f"b-{name}-{child}", "size": child}
+            for name, child in node.items()
+        ]
+        sha = f"t{len(self.trees)}"
+        self.trees[sha] = elements
+        return sha
+
+    def _listing(self, sha, prefix=""):
+        for element in self.trees[sha]:
+            yield dict(element, path=prefix + element["path"])
+            if element["type"] == "tree":
+                yield from self._listing(element["sha"], f"{prefix}{element['path']}/")
+
+    def get_git_tree(self, sha, recursive=False):
+        self.calls += 1
+        sha = self.root if sha == "main" else sha
+        elements = list(self._listing(sha)) if recursive else self.trees[sha]
+        truncated = recursive and len(elements) > self.limit
+        if truncated:
+            elements = elements[:self.limit]
+        return SimpleNamespace(sha=sha, raw_data={"sha": sha, "truncated": truncated, "tree": elements})
+
+
+def test_truncated_tree_is_paged_in_tree_order():
+    layout = {
+        "README.md": 10,
+        "src": {"app": {"main.py": 1, "util.py": 2, "deep": {"a.py": 3, "b.py": 4}}, "setup.py": 5},
+        "docs": {"index.md": 6},
+        "z.txt": 7,
+    }
+    full = fetch_tree_index(TruncatingRepo(layout, limit=100))
+    repo = TruncatingRepo(layout, limit=3)
+    paged = fetch_tree_index(repo)
+    assert repo.calls > 1
+    assert paged.sha == full.sha
+    assert paged.entries == full.entries
+    assert [entry.path for entry in paged.iter_files()] == [
+        "README.md", "src/app/main.py", "src/app/util.py", "src/app/deep/a.py", "src/app/deep/b.py",
+        "src/setup.py", "docs/index.md", "z.txt",
+    ]
@@ -0,0 +1,87 @@
+# backend/tests/test_webhooks.py
+"""Recorded webhook deliveries (tests/webhooks, in bench.webhook_replay's
+format) replayed through the payload handling."""
+import hashlib
+import hmac
+import json
+import os
+
+import pytest
+
+from webhooks import is_default_branch_push, push_changes, update_active_issues, verify_signature
+
+DELIVERIES = os.path.join(os.path.dirname(__file__), "webhooks")
+
+
+def delivery(name):
+    with open(os.path.join(DELIVERIES, name)) as f:
+        recorded = json.load(f)
+    return recorded["event"], recorded["payload"]
+
+
+def active(*counts):
+    """A cached active_issues list: issue numbers with their comment counts."""
+    return [{"number": number, "title": f"Issue {number}", "comments": comments} for number, comments in counts]
+
+
+def numbers(issues):
+    return [issue["number"] for issue in issues]
+
+
+def test_signature():
+    body = json.dumps(delivery("push.json")[1]).encode()
+    signature = "sha256=" + hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+    assert verify_signature("s3cret", body, signature)
+    assert not verify_signature("other", body, signature)
+    assert not verify_signature("s3cret", body, None)
+
+
+def test_push_changes():
+    _, payload = delivery("push.json")
+    assert is_default_branch_push(payload)
+    assert {change["filename"]: change["status"] for change in push_changes(payload)} == {
+        "backend/webhooks.py": "added",  # added, then modified within the push
+        "backend/main.py": "modified",
+        "README.md": "modified",
+        "backend/old_hooks.py": "removed",
+    }
+
+
+def test_unreliable_pushes_are_not_applied():
+    assert push_changes(delivery("push_forced.json")[1]) is None
+    assert not is_default_branch_push(delivery("push_branch.json")[1])
+    _, payload = delivery("push.json")
+    assert push_changes({**payload, "commits": payload["commits"] * 10}) is None  # possibly truncated
+
+
+def test_closed_issue_leaves_the_list():
+    event, payload = delivery("issues_closed.json")
+    assert numbers(update_active_issues(active((42, 7), (8, 3)), event, payload["action"], payload["issue"])) == [8]
+    # From a full list an unlisted issue would move up into the gap.
+    full = active((42, 7), (8, 6), (9, 5), (10, 4), (11, 3))
+    assert update_active_issues(full, event, payload["action"], payload["issue"]) is None
+
+
+@pytest.mark.parametrize("cached, expected", [
+    ([(42, 7), (8, 3)], [42, 8]),  # still open, one comment fewer
+    ([(8, 9), (42, 7), (9, 5), (10, 4), (11, 3)], [8, 42, 9, 10, 11]),  # full list, keeps its place
+    ([(8, 9), (9, 8), (10, 7), (11, 7), (42, 7)], None),  # drops to last, an unlisted issue may outrank it
+])
+def test_deleted_comment_reranks_instead_of_closing(cached, expected):
+    event, payload = delivery("issue_comment_deleted.json")
+    updated = update_active_issues(active(*cached), event, payload["action"], payload["issue"])
+    assert (numbers(updated) if updated is not None else None) == expected
+    if updated is not None:
+        assert next(issue for issue in updated if issue["number"] == 42)["comments"] == 6
+
+
+def test_new_comment_moves_an_issue_up():
+    event, payload = delivery("issue_comment_created.json")
+    full = active((8, 40), (9, 30), (10, 20), (11, 10), (12, 5))
+    assert numbers(update_active_issues(full, event, payload["action"], payload["issue"])) == [8, 57, 9, 10, 11]
+
+
+def test_comment_on_a_closed_issue_drops_it():
+    event, payload = delivery("issue_comment_created.json")
+    issue = {**payload["issue"], "state": "closed"}
+    assert numbers(update_active_issues(active((57, 30), (8, 3)), event, payload["action"], issue)) == [8]
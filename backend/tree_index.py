@@ -0,0 +1,173 @@
+# backend/tree_index.py
+import contextvars
+import logging
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Subtrees of a truncated listing fetched at once. They run on a pool of
+# their own: the tree fetch itself already holds an upstream worker.
+TREE_FETCH_WORKERS = int(os.getenv("TREE_FETCH_WORKERS", "8"))
+
+# One row per git tree entry. "type" is the git object type: "blob" for files,
+# "tree" for directories and "commit" for submodules.
+TreeEntry = namedtuple("TreeEntry", ["path", "size", "type", "sha"])
+
+
+class TreeIndex:
+    """Compact in-memory index of a repository tree (path, size, type, sha)."""
+
+    __slots__ = ("sha", "entries")
+
+    def __init__(self, sha: str, entries: List[TreeEntry]):
+        self.sha = sha
+        self.entries = entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def iter_files(self):
+        """Yield every non-directory entry in tree order."""
+        for entry in self.entries:
+            if entry.type != "tree":
+                yield entry
+
+    def list_files(self, max_depth=None, max_files=None) -> List[str]:
+        """List file paths ("/dir/file") with the same depth and count caps
+        the old recursive get_contents walk applied."""
+        files = []
+        for entry in self.iter_files():
+            if max_files is not None and len(files) >= max_files:
+                break
+            # A file sits at depth N when it has N parent directories; the walk
+            # only reached files whose depth was below max_depth.
+            if max_depth is not None and entry.path.count("/") >= max_depth:
+                continue
+            files.append(f"/{entry.path}")
+        return files
+
+    def pack(self) -> Dict:
+        """File entries in a compact JSON-friendly form for caching.
+
+        Each directory path is stored once and its files refer to it by
+        position (``{"dirs": [...], "files": [[dir, name, size]]}``), so a deep
+        tree doesn't repeat its directory prefixes for every file. Blob SHAs
+        aren't kept (nothing reads them, and they'd be half the size) and the
+        type is only stored for non-blobs. Directories are implied by paths.
+        """
+        dirs, dir_ids, files = [], {}, []
+        for entry in self.iter_files():
+            directory, _, name = entry.path.rpartition("/")
+            if directory not in dir_ids:
+                dir_ids[directory] = len(dirs)
+                dirs.append(directory)
+            row = [dir_ids[directory], name, entry.size]
+            if entry.type != "blob":
+                row.append(entry.type)
+            files.append(row)
+        return {"dirs": dirs, "files": files}
+
+    @classmethod
+    def unpack(cls, sha: Optional[str], packed: Dict) -> "TreeIndex":
+        dirs = packed["dirs"]
+        return cls(sha, [
+            TreeEntry(
+                f"{dirs[row[0]]}/{row[1]}" if dirs[row[0]] else row[1],
+                row[2],
+                row[3] if len(row) > 3 else "blob",
+                None,
+            )
+            for row in packed["files"]
+        ])
+
+    def apply_changes(self, sha: Optional[str], changes: List[Dict]) -> "TreeIndex":
+        """New index with a compare diff's file changes applied.
+
+        ``changes`` are compare API file records (filename, status, sha and,
+        for renames, previous_filename). Files are kept in path order, which
+        is the order a recursive tree listing returns them in.
+        """
+        files = {entry.path: entry for entry in self.iter_files()}
+        for change in changes:
+            if change["status"] == "renamed":
+                files.pop(change["previous_filename"], None)
+            if change["status"] == "removed":
+                files.pop(change["filename"], None)
+            else:
+                # The compare API reports no sizes; they're unknown until the
+                # next full fetch.
+                files[change["filename"]] = TreeEntry(change["filename"], None, "blob", change["sha"])
+        return TreeIndex(sha, [files[path] for path in sorted(files)])
+
+
+def _entries_from_tree(tree, prefix=""):
+    # Read the response JSON: PyGithub's per-element attributes are several
+    # times slower over a 100k-entry listing.
+    return [
+        TreeEntry(
+            f"{prefix}{element['path']}",
+            element.get("size") if element["type"] == "blob" else None,
+            element["type"],
+            element["sha"],
+        )
+        for element in tree.raw_data["tree"]
+    ]
+
+
+def _map_in_context(pool, func, items) -> list:
+    """pool.map, with each call in a copy of the caller's context (its trace)."""
+    futures = [pool.submit(contextvars.copy_context().run, func, item) for item in items]
+    return [future.result() for future in futures]
+
+
+def _collect_entries(repo, tree, prefix: str = "", workers: int = TREE_FETCH_WORKERS) -> List[TreeEntry]:
+    """Turn a recursive tree response into entries, paging into subtrees when
+    GitHub truncated the listing."""
+    if not tree.raw_data.get("truncated"):
+        return _entries_from_tree(tree, prefix)
+
+    # The recursive listing hit GitHub's entry limit. Fall back to this level
+    # only and fetch each subdirectory as its own (recursive) tree, a level
+    # of truncated trees at a time with the subtrees fetched concurrently.
+    levels = {}  # prefix -> direct entries of a truncated tree
+    complete = {}  # prefix -> every entry below an untruncated subtree
+    truncated = [(tree.sha, prefix)]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tree") as pool:
+        while truncated:
+            logger.warning(f"⚠️ {len(truncated)} tree(s) truncated, paging subtrees...")
+            listings = _map_in_context(pool, lambda item: repo.get_git_tree(item[0]), truncated)
+            subdirs = []
+            for (_, path), listing in zip(truncated, listings):
+                levels[path] = _entries_from_tree(listing, path)
+                subdirs.extend((e.sha, f"{e.path}/") for e in levels[path] if e.type == "tree")
+            subtrees = _map_in_context(pool, lambda item: repo.get_git_tree(item[0], recursive=True), subdirs)
+            truncated = []
+            for (_, path), subtree in zip(subdirs, subtrees):
+                if subtree.raw_data.get("truncated"):
+                    truncated.append((subtree.sha, path))
+                else:
+                    complete[path] = _entries_from_tree(subtree, path)
+
+    def in_tree_order(path):
+        entries = []
+        for entry in levels[path]:
+            entries.append(entry)
+            if entry.type == "tree":
+                below = f"{entry.path}/"
+                entries.extend(complete[below] if below in complete else in_tree_order(below))
+        return entries
+
+    return in_tree_order(prefix)
+
+
+def fetch_tree_index(repo, ref: Optional[str] = None) -> TreeIndex:
+    """Fetch the whole repository tree with one recursive Git Trees call."""
+    ref = ref or repo.default_branch
+    logger.info(f"🌳 Fetching file tree at {ref}...")
+    tree = repo.get_git_tree(ref, recursive=True)
+    entries = _collect_entries(repo, tree)
+    logger.info(f"✅ Indexed {len(entries)} tree entries")
+    return TreeIndex(tree.sha, entries)
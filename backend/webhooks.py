@@ -0,0 +1,92 @@
+# backend/webhooks.py
+import hashlib
+import hmac
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Secret configured on the GitHub webhook; deliveries are rejected without it.
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+
+# A push webhook lists at most this many commits; a push that size may be
+# missing some, so its file changes aren't applied.
+MAX_PUSH_COMMITS = 20
+
+ACTIVE_ISSUES_LIMIT = 5
+# ``issues`` actions that take an issue out of the open ones.
+CLOSING_ACTIONS = ("closed", "deleted", "transferred")
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check an ``X-Hub-Signature-256`` header (``sha256=<hex HMAC>``)."""
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256="):])
+
+
+def is_default_branch_push(payload: Dict) -> bool:
+    branch = (payload.get("repository") or {}).get("default_branch")
+    return bool(branch) and payload.get("ref") == f"refs/heads/{branch}" and not payload.get("deleted")
+
+
+def push_changes(payload: Dict) -> Optional[List[Dict]]:
+    """A push's file changes as compare API records (see incremental.py), or
+    None when they can't be relied on (force-push, possibly truncated).
+
+    Pushes carry no blob SHAs or line counts, so those are left empty.
+    """
+    commits = payload.get("commits") or []
+    if payload.get("forced") or not commits or len(commits) >= MAX_PUSH_COMMITS:
+        return None
+    statuses = {}
+    for commit in commits:
+        for status in ("added", "modified", "removed"):
+            for path in commit.get(status) or []:
+                # A file added and then modified within the push is still new.
+                statuses[path] = "added" if status == "modified" and statuses.get(path) == "added" else status
+    return [
+        {"filename": path, "previous_filename": None, "status": status, "sha": None, "additions": 0, "deletions": 0}
+        for path, status in statuses.items()
+    ]
+
+
+def describe_issue(issue: Dict) -> Dict:
+    """An issue from a webhook payload, in the active_issues format."""
+    created_at = issue.get("created_at")
+    return {
+        "number": issue["number"],
+        "title": issue["title"][:100] + "..." if len(issue["title"]) > 100 else issue["title"],
+        "url": issue["html_url"],
+        "comments": issue.get("comments", 0),
+        "created_at": datetime.fromisoformat(created_at.replace("Z", "+00:00")).isoformat() if created_at else None,
+        "state": issue.get("state", "open"),
+    }
+
+
+def update_active_issues(active: List[Dict], event: str, action: str, issue: Dict,
+                         limit: int = ACTIVE_ISSUES_LIMIT) -> Optional[List[Dict]]:
+    """The most-commented open issues after an ``issues`` or
+    ``issue_comment`` event, or None when the new list depends on issues
+    outside the cached ones.
+
+    Only ``issues`` actions can close an issue; a comment event (even a
+    deleted comment) re-ranks it by the comment count and state it carries.
+    A full cached list only says the unlisted issues have no more comments
+    than its last entry; a list shorter than ``limit`` holds every open issue.
+    """
+    record = describe_issue(issue)
+    others = [item for item in active if item["number"] != record["number"]]
+    listed = len(others) < len(active)
+    full = len(active) >= limit
+    floor = min((item["comments"] for item in active), default=0)
+
+    if (event == "issues" and action in CLOSING_ACTIONS) or record["state"] != "open":
+        if listed and full:
+            return None  # an unlisted issue moves up into the gap
+        return others
+    if full and not listed and record["comments"] <= floor:
+        return active
+    if full and listed and record["comments"] < floor:
+        return None  # dropped to last place, an unlisted issue may now rank above it
+    return sorted(others + [record], key=lambda item: -item["comments"])[:limit]